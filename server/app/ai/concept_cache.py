@@ -0,0 +1,120 @@
+"""
+Bounded TTL/LRU cache of generated concept explanations per category.
+"""
+import os
+import time
+from collections import OrderedDict
+from typing import Callable
+
+CONCEPT_CACHE_MAX_CATEGORIES = int(os.getenv("CONCEPT_CACHE_MAX_CATEGORIES", "256"))
+CONCEPT_CACHE_TTL = float(os.getenv("CONCEPT_CACHE_TTL", "3600"))  # seconds
+CONCEPT_CACHE_POOL_SIZE = int(os.getenv("CONCEPT_CACHE_POOL_SIZE", "5"))
+
+
+class _PoolEntry:
+    __slots__ = ("explanations", "created_at", "cursor")
+
+    def __init__(self, created_at: float):
+        self.explanations: list[str] = []
+        self.created_at = created_at
+        self.cursor = 0
+
+
+class ConceptCache:
+    """
+    Caches up to `pool_size` explanations per category and serves them in
+    rotation once the pool is full, so repeated visitors still see variety.
+    """
+
+    def __init__(
+        self,
+        max_categories: int = CONCEPT_CACHE_MAX_CATEGORIES,
+        ttl: float = CONCEPT_CACHE_TTL,
+        pool_size: int = CONCEPT_CACHE_POOL_SIZE,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if max_categories < 1 or pool_size < 1:
+            raise ValueError("max_categories and pool_size must be positive")
+        self.max_categories = max_categories
+        self.ttl = ttl
+        self.pool_size = pool_size
+        self._clock = clock
+        self._entries: OrderedDict[str, _PoolEntry] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.fallbacks = 0
+
+    @staticmethod
+    def make_key(category: str) -> str:
+        return category.strip().casefold()
+
+    def _is_expired(self, entry: _PoolEntry) -> bool:
+        return self._clock() - entry.created_at >= self.ttl
+
+    def lookup(self, category: str) -> str | None:
+        """Return the next pooled explanation, or None while the pool is still filling"""
+        key = self.make_key(category)
+        entry = self._entries.get(key)
+
+        # Expired pools stay around as fallbacks until the next add() replaces them
+        if entry is None or self._is_expired(entry) or len(entry.explanations) < self.pool_size:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._entries.move_to_end(key)
+        explanation = entry.explanations[entry.cursor]
+        entry.cursor = (entry.cursor + 1) % len(entry.explanations)
+        return explanation
+
+    def fallback(self, category: str) -> str | None:
+        """Return any pooled explanation, even a stale one, for use while upstream is down"""
+        entry = self._entries.get(self.make_key(category))
+        if entry is None or not entry.explanations:
+            return None
+        self.fallbacks += 1
+        return entry.explanations[entry.cursor % len(entry.explanations)]
+
+    def add(self, category: str, explanation: str):
+        """Add a freshly generated explanation to the category's pool"""
+        key = self.make_key(category)
+        # Re-read the entry: it may have expired or been evicted while generating
+        entry = self._entries.get(key)
+        if entry is not None and self._is_expired(entry):
+            self.expirations += 1
+            entry = None
+        if entry is None:
+            entry = _PoolEntry(self._clock())
+            self._entries[key] = entry
+        if len(entry.explanations) < self.pool_size:
+            entry.explanations.append(explanation)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_categories:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, category: str | None = None):
+        """Drop one category, or the whole cache when no category is given"""
+        if category is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(self.make_key(category), None)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "fallbacks": self.fallbacks,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+# Shared cache for the anonymous /get-concept endpoint
+concept_cache = ConceptCache()
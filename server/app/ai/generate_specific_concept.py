@@ -1,96 +1,246 @@
+import json
 import os
 import re
-import requests
-from dotenv import load_dotenv
-from app.security.security import sanitize_ai_input
+from typing import AsyncIterator
+from app.ai.llm_client import chat_completion, stream_chat_completion
+from app.db.concept_repository import normalize_term
+from app.security.security import sanitize_ai_input, sanitize_ai_inputs
 
-# Load environment variables
-load_dotenv()
+TERM_LINE_PATTERN = re.compile(r"\s*Term:[ \t]*([^\n]*?)[ \t]*\n")
+# "Term:" headers in a batch reply, tolerating list numbering and markdown bold
+BATCH_TERM_PATTERN = re.compile(r"^[ \t]*(?:\d+[.)][ \t]*)?\**Term\**:\**[ \t]*(.+?)[ \t*]*$", re.MULTILINE | re.IGNORECASE)
 
-def generate_specific_concept(category: str, seen_terms: list[str]) -> dict:
+# Single-concept replies as a {"term", "explanation"} JSON object, optionally inside a code fence
+JSON_REPLY_PATTERN = re.compile(r"\A\s*(?:```(?:json)?\s*)?(\{.*\})\s*(?:```)?\s*\Z", re.DOTALL | re.IGNORECASE)
+# Free-text fallbacks: "Term: <term>\n<explanation>", then "<term>: <explanation>"
+TERM_REPLY_PATTERN = re.compile(r"Term:\s*(.+?)\n+(.+)", re.DOTALL)
+INLINE_REPLY_PATTERN = re.compile(r"(Term:)?\s*(.+?)\s*:\s*(.+)", re.DOTALL)
+
+# Ask for JSON output when generating a single concept; streaming keeps the "Term:" text format
+STRUCTURED_OUTPUT = os.getenv("LLM_STRUCTURED_OUTPUT", "true").lower() == "true"
+
+# Which parser produced each single-concept result
+parse_stats = {"json": 0, "term_line": 0, "inline": 0, "raw": 0}
+
+SYSTEM_PROMPT = "You are a helpful assistant who explains specific concepts clearly. Only respond with educational content about the requested topic."
+MAX_BATCH_SIZE = 10
+# Seen terms named in the prompt; the full history is enforced after generation
+PROMPT_BLACKLIST_SIZE = 20
+
+
+def _sanitize_prompt_inputs(category: str, seen_terms: list[str]) -> tuple[str, str]:
     if not category:
         raise ValueError("Category is required")
-    
+
     # Sanitize category input
     try:
         safe_category = sanitize_ai_input(category)
     except ValueError as e:
         raise ValueError(f"Invalid category: {str(e)}")
-    
-    # Sanitize seen_terms list
-    safe_seen_terms = []
-    if seen_terms:
-        for term in seen_terms[:20]:  # Limit to 20 terms max
-            try:
-                sanitized_term = sanitize_ai_input(str(term))
-                if sanitized_term:
-                    safe_seen_terms.append(sanitized_term)
-            except ValueError:
-                continue  # Skip invalid terms
-    
-    api_key = os.getenv("OPENROUTER_API_KEY")
-    if not api_key:
-        raise RuntimeError("Missing OpenRouter API key")
-    
-    """
-    Generates a specific concept and its explanation for a given category,
-    excluding previously seen terms.
-    Returns a dictionary: { 'term': ..., 'explanation': ... }
-    """
+
+    # Sanitize seen_terms list, most recent first
+    recent_terms = seen_terms[-PROMPT_BLACKLIST_SIZE:] if seen_terms else []
+    safe_seen_terms = sanitize_ai_inputs(str(term) for term in reversed(recent_terms))
 
     blacklist = ", ".join(safe_seen_terms) if safe_seen_terms else "none"
+    return safe_category, blacklist
+
+
+def build_specific_concept_messages(category: str, seen_terms: list[str], structured: bool = False) -> tuple[list[dict], str]:
+    safe_category, blacklist = _sanitize_prompt_inputs(category, seen_terms)
+    if structured:
+        answer_format = """
+    Respond with a single JSON object and nothing else:
+    {"term": "<term>", "explanation": "<Explanation in 2–3 sentences>"}
+    """
+    else:
+        answer_format = """
+    Format your answer like this:
+    Term: <term>
+    <Explanation in 2–3 sentences>
+    """
     prompt = f"""
     Pick a specific, interesting technical term or key concept from the field of {safe_category},
     that is NOT one of the following: {blacklist}.
 
     Then write a short, clear explanation for it.
+    {answer_format}
+    Avoid vague or generic answers. Avoid repeating general overviews of the field itself.
+    """
 
-    Format your answer like this:
+    messages = [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": prompt.strip()}
+    ]
+    return messages, safe_category
+
+
+def build_specific_concepts_messages(category: str, seen_terms: list[str], count: int) -> list[dict]:
+    safe_category, blacklist = _sanitize_prompt_inputs(category, seen_terms)
+    prompt = f"""
+    Pick exactly {count} distinct, specific, interesting technical terms or key concepts from the field of {safe_category},
+    none of which is one of the following: {blacklist}.
+
+    Then write a short, clear explanation for each of them.
+
+    Format your answer like this, with a blank line between concepts:
     Term: <term>
     <Explanation in 2–3 sentences>
 
     Avoid vague or generic answers. Avoid repeating general overviews of the field itself.
     """
 
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json"
-    }
-
-    body = {
-        "model": os.getenv("OPENROUTER_MODEL"),
-        "messages": [
-            {"role": "system", "content": "You are a helpful assistant who explains specific concepts clearly. Only respond with educational content about the requested topic."},
-            {"role": "user", "content": prompt.strip()}
-        ],
-        "max_tokens": 300,
-        "temperature": 0.7
-    }
-    
-    
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": prompt.strip()}
+    ]
+
+
+def parse_specific_concepts(content: str, seen_terms: list[str] | None = None) -> list[dict]:
+    """
+    Split a batch reply into concepts, dropping empty and duplicate terms and
+    those in `seen_terms`. The caller checks the rest against the full history.
+    """
+    seen_keys = {normalize_term(term) for term in seen_terms or []}
+    batch_keys = set()
+    headers = list(BATCH_TERM_PATTERN.finditer(content))
+    concepts = []
+
+    for index, header in enumerate(headers):
+        end = headers[index + 1].start() if index + 1 < len(headers) else len(content)
+        term = header.group(1).strip()
+        explanation = content[header.end():end].strip()
+        key = normalize_term(term)
+        if not key or not explanation or key in seen_keys or key in batch_keys:
+            continue
+        batch_keys.add(key)
+        concepts.append({"term": term, "explanation": explanation})
+
+    return concepts
+
+
+def parse_json_concept(content: str) -> dict | None:
+    """Return the concept from a JSON reply, or None if it is not a valid {"term", "explanation"} object"""
+    match = JSON_REPLY_PATTERN.match(content)
+    if not match:
+        return None
     try:
-        response = requests.post("https://openrouter.ai/api/v1/chat/completions", headers=headers, json=body)
-        response.raise_for_status()
-        content = response.json().get("choices", [{}])[0].get("message", {}).get("content", "").strip()
-        if not content:
-            raise ValueError("Empty response from model")
-    except requests.exceptions.RequestException as e:
-        raise RuntimeError(f"Failed to fetch concept from model: {e}")
+        data = json.loads(match.group(1))
+    except ValueError:
+        return None
+    if not isinstance(data, dict):
+        return None
+    term, explanation = data.get("term"), data.get("explanation")
+    if not isinstance(term, str) or not isinstance(explanation, str) or not term.strip() or not explanation.strip():
+        return None
+    return {"term": term.strip(), "explanation": explanation.strip()}
 
 
+def parse_specific_concept(content: str, safe_category: str) -> dict:
+    concept = parse_json_concept(content)
+    if concept:
+        parse_stats["json"] += 1
+        return concept
+
     # Try parsing "Term: <term>\n<explanation>"
-    match = re.search(r"Term:\s*(.+?)\n+(.+)", content, re.DOTALL)
+    match = TERM_REPLY_PATTERN.search(content)
     if match:
+        parse_stats["term_line"] += 1
         term = match.group(1).strip()
         explanation = match.group(2).strip()
         return {"term": term, "explanation": explanation}
 
     # Fallback: try parsing "Term: explanation" (everything in one line)
-    match = re.match(r"(Term:)?\s*(.+?)\s*:\s*(.+)", content, re.DOTALL)
+    match = INLINE_REPLY_PATTERN.match(content)
     if match:
+        parse_stats["inline"] += 1
         term = match.group(2).strip()
         explanation = match.group(3).strip()
         return {"term": term, "explanation": explanation}
 
     # Final fallback: return raw
+    parse_stats["raw"] += 1
     return {"term": safe_category.strip(), "explanation": content}
+
+
+async def generate_specific_concept(category: str, seen_terms: list[str]) -> dict:
+    """
+    Generates a specific concept and its explanation for a given category,
+    excluding previously seen terms.
+    Returns a dictionary: { 'term': ..., 'explanation': ... }
+    """
+    messages, safe_category = build_specific_concept_messages(category, seen_terms, structured=STRUCTURED_OUTPUT)
+    content = await chat_completion(messages, max_tokens=300, temperature=0.7, json_mode=STRUCTURED_OUTPUT)
+    return parse_specific_concept(content, safe_category)
+
+
+async def generate_specific_concepts(category: str, seen_terms: list[str], count: int) -> list[dict]:
+    """
+    Generates up to `count` distinct concepts for a category in one completion.
+    Returns a list of { 'term': ..., 'explanation': ... } dictionaries, which
+    may be shorter than `count` if the model repeats itself or drifts.
+    """
+    if not 1 <= count <= MAX_BATCH_SIZE:
+        raise ValueError(f"count must be between 1 and {MAX_BATCH_SIZE}")
+
+    messages = build_specific_concepts_messages(category, seen_terms, count)
+    content = await chat_completion(messages, max_tokens=300 * count, temperature=0.7)
+    return parse_specific_concepts(content, seen_terms)
+
+
+class TermStreamParser:
+    """
+    Incrementally splits a streamed "Term: <term>\\n<explanation>" completion.
+    The term is reported as soon as its line is complete; everything after it
+    is relayed as explanation text. Output that does not start with "Term:"
+    is relayed unchanged.
+    """
+
+    def __init__(self):
+        self.term: str | None = None
+        self._buffer = ""
+        self._header_done = False
+        self._skip_blank = False
+
+    def feed(self, chunk: str) -> tuple[str | None, str]:
+        """Consume a chunk and return (newly found term or None, explanation text)"""
+        if self._header_done:
+            return None, self._relay(chunk)
+
+        self._buffer += chunk
+        head = self._buffer.lstrip()[:5]
+        if not "Term:".startswith(head):
+            return None, self._flush()
+
+        match = TERM_LINE_PATTERN.match(self._buffer)
+        if not match:
+            return None, ""
+
+        self.term = match.group(1).strip() or None
+        rest = self._buffer[match.end():]
+        self._buffer = ""
+        self._header_done = True
+        self._skip_blank = True
+        return self.term, self._relay(rest)
+
+    def finish(self) -> str:
+        """Return any text still buffered when the stream ends"""
+        return "" if self._header_done else self._flush()
+
+    def _flush(self) -> str:
+        text, self._buffer = self._buffer, ""
+        self._header_done = True
+        return text
+
+    def _relay(self, text: str) -> str:
+        # Drop the blank lines between the term line and the explanation
+        if self._skip_blank:
+            text = text.lstrip()
+            self._skip_blank = not text
+        return text
+
+
+def stream_specific_concept(category: str, seen_terms: list[str]) -> tuple[AsyncIterator[str], str]:
+    """Return the raw completion stream together with the sanitized category used to parse it"""
+    messages, safe_category = build_specific_concept_messages(category, seen_terms)
+    return stream_chat_completion(messages, max_tokens=300, temperature=0.7), safe_category
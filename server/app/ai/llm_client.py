@@ -0,0 +1,107 @@
+"""
+Chat completion entry points backed by the configured LLM provider.
+"""
+import os
+from typing import AsyncIterator
+from dotenv import load_dotenv
+from app.ai.providers import LLMProvider, OpenRouterProvider, StubProvider
+from app.ai.upstream_policy import CircuitBreaker, UpstreamError, UpstreamPolicy
+
+# Load environment variables
+load_dotenv()
+
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "openrouter")
+
+OPENROUTER_BASE_URL = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+LLM_READ_TIMEOUT = float(os.getenv("LLM_READ_TIMEOUT", "30"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "100"))
+LLM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "20"))
+LLM_HTTP2 = os.getenv("LLM_HTTP2", "true").lower() == "true"
+
+LLM_STUB_LATENCY = float(os.getenv("LLM_STUB_LATENCY", "0.2"))
+LLM_STUB_ERROR_RATE = float(os.getenv("LLM_STUB_ERROR_RATE", "0"))
+LLM_STUB_TOKENS_PER_SECOND = float(os.getenv("LLM_STUB_TOKENS_PER_SECOND", "50"))
+LLM_STUB_SEED = int(os.getenv("LLM_STUB_SEED", "0"))
+
+LLM_RETRY_ATTEMPTS = int(os.getenv("LLM_RETRY_ATTEMPTS", "3"))
+LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", "0.2"))
+LLM_RETRY_MAX_DELAY = float(os.getenv("LLM_RETRY_MAX_DELAY", "2"))
+LLM_BREAKER_FAILURE_THRESHOLD = int(os.getenv("LLM_BREAKER_FAILURE_THRESHOLD", "5"))
+LLM_BREAKER_RESET_TIMEOUT = float(os.getenv("LLM_BREAKER_RESET_TIMEOUT", "30"))
+LLM_HEDGE = os.getenv("LLM_HEDGE", "false").lower() == "true"
+LLM_HEDGE_DEFAULT_DELAY = float(os.getenv("LLM_HEDGE_DEFAULT_DELAY", "2"))
+
+# Retries, circuit breaker and hedging shared by every upstream call in this process
+upstream_policy = UpstreamPolicy(
+    breaker=CircuitBreaker(LLM_BREAKER_FAILURE_THRESHOLD, LLM_BREAKER_RESET_TIMEOUT),
+    retry_attempts=LLM_RETRY_ATTEMPTS,
+    retry_base_delay=LLM_RETRY_BASE_DELAY,
+    retry_max_delay=LLM_RETRY_MAX_DELAY,
+    hedge=LLM_HEDGE,
+    hedge_default_delay=LLM_HEDGE_DEFAULT_DELAY,
+)
+
+# One provider per process, created lazily on first use
+_provider: LLMProvider | None = None
+
+
+def create_provider(name: str = LLM_PROVIDER) -> LLMProvider:
+    if name == "openrouter":
+        return OpenRouterProvider(
+            base_url=OPENROUTER_BASE_URL,
+            connect_timeout=LLM_CONNECT_TIMEOUT,
+            read_timeout=LLM_READ_TIMEOUT,
+            max_connections=LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=LLM_MAX_KEEPALIVE_CONNECTIONS,
+            http2=LLM_HTTP2,
+        )
+    if name == "stub":
+        return StubProvider(
+            latency=LLM_STUB_LATENCY,
+            error_rate=LLM_STUB_ERROR_RATE,
+            tokens_per_second=LLM_STUB_TOKENS_PER_SECOND,
+            seed=LLM_STUB_SEED,
+        )
+    raise ValueError(f"Unknown LLM provider: {name}")
+
+
+def get_provider() -> LLMProvider:
+    global _provider
+    if _provider is None:
+        _provider = create_provider()
+    return _provider
+
+
+async def close_llm_client():
+    """Close the provider and release its pooled connections"""
+    global _provider
+    if _provider is not None:
+        await _provider.close()
+        _provider = None
+
+
+async def chat_completion(messages: list[dict], max_tokens: int, temperature: float = 0.7, json_mode: bool = False) -> str:
+    """Send a chat completion request and return the stripped message content"""
+    provider = get_provider()
+    content = (await upstream_policy.call(lambda: provider.complete(messages, max_tokens, temperature, json_mode))).strip()
+    if not content:
+        raise ValueError("Empty response from model")
+    return content
+
+
+async def stream_chat_completion(messages: list[dict], max_tokens: int, temperature: float = 0.7) -> AsyncIterator[str]:
+    """Send a streaming chat completion request and yield content deltas as they arrive"""
+    # Tokens already relayed cannot be taken back, so streams get the breaker but no retries or hedging
+    breaker = upstream_policy.breaker
+    breaker.before_call()
+    try:
+        async for delta in get_provider().stream(messages, max_tokens, temperature):
+            yield delta
+    except UpstreamError:
+        breaker.record_failure()
+        raise
+    except BaseException:
+        breaker.abandon_trial()
+        raise
+    breaker.record_success()
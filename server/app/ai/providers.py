@@ -0,0 +1,185 @@
+"""
+LLM provider backends: OpenRouter over a pooled HTTP client, and a
+deterministic local stub for offline load and latency testing.
+"""
+import asyncio
+import json
+from abc import ABC, abstractmethod
+import os
+import random
+import re
+from typing import AsyncIterator
+import httpx
+from app.ai.upstream_policy import UpstreamError
+
+
+def _upstream_error(e: httpx.HTTPError) -> UpstreamError:
+    # Timeouts, connection failures, rate limits and 5xx are safe to retry
+    retryable = True
+    if isinstance(e, httpx.HTTPStatusError):
+        status = e.response.status_code
+        retryable = status == 429 or status >= 500
+    return UpstreamError(f"Failed to fetch concept from model: {e}", retryable=retryable)
+
+
+class LLMProvider(ABC):
+    """Interface shared by all chat completion backends"""
+
+    name = "base"
+
+    @abstractmethod
+    async def complete(self, messages: list[dict], max_tokens: int, temperature: float, json_mode: bool = False) -> str:
+        """Return the completion text; `json_mode` asks the model for a single JSON object"""
+
+    @abstractmethod
+    def stream(self, messages: list[dict], max_tokens: int, temperature: float) -> AsyncIterator[str]:
+        """Yield the completion text as it arrives"""
+
+    async def close(self):
+        pass
+
+
+class OpenRouterProvider(LLMProvider):
+    """OpenRouter chat completions over one pooled, HTTP/2-capable client"""
+
+    name = "openrouter"
+
+    def __init__(
+        self,
+        base_url: str = "https://openrouter.ai/api/v1",
+        connect_timeout: float = 5,
+        read_timeout: float = 30,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        http2: bool = True,
+        client: httpx.AsyncClient | None = None,
+    ):
+        self.base_url = base_url
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive_connections)
+        self.http2 = http2
+        self._client = client
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Created lazily so the pool binds to the running event loop
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url, http2=self.http2, timeout=self.timeout, limits=self.limits
+            )
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _build_request(self, messages: list[dict], max_tokens: int, temperature: float) -> tuple[dict, dict]:
+        api_key = os.getenv("OPENROUTER_API_KEY")
+        if not api_key:
+            raise RuntimeError("Missing OpenRouter API key")
+
+        headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        }
+
+        body = {
+            "model": os.getenv("OPENROUTER_MODEL"),
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature
+        }
+        return headers, body
+
+    async def complete(self, messages: list[dict], max_tokens: int, temperature: float, json_mode: bool = False) -> str:
+        headers, body = self._build_request(messages, max_tokens, temperature)
+        if json_mode:
+            body["response_format"] = {"type": "json_object"}
+
+        try:
+            response = await self.client.post("/chat/completions", headers=headers, json=body)
+            response.raise_for_status()
+            return response.json().get("choices", [{}])[0].get("message", {}).get("content", "")
+        except httpx.HTTPError as e:
+            raise _upstream_error(e)
+
+    async def stream(self, messages: list[dict], max_tokens: int, temperature: float) -> AsyncIterator[str]:
+        headers, body = self._build_request(messages, max_tokens, temperature)
+        body["stream"] = True
+
+        try:
+            async with self.client.stream("POST", "/chat/completions", headers=headers, json=body) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    # Skip blank separators and SSE comments such as keep-alives
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+                    delta = json.loads(data).get("choices", [{}])[0].get("delta", {}).get("content")
+                    if delta:
+                        yield delta
+        except httpx.HTTPError as e:
+            raise _upstream_error(e)
+
+
+class StubProvider(LLMProvider):
+    """
+    Deterministic offline backend. Replies follow the prompt's expected format,
+    arrive after `latency` seconds plus `tokens / tokens_per_second`, and fail
+    with probability `error_rate`. The same seed gives the same sequence.
+    """
+
+    name = "stub"
+
+    def __init__(self, latency: float = 0.2, error_rate: float = 0.0, tokens_per_second: float = 50.0, seed: int = 0):
+        if not 0 <= error_rate <= 1:
+            raise ValueError("error_rate must be between 0 and 1")
+        self.latency = latency
+        self.error_rate = error_rate
+        self.tokens_per_second = tokens_per_second
+        self._rng = random.Random(seed)
+        self._counter = 0
+
+    def _reply(self, messages: list[dict], json_mode: bool = False) -> list[str]:
+        self._counter += 1
+        if self._rng.random() < self.error_rate:
+            raise UpstreamError("Failed to fetch concept from model: stub provider error")
+
+        prompt = messages[-1]["content"] if messages else ""
+        batch = re.search(r"exactly (\d+) distinct", prompt)
+        count = int(batch.group(1)) if batch else 1
+
+        blocks = []
+        for index in range(count):
+            number = f"{self._counter}.{index + 1}" if batch else str(self._counter)
+            explanation = (
+                f"Stub concept number {number} is a deterministic placeholder explanation. "
+                "It exists so the service can be load tested without a real model."
+            )
+            if json_mode:
+                blocks.append(json.dumps({"term": f"Stub Concept {number}", "explanation": explanation}))
+            elif "Term:" in prompt:
+                blocks.append(f"Term: Stub Concept {number}\n{explanation}")
+            else:
+                blocks.append(explanation)
+        text = "\n\n".join(blocks)
+        # Whitespace-delimited words stand in for tokens
+        return [word + " " for word in text.split(" ")[:-1]] + [text.split(" ")[-1]]
+
+    def _token_delay(self) -> float:
+        return 1 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+    async def complete(self, messages: list[dict], max_tokens: int, temperature: float, json_mode: bool = False) -> str:
+        tokens = self._reply(messages, json_mode)[:max_tokens]
+        await asyncio.sleep(self.latency + len(tokens) * self._token_delay())
+        return "".join(tokens)
+
+    async def stream(self, messages: list[dict], max_tokens: int, temperature: float) -> AsyncIterator[str]:
+        tokens = self._reply(messages)[:max_tokens]
+        await asyncio.sleep(self.latency)
+        for token in tokens:
+            await asyncio.sleep(self._token_delay())
+            yield token
@@ -0,0 +1,47 @@
+"""
+In-process single-flight coalescing of identical concurrent upstream calls.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class SingleFlight:
+    """
+    Concurrent callers using the same key await one shared upstream call.
+    The shared call is shielded, so a cancelled waiter never cancels it for
+    the others, and its result or exception is delivered to every waiter.
+    """
+
+    def __init__(self):
+        self._in_flight: dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.upstream_calls = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        self.calls += 1
+        task = self._in_flight.get(key)
+        if task is None:
+            self.upstream_calls += 1
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Future):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # Mark the exception as retrieved in case every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "upstream_calls": self.upstream_calls,
+            "saved_calls": self.calls - self.upstream_calls,
+            "in_flight": len(self._in_flight),
+        }
+
+
+# Shared coalescing layer for LLM concept generation
+concept_flight = SingleFlight()
@@ -0,0 +1,190 @@
+"""
+Upstream-call policy for LLM requests: jittered retries, a circuit breaker
+and optional hedged requests, each with counters for observability.
+"""
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Awaitable, Callable, TypeVar
+
+T = TypeVar("T")
+
+
+class UpstreamError(RuntimeError):
+    """An upstream LLM failure; `retryable` marks transient, idempotent failures"""
+
+    def __init__(self, message: str, retryable: bool = True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class CircuitOpenError(UpstreamError):
+    """Raised without calling upstream while the circuit breaker is open"""
+
+    def __init__(self, retry_after: float):
+        super().__init__("LLM provider is temporarily unavailable", retryable=False)
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and rejects calls
+    for `reset_timeout` seconds, then lets a single trial call through
+    (half-open). A successful trial closes it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30, clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self.times_opened = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._trial_in_flight = False
+        return self._state
+
+    def before_call(self):
+        """Raise CircuitOpenError if the call must not reach upstream"""
+        state = self.state
+        if state == self.CLOSED:
+            return
+        if state == self.HALF_OPEN and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return
+        self.rejected += 1
+        raise CircuitOpenError(max(self.reset_timeout - (self._clock() - self._opened_at), 0.0))
+
+    def record_success(self):
+        self._state = self.CLOSED
+        self._failures = 0
+        self._trial_in_flight = False
+
+    def abandon_trial(self):
+        """Forget a half-open trial that ended without an upstream verdict (e.g. cancellation)"""
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self._failures += 1
+        if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+            if self._state != self.OPEN:
+                self.times_opened += 1
+            self._state = self.OPEN
+            self._opened_at = self._clock()
+            self._trial_in_flight = False
+
+
+class UpstreamPolicy:
+    """Wraps upstream calls with retries, the circuit breaker and optional hedging"""
+
+    def __init__(
+        self,
+        breaker: CircuitBreaker | None = None,
+        retry_attempts: int = 3,
+        retry_base_delay: float = 0.2,
+        retry_max_delay: float = 2.0,
+        hedge: bool = False,
+        hedge_quantile: float = 0.95,
+        hedge_min_samples: int = 20,
+        hedge_default_delay: float = 2.0,
+    ):
+        self.breaker = breaker or CircuitBreaker()
+        self.retry_attempts = max(retry_attempts, 1)
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_default_delay = hedge_default_delay
+        self._latencies: deque[float] = deque(maxlen=200)
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def backoff_delay(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for the given zero-based attempt"""
+        return random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * 2 ** attempt))
+
+    def hedge_delay(self) -> float:
+        """Delay before sending a hedge: the recent latency quantile, once enough samples exist"""
+        if len(self._latencies) < self.hedge_min_samples:
+            return self.hedge_default_delay
+        ordered = sorted(self._latencies)
+        return ordered[min(int(len(ordered) * self.hedge_quantile), len(ordered) - 1)]
+
+    async def call(self, fn: Callable[[], Awaitable[T]]) -> T:
+        for attempt in range(self.retry_attempts):
+            self.breaker.before_call()
+            try:
+                result = await self._attempt(fn)
+            except UpstreamError as e:
+                self.breaker.record_failure()
+                if not e.retryable or attempt == self.retry_attempts - 1:
+                    raise
+                self.retries += 1
+                await asyncio.sleep(self.backoff_delay(attempt))
+            except BaseException:
+                self.breaker.abandon_trial()
+                raise
+            else:
+                self.breaker.record_success()
+                return result
+
+    async def _timed(self, fn: Callable[[], Awaitable[T]]) -> T:
+        start = time.perf_counter()
+        result = await fn()
+        self._latencies.append(time.perf_counter() - start)
+        return result
+
+    async def _attempt(self, fn: Callable[[], Awaitable[T]]) -> T:
+        if not self.hedge:
+            return await self._timed(fn)
+
+        primary = asyncio.ensure_future(self._timed(fn))
+        pending = {primary}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=self.hedge_delay())
+            if done:
+                return primary.result()
+
+            # The primary is slower than usual: race a second request against it
+            self.hedges += 1
+            hedge = asyncio.ensure_future(self._timed(fn))
+            pending = {primary, hedge}
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            # Cancel the loser, or everything if the caller was cancelled
+            for task in pending:
+                task.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "breaker_state": self.breaker.state,
+            "breaker_opened": self.breaker.times_opened,
+            "breaker_rejected": self.breaker.rejected,
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "hedge_win_rate": self.hedge_wins / self.hedges if self.hedges else 0.0,
+        }
@@ -1,43 +1,56 @@
 from fastapi import APIRouter, HTTPException, Query, Depends, Request
-import time
-from collections import defaultdict
+from fastapi.responses import StreamingResponse
+import json
+import math
+from typing import AsyncIterator
 
-from app.ai.ai import generate_concept
-from app.services.daily_concept_service import get_daily_concept_service
+from app.ai.ai import generate_concept, stream_concept
+from app.ai.concept_cache import concept_cache
+from app.ai.single_flight import concept_flight
+from app.ai.upstream_policy import CircuitOpenError, UpstreamError
+from app.db.daily_concept_repository import list_daily_concepts
+from app.services.daily_concept_service import get_daily_concept_service, stream_daily_concept_service
 from app.security.auth_middleware import get_current_user
+from app.security.rate_limiter import describe_window, get_rate_limiter
 from app.security.security import sanitize_string_input, validate_object_id
 
 router = APIRouter()
 
-# Simple rate limiting for public endpoint
-rate_limit_storage = defaultdict(list)
-RATE_LIMIT_REQUESTS = 5  # 5 requests
-RATE_LIMIT_WINDOW = 3600  # per hour (3600 seconds)
-
-def check_rate_limit(request: Request):
-    """Simple rate limiting by IP address"""
-    client_ip = request.client.host
-    current_time = time.time()
-    
-    # Clean old requests
-    rate_limit_storage[client_ip] = [
-        req_time for req_time in rate_limit_storage[client_ip]
-        if current_time - req_time < RATE_LIMIT_WINDOW
-    ]
-    
-    # Check if over limit
-    if len(rate_limit_storage[client_ip]) >= RATE_LIMIT_REQUESTS:
+async def check_rate_limit(request: Request, route: str = "default"):
+    """Rate limiting by IP address for the public endpoints"""
+    limiter = get_rate_limiter(route)
+    allowed, retry_after = await limiter.acquire(request.client.host)
+    if not allowed:
         raise HTTPException(
             status_code=429, 
-            detail="Rate limit exceeded: 5 requests per hour. Sign up for unlimited access!"
+            detail=f"Rate limit exceeded: {limiter.limit} requests per {describe_window(limiter.window)}. Sign up for unlimited access!",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
         )
-    
-    # Add current request
-    rate_limit_storage[client_ip].append(current_time)
+
+def upstream_unavailable(e: UpstreamError) -> HTTPException:
+    """503 for a degraded LLM provider, with Retry-After while the circuit breaker is open"""
+    headers = {"Retry-After": str(math.ceil(e.retry_after))} if isinstance(e, CircuitOpenError) else None
+    return HTTPException(status_code=503, detail="Concept generation is temporarily unavailable", headers=headers)
+
+
+async def generate_concept_coalesced(category: str) -> str:
+    """
+    Share one upstream generation between concurrent requests for the same
+    category. Only the shared call adds the result to the cache, so coalesced
+    requests do not add it once each.
+    """
+    async def generate_and_cache() -> str:
+        concept = await generate_concept(category)
+        concept_cache.add(category, concept)
+        return concept
+
+    key = ("concept", concept_cache.make_key(category))
+    return await concept_flight.do(key, generate_and_cache)
+
 
 @router.get("/get-concept")
-def get_concept(category: str = Query(...), request: Request = None):
-    check_rate_limit(request)
+async def get_concept(category: str = Query(...), request: Request = None):
+    await check_rate_limit(request, "get-concept")
     
     # Sanitize category input
     try:
@@ -45,10 +58,68 @@ def get_concept(category: str = Query(...), request: Request = None):
     except ValueError as e:
         raise HTTPException(status_code=400, detail=f"Invalid category: {str(e)}")
     
-    concept = generate_concept(sanitized_category)
+    try:
+        concept = concept_cache.lookup(sanitized_category)
+        if concept is None:
+            concept = await generate_concept_coalesced(sanitized_category)
+    except UpstreamError as e:
+        # Serve a previously generated explanation while the provider is degraded
+        concept = concept_cache.fallback(sanitized_category)
+        if concept is None:
+            raise upstream_unavailable(e)
     return {"category": sanitized_category, "concept": concept}
 
 
+def format_sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def sse_stream(events: AsyncIterator[tuple[str, dict]]) -> AsyncIterator[str]:
+    """Encode (event, data) pairs as Server-Sent Events, ending with an error event on failure"""
+    try:
+        async for event, data in events:
+            yield format_sse(event, data)
+    except (ValueError, RuntimeError):
+        yield format_sse("error", {"detail": "Failed to generate concept"})
+
+
+def sse_response(events: AsyncIterator[tuple[str, dict]]) -> StreamingResponse:
+    return StreamingResponse(
+        sse_stream(events),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def concept_events(category: str, cached: str | None) -> AsyncIterator[tuple[str, dict]]:
+    if cached is None:
+        chunks = []
+        async for chunk in stream_concept(category):
+            chunks.append(chunk)
+            yield "token", {"text": chunk}
+        concept = "".join(chunks).strip()
+        if not concept:
+            raise ValueError("Empty response from model")
+        concept_cache.add(category, concept)
+    else:
+        concept = cached
+        yield "token", {"text": concept}
+    yield "done", {"category": category, "concept": concept}
+
+
+@router.get("/get-concept/stream")
+async def stream_concept_endpoint(category: str = Query(...), request: Request = None):
+    await check_rate_limit(request, "get-concept-stream")
+
+    # Sanitize category input
+    try:
+        sanitized_category = sanitize_string_input(category, max_length=50)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid category: {str(e)}")
+
+    return sse_response(concept_events(sanitized_category, concept_cache.lookup(sanitized_category)))
+
+
 @router.get("/daily-concept")
 async def get_specific_concept(
     category: str = Query(...), 
@@ -70,3 +141,55 @@ async def get_specific_concept(
         return await get_daily_concept_service(user_id, sanitized_category)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
+    except UpstreamError as e:
+        raise upstream_unavailable(e)
+
+
+@router.get("/daily-concept/stream")
+async def stream_specific_concept_endpoint(
+    category: str = Query(...),
+    user_id: str = Query(...),
+    current_user: dict = Depends(get_current_user)
+):
+    # Sanitize and validate inputs
+    try:
+        sanitized_category = sanitize_string_input(category, max_length=50)
+        validate_object_id(user_id)  # Validate user_id format
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid input: {str(e)}")
+
+    # Verify that the user can only access their own data
+    if current_user["user_id"] != user_id:
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    try:
+        events = await stream_daily_concept_service(user_id, sanitized_category)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except UpstreamError as e:
+        raise upstream_unavailable(e)
+    return sse_response(events)
+
+
+@router.get("/daily-concept/history")
+async def get_concept_history(
+    user_id: str = Query(...),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = Query(None),
+    current_user: dict = Depends(get_current_user)
+):
+    """Past concepts, newest first; pass next_cursor back to get the following page"""
+    try:
+        validate_object_id(user_id)  # Validate user_id format
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid input: {str(e)}")
+
+    # Verify that the user can only access their own data
+    if current_user["user_id"] != user_id:
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    try:
+        concepts, next_cursor = await list_daily_concepts(user_id, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"concepts": concepts, "next_cursor": next_cursor}
@@ -5,9 +5,19 @@ from app.services.user_service import register_user, authenticate_user
 from app.db.user_repository import add_interest, remove_interest
 from app.security.auth_middleware import get_current_user
 from app.security.auth_service import create_access_token
+from app.security.password_hashing import PasswordPoolSaturatedError
 
 router = APIRouter()
 
+
+def password_pool_saturated(e: PasswordPoolSaturatedError) -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="Server is busy, please retry",
+        headers={"Retry-After": str(int(e.retry_after))},
+    )
+
+
 @router.post("/users", response_model=UserLoginResponse)
 async def create_user(user: UserCreate):
     try:
@@ -24,11 +34,16 @@ async def create_user(user: UserCreate):
         )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    except PasswordPoolSaturatedError as e:
+        raise password_pool_saturated(e)
 
 
 @router.post("/login", response_model=UserLoginResponse)
 async def login(user: UserLogin):
-    authenticated_user = await authenticate_user(user)
+    try:
+        authenticated_user = await authenticate_user(user)
+    except PasswordPoolSaturatedError as e:
+        raise password_pool_saturated(e)
     if not authenticated_user:
         raise HTTPException(status_code=401, detail="Invalid email or password")
     return authenticated_user
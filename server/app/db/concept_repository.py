@@ -0,0 +1,89 @@
+import html
+import re
+from app.db.mongodb import db
+from bson import ObjectId
+from pymongo import ASCENDING, UpdateOne
+from pymongo.errors import BulkWriteError
+from datetime import datetime, timezone
+
+_NON_WORD = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_term(term: str) -> str:
+    """Canonical key for a term: unescaped, casefolded, punctuation stripped, single-spaced"""
+    text = _NON_WORD.sub(" ", html.unescape(term).casefold())
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def normalize_category(category: str) -> str:
+    return _WHITESPACE.sub(" ", category.casefold()).strip()
+
+
+async def ensure_concept_indexes():
+    await db["concepts"].create_index(
+        [("category_key", ASCENDING), ("term_key", ASCENDING)],
+        unique=True,
+        name="category_term_unique",
+    )
+
+
+# Pick a catalog concept in `category` that the user has not seen, as an anti-join
+# against daily_concepts run by the server, so the user's history is never sent.
+# Catalog entries are walked in term_key order on the unique (category_key, term_key)
+# index and each is checked with a point lookup on daily_concepts' user_category_term index
+# ($lookup with both localField and pipeline needs MongoDB 5.0).
+async def find_unseen_concept(category: str, user_id: ObjectId) -> dict | None:
+    category_key = normalize_category(category)
+    cursor = db["concepts"].aggregate([
+        {"$match": {"category_key": category_key}},
+        {"$sort": {"term_key": ASCENDING}},
+        {"$lookup": {
+            "from": "daily_concepts",
+            "localField": "term_key",
+            "foreignField": "term_key",
+            "pipeline": [{"$match": {"user_id": user_id, "category_key": category_key}}, {"$limit": 1}, {"$project": {"_id": 1}}],
+            "as": "seen",
+        }},
+        {"$match": {"seen": {"$size": 0}}},
+        {"$limit": 1},
+        {"$project": {"_id": 0, "term": 1, "explanation": 1}},
+    ])
+    concepts = await cursor.to_list(length=1)
+    return concepts[0] if concepts else None
+
+
+# Store a generated concept once per (category, normalized term)
+async def add_concept_to_catalog(category: str, term: str, explanation: str):
+    await add_concepts_to_catalog(category, [{"term": term, "explanation": explanation}])
+
+
+# Store several concepts of one category with a single bulk write
+async def add_concepts_to_catalog(category: str, concepts: list[dict]):
+    category_key = normalize_category(category)
+    now = datetime.now(timezone.utc)
+    operations = []
+    for concept in concepts:
+        term_key = normalize_term(concept["term"])
+        if not term_key:
+            continue
+        operations.append(UpdateOne(
+            {"category_key": category_key, "term_key": term_key},
+            {
+                "$setOnInsert": {
+                    "category": category,
+                    "term": concept["term"],
+                    "explanation": concept["explanation"],
+                    "created_at": now,
+                }
+            },
+            upsert=True,
+        ))
+    if not operations:
+        return
+    try:
+        await db["concepts"].bulk_write(operations, ordered=False)
+    except BulkWriteError as e:
+        # Duplicate keys only mean a concurrent request stored the same term first
+        if any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])):
+            raise
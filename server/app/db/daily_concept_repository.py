@@ -0,0 +1,185 @@
+import base64
+import json
+from app.db.mongodb import db
+from app.db.concept_repository import normalize_category, normalize_term
+from app.security.security import sanitize_string_input, sanitize_html_content, validate_object_id
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from datetime import datetime, timedelta, timezone
+
+# One document per user, category and day served; together they are the user's history.
+# Terms migrated from the old embedded history have no day and no "date" field.
+_CONCEPT_FIELDS = {"_id": 0, "category": 1, "term": 1, "explanation": 1}
+
+
+async def ensure_daily_concept_indexes():
+    # One concept per user, day and category; also serves the (user_id, date) lookups and
+    # the newest-first history pages. Partial, so migrated terms without a day are allowed.
+    await db["daily_concepts"].create_index(
+        [("user_id", ASCENDING), ("date", ASCENDING), ("category_key", ASCENDING)],
+        unique=True,
+        partialFilterExpression={"date": {"$exists": True}},
+        name="user_date_category_unique",
+    )
+    # A user's terms in a category in the order they were seen; serves the newest-first prompt reads
+    await db["daily_concepts"].create_index(
+        [("user_id", ASCENDING), ("category_key", ASCENDING), ("_id", ASCENDING)],
+        name="user_category_seen",
+    )
+    # Whether a user has seen a term: point queries and the catalog's anti-join
+    await db["daily_concepts"].create_index(
+        [("user_id", ASCENDING), ("category_key", ASCENDING), ("term_key", ASCENDING)],
+        name="user_category_term",
+    )
+    # Expired generation claims are only cleaned up here; claims check expires_at themselves
+    await db["generation_claims"].create_index([("expires_at", ASCENDING)], expireAfterSeconds=0, name="expires_at_ttl")
+
+
+# Commit the concept served to a user on `date` (default: today, UTC) in one round trip.
+# The entry is both the day's concept and the history entry, so they cannot disagree.
+# Returns None when this call filled the slot, or the concept another request
+# committed first, which is left as it was.
+async def commit_daily_concept(user_id: str, category: str, term: str, explanation: str, date: str | None = None) -> dict | None:
+    # Sanitize all inputs
+    sanitized_category = sanitize_string_input(category, max_length=50)
+    sanitized_term = sanitize_html_content(term, max_length=200)
+    sanitized_explanation = sanitize_html_content(explanation, max_length=2000)
+    object_id = validate_object_id(user_id)
+
+    date = date or datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    slot = {"user_id": object_id, "date": date, "category_key": normalize_category(sanitized_category)}
+    try:
+        return await db["daily_concepts"].find_one_and_update(
+            slot,
+            {
+                "$setOnInsert": {
+                    "category": sanitized_category,
+                    "term": sanitized_term,
+                    "term_key": normalize_term(sanitized_term),
+                    "explanation": sanitized_explanation,
+                }
+            },
+            projection=_CONCEPT_FIELDS,
+            upsert=True,
+            # The document before the update: None when it was inserted
+            return_document=ReturnDocument.BEFORE,
+        )
+    except DuplicateKeyError:
+        # A concurrent upsert inserted the slot first
+        return await db["daily_concepts"].find_one(slot, _CONCEPT_FIELDS)
+
+
+# Claim the generation of a user's concept for `date` on behalf of `owner`, for
+# `lease_seconds`. Succeeds when nobody holds the claim, the holder's lease has
+# expired (it crashed or hung) or `owner` already holds it. Works across processes.
+async def claim_generation(user_id: str, date: str, owner: str, lease_seconds: float) -> bool:
+    object_id = validate_object_id(user_id)
+    now = datetime.now(timezone.utc)
+    try:
+        await db["generation_claims"].find_one_and_update(
+            {"_id": f"{object_id}:{date}", "$or": [{"expires_at": {"$lte": now}}, {"owner": owner}]},
+            {"$set": {"owner": owner, "expires_at": now + timedelta(seconds=lease_seconds)}},
+            projection={"_id": 1},
+            upsert=True,
+        )
+    except DuplicateKeyError:
+        # The claim exists and is held by someone else
+        return False
+    return True
+
+
+# Give up a claim, unless its lease expired and another owner took it over
+async def release_generation(user_id: str, date: str, owner: str):
+    object_id = validate_object_id(user_id)
+    await db["generation_claims"].delete_one({"_id": f"{object_id}:{date}", "owner": owner})
+
+
+# The concept a user was served on `date`, in any category
+async def get_daily_concept(user_id: ObjectId, date: str) -> dict | None:
+    return await db["daily_concepts"].find_one({"user_id": user_id, "date": date}, _CONCEPT_FIELDS)
+
+
+# The `limit` newest terms the user has seen in a category, oldest first, as prompts name them
+async def get_recent_seen_terms(user_id: ObjectId, category: str, limit: int) -> list[str]:
+    entries = await db["daily_concepts"].find(
+        {"user_id": user_id, "category_key": normalize_category(category)},
+        {"_id": 0, "term": 1},
+    ).sort("_id", DESCENDING).limit(limit).to_list(length=limit)
+    return [entry["term"] for entry in reversed(entries)]
+
+
+# Whether the user has seen `term` in a category, by normalized key; one index point query
+async def has_seen_term(user_id: ObjectId, category: str, term: str) -> bool:
+    entry = await db["daily_concepts"].find_one(
+        {"user_id": user_id, "category_key": normalize_category(category), "term_key": normalize_term(term)},
+        {"_id": 1},
+    )
+    return entry is not None
+
+
+# Which of `term_keys` the user has seen in a category; one $in query on the
+# user_category_term index, however long the user's history is
+async def find_seen_term_keys(user_id: ObjectId, category: str, term_keys: list[str]) -> set[str]:
+    entries = await db["daily_concepts"].find(
+        {"user_id": user_id, "category_key": normalize_category(category), "term_key": {"$in": term_keys}},
+        {"_id": 0, "term_key": 1},
+    ).to_list(length=None)
+    return {entry["term_key"] for entry in entries}
+
+
+# The `limit` newest seen terms per category for a batch of users in one query:
+# {user_id: {category_key: [terms oldest first]}}. The sort walks the
+# user_category_seen index backwards and only the sliced terms are returned.
+async def get_recent_seen_terms_for_users(user_ids: list[ObjectId], limit: int) -> dict[ObjectId, dict[str, list[str]]]:
+    seen: dict[ObjectId, dict[str, list[str]]] = {}
+    cursor = db["daily_concepts"].aggregate([
+        {"$match": {"user_id": {"$in": user_ids}}},
+        {"$sort": {"user_id": DESCENDING, "category_key": DESCENDING, "_id": DESCENDING}},
+        {"$group": {"_id": {"user_id": "$user_id", "category_key": "$category_key"}, "terms": {"$push": "$term"}}},
+        {"$project": {"terms": {"$slice": ["$terms", limit]}}},
+    ])
+    async for group in cursor:
+        seen.setdefault(group["_id"]["user_id"], {})[group["_id"]["category_key"]] = group["terms"][::-1]
+    return seen
+
+
+def encode_history_cursor(date: str, category_key: str) -> str:
+    return base64.urlsafe_b64encode(json.dumps([date, category_key]).encode()).decode()
+
+
+def decode_history_cursor(cursor: str) -> tuple[str, str]:
+    """Raises ValueError for anything encode_history_cursor did not produce"""
+    try:
+        date, category_key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(date, str) or not isinstance(category_key, str):
+        raise ValueError("Invalid cursor")
+    return date, category_key
+
+
+# One page of a user's past concepts, newest first. Keyset pagination on
+# (date, category_key): each page is an index range scan, however deep it is.
+# Returns the page and the cursor for the next one, or None on the last page.
+async def list_daily_concepts(user_id: str, limit: int, cursor: str | None = None) -> tuple[list[dict], str | None]:
+    object_id = validate_object_id(user_id)
+
+    query = {"user_id": object_id, "date": {"$exists": True}}
+    if cursor:
+        date, category_key = decode_history_cursor(cursor)
+        # The plain date bound keeps the query on the partial index
+        query["date"] = {"$lte": date}
+        query["$or"] = [{"date": {"$lt": date}}, {"category_key": {"$lt": category_key}}]
+
+    entries = await db["daily_concepts"].find(
+        query, {"_id": 0, "date": 1, "category": 1, "category_key": 1, "term": 1, "explanation": 1}
+    ).sort([("date", DESCENDING), ("category_key", DESCENDING)]).limit(limit + 1).to_list(length=limit + 1)
+
+    next_cursor = None
+    if len(entries) > limit:
+        entries = entries[:limit]
+        next_cursor = encode_history_cursor(entries[-1]["date"], entries[-1]["category_key"])
+    for entry in entries:
+        del entry["category_key"]
+    return entries, next_cursor
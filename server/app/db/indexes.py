@@ -0,0 +1,52 @@
+"""
+Indexes the app depends on, ensured once at startup.
+
+Each collection's indexes are declared next to the queries they serve in
+its repository module; this module runs them all and records how each
+build went so the status can be reported.
+"""
+import logging
+import time
+from app.db.concept_repository import ensure_concept_indexes
+from app.db.daily_concept_repository import ensure_daily_concept_indexes
+from app.db.rate_limit_repository import ensure_rate_limit_indexes
+from app.db.user_repository import ensure_user_indexes
+
+logger = logging.getLogger(__name__)
+
+INDEX_BUILDERS = {
+    "users": ensure_user_indexes,
+    "concepts": ensure_concept_indexes,
+    "daily_concepts": ensure_daily_concept_indexes,
+    "rate_limits": ensure_rate_limit_indexes,
+}
+
+# Builds the app cannot run without. The users build backfills email_key, which
+# every login looks up, and its unique index is what rejects duplicate registrations.
+REQUIRED_BUILDS = {"users"}
+
+# collection -> {"status": "pending" | "ready" | "failed", "seconds": float, "error": str}
+index_status: dict[str, dict] = {}
+
+
+async def ensure_indexes(collections: list[str] | None = None) -> dict[str, dict]:
+    """
+    Build the indexes for `collections` (default: all) one after another.
+    A failed build is logged and reported rather than stopping startup, since
+    the app still works without an index, only slower. A failed build in
+    REQUIRED_BUILDS is re-raised, after its status is recorded, so startup stops.
+    """
+    for collection in collections or list(INDEX_BUILDERS):
+        index_status[collection] = {"status": "pending"}
+        start = time.perf_counter()
+        try:
+            await INDEX_BUILDERS[collection]()
+        except Exception as e:
+            index_status[collection] = {"status": "failed", "seconds": time.perf_counter() - start, "error": str(e)}
+            logger.error("Index build for %s failed: %s", collection, e)
+            if collection in REQUIRED_BUILDS:
+                raise
+            continue
+        index_status[collection] = {"status": "ready", "seconds": time.perf_counter() - start}
+        logger.info("Indexes for %s ready in %.2fs", collection, index_status[collection]["seconds"])
+    return index_status
@@ -0,0 +1,75 @@
+from app.db.mongodb import db
+from bson import ObjectId
+from datetime import datetime, timedelta, timezone
+from pymongo.errors import DuplicateKeyError
+
+
+# Read the checkpoint of a resumable batch job, if it has one
+async def get_job_checkpoint(job_id: str) -> dict | None:
+    return await db["jobs"].find_one({"_id": job_id})
+
+
+# Record how far a batch job got so a restart can continue from there
+async def save_job_checkpoint(job_id: str, last_id: ObjectId | None, processed: int, completed: bool = False):
+    fields = {"completed": completed, "updated_at": datetime.now(timezone.utc)}
+    if last_id is not None:
+        fields["last_id"] = last_id
+    await db["jobs"].update_one(
+        {"_id": job_id},
+        {"$set": fields, "$inc": {"processed": processed}},
+        upsert=True,
+    )
+
+
+# Send the next run of a batch job back to the start, e.g. to retry what failed
+async def restart_job_checkpoint(job_id: str):
+    await db["jobs"].update_one(
+        {"_id": job_id},
+        {"$set": {"completed": False, "updated_at": datetime.now(timezone.utc)}, "$unset": {"last_id": ""}},
+    )
+
+
+# Take or renew the lease on running a job, so one worker runs it at a time.
+# Returns False while another owner holds an unexpired lease.
+async def claim_job(job_id: str, owner: str, lease_seconds: float) -> bool:
+    now = datetime.now(timezone.utc)
+    try:
+        await db["jobs"].update_one(
+            {
+                "_id": job_id,
+                "$or": [
+                    {"lease_expires_at": {"$exists": False}},
+                    {"lease_expires_at": {"$lte": now}},
+                    {"lease_owner": owner},
+                ],
+            },
+            {"$set": {"lease_owner": owner, "lease_expires_at": now + timedelta(seconds=lease_seconds)}},
+            upsert=True,
+        )
+    except DuplicateKeyError:
+        # The job document exists with a lease held by someone else
+        return False
+    return True
+
+
+# Give up a job lease, unless another owner has taken it over since
+async def release_job(job_id: str, owner: str):
+    await db["jobs"].update_one(
+        {"_id": job_id, "lease_owner": owner},
+        {"$unset": {"lease_owner": "", "lease_expires_at": ""}},
+    )
+
+
+# Read where a change stream consumer stopped, if it saved a resume token
+async def get_resume_token(stream_id: str) -> dict | None:
+    stream = await db["change_streams"].find_one({"_id": stream_id}, {"token": 1})
+    return stream["token"] if stream else None
+
+
+# Record a change stream position so a restarted consumer can resume from there
+async def save_resume_token(stream_id: str, token: dict):
+    await db["change_streams"].update_one(
+        {"_id": stream_id},
+        {"$set": {"token": token, "updated_at": datetime.now(timezone.utc)}},
+        upsert=True,
+    )
@@ -0,0 +1,41 @@
+from app.db.mongodb import db
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from datetime import datetime
+
+
+async def ensure_rate_limit_indexes():
+    # Buckets delete themselves once they can no longer count as the previous window
+    await db["rate_limits"].create_index([("expires_at", ASCENDING)], expireAfterSeconds=0, name="expires_at_ttl")
+
+
+# Count `hits` in a time bucket unless that would take it past `max_count`.
+# Returns the new count, or None when the hits do not fit.
+async def increment_bucket(bucket_id: str, max_count: int, expires_at: datetime, hits: int = 1) -> int | None:
+    if hits > max_count:
+        return None
+    try:
+        bucket = await db["rate_limits"].find_one_and_update(
+            {"_id": bucket_id, "count": {"$lte": max_count - hits}},
+            {"$inc": {"count": hits}, "$setOnInsert": {"expires_at": expires_at}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+    except DuplicateKeyError:
+        # The bucket exists but did not match the filter, so it is full
+        return None
+    return bucket["count"]
+
+
+# Count hits that were already admitted, whatever the bucket holds
+async def add_to_bucket(bucket_id: str, hits: int, expires_at: datetime):
+    await db["rate_limits"].update_one(
+        {"_id": bucket_id},
+        {"$inc": {"count": hits}, "$setOnInsert": {"expires_at": expires_at}},
+        upsert=True,
+    )
+
+
+async def get_bucket_count(bucket_id: str) -> int:
+    bucket = await db["rate_limits"].find_one({"_id": bucket_id}, {"count": 1})
+    return bucket["count"] if bucket else 0
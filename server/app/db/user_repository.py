@@ -1,84 +1,220 @@
 # pyright: reportUndefinedVariable=false
 
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable
 from app.db.mongodb import db
-from app.models.user_model import UserCreate, UserInDB
-from app.security.security import sanitize_string_input, sanitize_html_content, validate_object_id
+from app.db.daily_concept_repository import get_daily_concept
+from app.models.user_model import UserCreate, UserInDB, UserConceptView, UserProfile
+from app.security.password_hashing import hash_password
+from app.security.security import sanitize_string_input, validate_object_id
 from bson import ObjectId
-import bcrypt
-from datetime import datetime, timezone
+from pymongo import ASCENDING, UpdateOne
 
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000"))
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "30"))  # seconds
 
-# Create a new user in the database
+# The user document fields a profile snapshot holds; never the password
+_PROFILE_FIELDS = {"username": 1, "email": 1, "interests": 1, "prepared": 1}
+# What a login checks and returns; never the prepared concepts
+_LOGIN_FIELDS = {"username": 1, "email": 1, "password": 1, "interests": 1}
+
+
+class UserProfileCache:
+    """
+    Bounded TTL/LRU cache of user profile snapshots by user id. Reads fill it
+    and this module's writes invalidate the user they touch. Writes made by
+    other processes are seen through the users change stream watcher when it
+    runs, and otherwise once the entry expires.
+
+    Every invalidation advances `version`. A read records the version it
+    started at and its snapshot is dropped if the user was invalidated while
+    it was in flight, so a read that raced a write cannot put the old
+    document back. Snapshots are shared between callers and must not be
+    modified. A cache with no entries or no TTL is disabled.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = USER_CACHE_MAX_ENTRIES,
+        ttl: float = USER_CACHE_TTL,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if max_entries < 0:
+            raise ValueError("max_entries must not be negative")
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        # user id -> (snapshot, expiry)
+        self._entries: OrderedDict[str, tuple[UserProfile, float]] = OrderedDict()
+        # user id -> [reads in flight, version of the last invalidation since the first began]
+        self._reads: dict[str, list[int]] = {}
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.stale_fills = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl > 0
+
+    def lookup(self, user_id: str) -> UserProfile | None:
+        entry = self._entries.get(user_id)
+        if entry is None or entry[1] <= self._clock():
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(user_id)
+        return entry[0]
+
+    async def get(self, user_id: str, load: Callable[[], Awaitable[UserProfile | None]]) -> UserProfile | None:
+        """Return the cached snapshot of `user_id`, loading and caching it on a miss"""
+        if not self.enabled:
+            return await load()
+        profile = self.lookup(user_id)
+        if profile is not None:
+            return profile
+
+        reads = self._reads.setdefault(user_id, [0, 0])
+        reads[0] += 1
+        started_at = self.version
+        profile = None
+        try:
+            profile = await load()
+        finally:
+            reads[0] -= 1
+            if reads[0] == 0:
+                del self._reads[user_id]
+            if reads[1] > started_at:
+                self.stale_fills += 1
+            elif profile is not None:
+                self._store(user_id, profile)
+        return profile
+
+    def _store(self, user_id: str, profile: UserProfile):
+        self._entries[user_id] = (profile, self._clock() + self.ttl)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, user_id: str | None = None):
+        """Drop one user, or every user when no id is given, including reads in flight"""
+        self.version += 1
+        self.invalidations += 1
+        if user_id is None:
+            self._entries.clear()
+            for reads in self._reads.values():
+                reads[1] = self.version
+            return
+        self._entries.pop(user_id, None)
+        if user_id in self._reads:
+            self._reads[user_id][1] = self.version
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "stale_fills": self.stale_fills,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+user_cache = UserProfileCache()
+
+
+def normalize_email(email: str) -> str:
+    return email.strip().lower()
+
+
+async def ensure_user_indexes():
+    # Users created before email_key existed get it from their stored email
+    await db["users"].update_many(
+        {"email_key": {"$exists": False}},
+        [{"$set": {"email_key": {"$toLower": {"$trim": {"input": "$email"}}}}}],
+    )
+    await db["users"].create_index([("email_key", ASCENDING)], unique=True, name="email_key_unique")
+
+
+# Create a new user in the database.
+# Raises DuplicateKeyError when the email is already registered.
 async def create_user(user: UserCreate) -> UserInDB:
     user_data = user.model_dump()
+    user_data["email_key"] = normalize_email(user_data["email"])
 
-    # Hash the password before storing it
-    hashed_password = bcrypt.hashpw(user_data["password"].encode('utf-8'), bcrypt.gensalt())
-    user_data["password"] = hashed_password.decode('utf-8')  # Store as string
+    # Hash the password before storing it, off the event loop
+    user_data["password"] = await hash_password(user_data["password"])
     
     result = await db["users"].insert_one(user_data)
     return UserInDB(id=str(result.inserted_id), **user_data)
 
 
-# Find a user by email (for login or validation)
+# Find a user by email for login, served by the unique email_key index.
+# Only the fields login needs are read; `prepared` is left empty.
 async def get_user_by_email(email: str) -> UserInDB | None:
-    user_data = await db["users"].find_one({"email": email})
+    user_data = await db["users"].find_one({"email_key": normalize_email(email)}, _LOGIN_FIELDS)
     if user_data:
         return UserInDB(id=str(user_data["_id"]), **user_data)
     return None
 
 
-# Optional: Find a user by ID
-async def get_user_by_id(user_id: str) -> UserInDB | None:
+async def _load_profile(object_id: ObjectId) -> UserProfile | None:
+    user_data = await db["users"].find_one({"_id": object_id}, _PROFILE_FIELDS)
+    if user_data:
+        return UserProfile(id=str(user_data["_id"]), **user_data)
+    return None
+
+
+# Read-through the profile cache, for request paths that do not need the password
+async def get_user_profile(user_id: str) -> UserProfile | None:
     try:
         object_id = validate_object_id(user_id)
-        user_data = await db["users"].find_one({"_id": object_id})
-        if user_data:
-            return UserInDB(id=str(user_data["_id"]), **user_data)
-        return None
     except ValueError:
         return None
+    return await user_cache.get(str(object_id), lambda: _load_profile(object_id))
 
 
+def prepared_field(category: str) -> str:
+    # Category names may contain "." or "$", which field names cannot safely hold;
+    # prepared concepts are stored under a reversibly escaped key
+    return category.replace("%", "%25").replace(".", "%2E").replace("$", "%24")
 
-# Update user's history by adding a new term under a specific category
-async def add_term_to_history(user_id: str, category: str, term: str):
-    # Sanitize all inputs
-    sanitized_category = sanitize_string_input(category, max_length=50)
-    sanitized_term = sanitize_html_content(term, max_length=200)
-    object_id = validate_object_id(user_id)
-    
-    await db["users"].update_one(
-        {"_id": object_id},
-        {
-            "$addToSet": {f"history.{sanitized_category}": sanitized_term}
-        }
-    )
-    
 
-async def save_daily_concept(user_id: str, category: str, term: str, explanation: str):
-    # Sanitize all inputs
-    sanitized_category = sanitize_string_input(category, max_length=50)
-    sanitized_term = sanitize_html_content(term, max_length=200)
-    sanitized_explanation = sanitize_html_content(explanation, max_length=2000)
-    object_id = validate_object_id(user_id)
-    
-    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-    await db["users"].update_one(
-        {"_id": object_id},
-        {
-            "$set": {
-                "daily": {
-                    today: {
-                        "category": sanitized_category,
-                        "term": sanitized_term,
-                        "explanation": sanitized_explanation
-                    }
-                }
-            }
-        }
+# Fetch only what serving `category` on `date` needs: that day's concept from
+# daily_concepts and the prepared concept from the cached profile, concurrently.
+# The category's history is not read here; the service loads it only to generate.
+async def get_user_concept_view(user_id: str, category: str, date: str) -> UserConceptView | None:
+    try:
+        object_id = validate_object_id(user_id)
+    except ValueError:
+        return None
+    field = sanitize_string_input(category, max_length=50)
+
+    profile, daily = await asyncio.gather(
+        get_user_profile(user_id),
+        get_daily_concept(object_id, date),
     )
+    if profile is None:
+        return None
 
+    view = UserConceptView(id=profile.id)
+    if daily:
+        view.daily[date] = daily
+    # Keyed by the caller's category, as the service looks it up
+    prepared = profile.prepared.get(date, {}).get(prepared_field(field))
+    if prepared:
+        view.prepared[date] = {category: prepared}
+    return view
 
 
 async def add_interest(user_id: str, interest: str):
@@ -86,27 +222,59 @@ async def add_interest(user_id: str, interest: str):
     sanitized_interest = sanitize_string_input(interest, max_length=50)
     object_id = validate_object_id(user_id)
     
-    # Check if user exists first
-    user = await get_user_by_id(user_id)
-    if not user:
-        raise ValueError("User not found")
-    
-    await db["users"].update_one(
+    # The update itself tells whether the user exists; no document is read
+    result = await db["users"].update_one(
         {"_id": object_id},
         {"$addToSet": {"interests": sanitized_interest}}
     )
+    user_cache.invalidate(str(object_id))
+    if result.matched_count == 0:
+        raise ValueError("User not found")
 
 async def remove_interest(user_id: str, interest: str):
     # Validate and sanitize inputs
     sanitized_interest = sanitize_string_input(interest, max_length=50)
     object_id = validate_object_id(user_id)
     
-    # Check if user exists first
-    user = await get_user_by_id(user_id)
-    if not user:
-        raise ValueError("User not found")
-        
-    await db["users"].update_one(
+    # The update itself tells whether the user exists; no document is read
+    result = await db["users"].update_one(
         {"_id": object_id},
         {"$pull": {"interests": sanitized_interest}}
-    )
\ No newline at end of file
+    )
+    user_cache.invalidate(str(object_id))
+    if result.matched_count == 0:
+        raise ValueError("User not found")
+
+
+# Stream users that still need concepts prepared for `date`, in _id order
+def find_users_to_prepare(date: str, after_id: ObjectId | None = None):
+    query = {
+        "interests.0": {"$exists": True},
+        f"prepared.{date}": {"$exists": False},
+    }
+    if after_id is not None:
+        query["_id"] = {"$gt": after_id}
+    return db["users"].find(query, {"interests": 1}).sort("_id", 1)
+
+
+# Store pre-generated concepts for many users in one bulk write.
+# `prepared` maps user ObjectId -> {category: {"category", "term", "explanation"}}.
+# Categories are stored under prepared_field keys.
+async def save_prepared_concepts(date: str, prepared: dict[ObjectId, dict]) -> int:
+    if not prepared:
+        return 0
+    operations = [
+        # Replacing the whole map keeps only the latest day per user
+        UpdateOne(
+            {"_id": object_id},
+            {"$set": {"prepared": {date: {prepared_field(category): concept for category, concept in concepts.items()}}}},
+        )
+        for object_id, concepts in prepared.items()
+    ]
+    try:
+        result = await db["users"].bulk_write(operations, ordered=False)
+    finally:
+        # Unordered writes may have applied partly even when the batch fails
+        for object_id in prepared:
+            user_cache.invalidate(str(object_id))
+    return result.modified_count
@@ -0,0 +1,107 @@
+"""
+One-off migration of the history and daily maps embedded in user documents
+into the daily_concepts collection.
+
+Each user's entries are upserted first and the embedded maps are unset only
+afterwards, so the migration can be stopped and re-run at any point without
+losing or duplicating entries. From the server directory:
+    python -m app.jobs.migrate_daily_concepts [--batch-size 100]
+"""
+import argparse
+import asyncio
+import logging
+import time
+
+from app.db.concept_repository import normalize_category, normalize_term
+from app.db.daily_concept_repository import ensure_daily_concept_indexes
+from app.db.mongodb import db
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+MIGRATION_BATCH_SIZE = 100
+
+
+def _flatten(document: dict, prefix: str = "") -> dict[str, list]:
+    # Category names containing dots were stored as nested fields
+    flat = {}
+    for name, value in document.items():
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{prefix}{name}."))
+        else:
+            flat[f"{prefix}{name}"] = value
+    return flat
+
+
+def daily_concept_operations(user: dict) -> list[UpdateOne]:
+    """Upserts recreating a user's embedded history and daily entries, oldest first"""
+    # Terms served on a known day carry that day and their explanation
+    served = {}
+    for date, entry in (user.get("daily") or {}).items():
+        if isinstance(entry, dict) and entry.get("term") and entry.get("category"):
+            served[(normalize_category(entry["category"]), normalize_term(entry["term"]))] = (date, entry)
+
+    operations = []
+    for category, terms in _flatten(user.get("history") or {}).items():
+        category_key = normalize_category(category)
+        for term in terms if isinstance(terms, list) else []:
+            term_key = normalize_term(term)
+            dated = served.pop((category_key, term_key), None)
+            fields = {"category": category, "term": term, "term_key": term_key}
+            if dated:
+                date, entry = dated
+                key = {"user_id": user["_id"], "date": date, "category_key": category_key}
+                fields["explanation"] = entry.get("explanation", "")
+            else:
+                key = {"user_id": user["_id"], "date": {"$exists": False}, "category_key": category_key, "term_key": term_key}
+            operations.append(UpdateOne(key, {"$setOnInsert": fields}, upsert=True))
+
+    # Daily entries whose term never made it into history
+    for (category_key, term_key), (date, entry) in served.items():
+        operations.append(UpdateOne(
+            {"user_id": user["_id"], "date": date, "category_key": category_key},
+            {"$setOnInsert": {
+                "category": entry["category"],
+                "term": entry["term"],
+                "term_key": term_key,
+                "explanation": entry.get("explanation", ""),
+            }},
+            upsert=True,
+        ))
+    return operations
+
+
+async def migrate_daily_concepts(batch_size: int = MIGRATION_BATCH_SIZE) -> dict:
+    await ensure_daily_concept_indexes()
+    stats = {"users": 0, "entries": 0}
+    start = time.perf_counter()
+
+    query = {"$or": [{"history": {"$exists": True}}, {"history_keys": {"$exists": True}}, {"daily": {"$exists": True}}]}
+    cursor = db["users"].find(query, {"history": 1, "daily": 1}).sort("_id", 1).batch_size(batch_size)
+    async for user in cursor:
+        operations = daily_concept_operations(user)
+        if operations:
+            # Ordered, so the entries' _ids keep the history order
+            await db["daily_concepts"].bulk_write(operations, ordered=True)
+        await db["users"].update_one({"_id": user["_id"]}, {"$unset": {"history": "", "history_keys": "", "daily": ""}})
+
+        stats["users"] += 1
+        stats["entries"] += len(operations)
+        if stats["users"] % batch_size == 0:
+            logger.info("Migrated %d users, %d entries", stats["users"], stats["entries"])
+
+    stats["elapsed_seconds"] = time.perf_counter() - start
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move embedded history and daily maps into daily_concepts")
+    parser.add_argument("--batch-size", type=int, default=MIGRATION_BATCH_SIZE)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    print(asyncio.run(migrate_daily_concepts(args.batch_size)))
+
+
+if __name__ == "__main__":
+    main()
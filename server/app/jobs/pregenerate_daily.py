@@ -0,0 +1,191 @@
+"""
+Batch pre-generation of every user's daily concepts, one per interest.
+
+Runs at midnight UTC inside the app lifespan when PREGENERATE_SCHEDULE=true,
+or once from the server directory:
+    python -m app.jobs.pregenerate_daily [--date YYYY-MM-DD] [--concurrency 8]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from app.ai.generate_specific_concept import PROMPT_BLACKLIST_SIZE, generate_specific_concept
+from app.ai.llm_client import close_llm_client
+from app.db.concept_repository import normalize_category
+from app.db.daily_concept_repository import get_recent_seen_terms_for_users
+from app.db.job_repository import claim_job, get_job_checkpoint, release_job, restart_job_checkpoint, save_job_checkpoint
+from app.db.user_repository import find_users_to_prepare, save_prepared_concepts
+from app.security.security import sanitize_string_input
+
+logger = logging.getLogger(__name__)
+
+PREGENERATE_SCHEDULE = os.getenv("PREGENERATE_SCHEDULE", "false").lower() == "true"
+PREGENERATE_CONCURRENCY = int(os.getenv("PREGENERATE_CONCURRENCY", "8"))
+PREGENERATE_BATCH_SIZE = int(os.getenv("PREGENERATE_BATCH_SIZE", "100"))
+# One worker runs a day's job at a time; the lease is renewed after every batch
+PREGENERATE_LEASE_SECONDS = float(os.getenv("PREGENERATE_LEASE_SECONDS", "900"))
+# Delay before the schedule runs a day's job again to retry users that failed
+PREGENERATE_RETRY_SECONDS = float(os.getenv("PREGENERATE_RETRY_SECONDS", "900"))
+
+
+async def _prepare_user(user: dict, history: dict[str, list[str]], semaphore: asyncio.Semaphore, generate, stats: dict) -> dict:
+    """Generate one concept per interest for a single user; `history` maps category keys to recently seen terms"""
+
+    categories = set()
+    for interest in user.get("interests") or []:
+        try:
+            categories.add(sanitize_string_input(interest, max_length=50))
+        except ValueError:
+            continue  # Skip invalid interests
+
+    async def prepare(category: str):
+        async with semaphore:
+            try:
+                result = await generate(category, history.get(normalize_category(category), []))
+            except (ValueError, RuntimeError) as e:
+                stats["failures"] += 1
+                logger.warning("Failed to prepare %s for user %s: %s", category, user["_id"], e)
+                return None
+        stats["concepts"] += 1
+        return category, {"category": category, "term": result["term"], "explanation": result["explanation"]}
+
+    results = await asyncio.gather(*(prepare(category) for category in sorted(categories)))
+    if None in results:
+        # Left unprepared, so a later run picks the user up again
+        return {}
+    return dict(results)
+
+
+async def pregenerate_daily_concepts(
+    date: str | None = None,
+    concurrency: int = PREGENERATE_CONCURRENCY,
+    batch_size: int = PREGENERATE_BATCH_SIZE,
+    generate=generate_specific_concept,
+) -> dict:
+    """
+    Stream users in _id order, generate their concepts with bounded
+    concurrency and write each batch with one bulk write. A checkpoint is
+    saved after every batch, so a restarted run continues where it stopped.
+
+    Only the holder of the day's job lease runs it; other callers return at
+    once with "held_elsewhere". Users with a failed generation are not saved,
+    and a run with failures is not marked completed but sent back to the
+    start, where the next run finds only the users still unprepared.
+    """
+    date = date or datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    job_id = f"pregenerate_daily:{date}"
+    stats = {"date": date, "users": 0, "concepts": 0, "failures": 0}
+
+    owner = uuid.uuid4().hex
+    if not await claim_job(job_id, owner, PREGENERATE_LEASE_SECONDS):
+        logger.info("Daily concepts for %s are being prepared by another worker", date)
+        stats["held_elsewhere"] = True
+        return stats
+
+    try:
+        checkpoint = await get_job_checkpoint(job_id)
+        if checkpoint and checkpoint.get("completed"):
+            logger.info("Daily concepts for %s already prepared", date)
+            return stats
+        after_id = checkpoint.get("last_id") if checkpoint else None
+
+        semaphore = asyncio.Semaphore(concurrency)
+        start = time.perf_counter()
+
+        async def flush(batch: list[dict]):
+            # The newest seen terms for the whole batch in one query; only these
+            # are named in the prompt, and serving checks the full history
+            histories = await get_recent_seen_terms_for_users([user["_id"] for user in batch], PROMPT_BLACKLIST_SIZE)
+            prepared = await asyncio.gather(*(
+                _prepare_user(user, histories.get(user["_id"], {}), semaphore, generate, stats) for user in batch
+            ))
+            await save_prepared_concepts(date, {
+                user["_id"]: concepts for user, concepts in zip(batch, prepared) if concepts
+            })
+            await save_job_checkpoint(job_id, batch[-1]["_id"], len(batch))
+            if not await claim_job(job_id, owner, PREGENERATE_LEASE_SECONDS):
+                raise RuntimeError(f"Lost the lease on {job_id} to another worker")
+
+            stats["users"] += len(batch)
+            elapsed = time.perf_counter() - start
+            logger.info(
+                "Prepared %d users, %d concepts, %d failures (%.1f concepts/s)",
+                stats["users"], stats["concepts"], stats["failures"], stats["concepts"] / elapsed,
+            )
+
+        batch = []
+        async for user in find_users_to_prepare(date, after_id):
+            batch.append(user)
+            if len(batch) >= batch_size:
+                await flush(batch)
+                batch = []
+        if batch:
+            await flush(batch)
+
+        if stats["failures"]:
+            await restart_job_checkpoint(job_id)
+        else:
+            await save_job_checkpoint(job_id, None, 0, completed=True)
+    finally:
+        await release_job(job_id, owner)
+
+    stats["elapsed_seconds"] = time.perf_counter() - start
+    stats["concepts_per_second"] = stats["concepts"] / stats["elapsed_seconds"] if stats["elapsed_seconds"] else 0.0
+    return stats
+
+
+def seconds_until_next_midnight_utc(now: datetime | None = None) -> float:
+    now = now or datetime.now(timezone.utc)
+    midnight = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return (midnight - now).total_seconds()
+
+
+async def run_daily_schedule():
+    """
+    Run the pre-generation job every day at midnight UTC until cancelled.
+    A run that failed for some users, or that another worker held, is
+    repeated every PREGENERATE_RETRY_SECONDS until the day's job is
+    completed or the day ends, so a holder that crashed mid-run is resumed
+    once its lease expires.
+    """
+    while True:
+        await asyncio.sleep(seconds_until_next_midnight_utc())
+        date = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+        while True:
+            try:
+                stats = await pregenerate_daily_concepts(date)
+                logger.info("Daily pre-generation finished: %s", stats)
+                if not stats["failures"] and not stats.get("held_elsewhere"):
+                    break
+            except Exception:
+                logger.exception("Daily pre-generation failed")
+            if seconds_until_next_midnight_utc() <= PREGENERATE_RETRY_SECONDS:
+                break
+            await asyncio.sleep(PREGENERATE_RETRY_SECONDS)
+
+
+async def _run_once(date: str | None, concurrency: int, batch_size: int) -> dict:
+    try:
+        return await pregenerate_daily_concepts(date, concurrency, batch_size)
+    finally:
+        await close_llm_client()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-generate today's concepts for all users")
+    parser.add_argument("--date", help="UTC date to prepare (YYYY-MM-DD), defaults to today")
+    parser.add_argument("--concurrency", type=int, default=PREGENERATE_CONCURRENCY)
+    parser.add_argument("--batch-size", type=int, default=PREGENERATE_BATCH_SIZE)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    stats = asyncio.run(_run_once(args.date, args.concurrency, args.batch_size))
+    print(stats)
+
+
+if __name__ == "__main__":
+    main()
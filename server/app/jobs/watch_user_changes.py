@@ -0,0 +1,157 @@
+"""
+Keeps this process's user profile cache in step with writes made by any
+worker or pod, by tailing a change stream on the users collection.
+
+Runs inside the app lifespan when USER_CHANGE_STREAM=true (the default).
+The stream's resume token is saved every few seconds and on shutdown, so a
+reconnecting or restarted watcher replays what it missed. Without change
+streams (a standalone mongod) the watcher stops and cached profiles are
+only refreshed when their TTL runs out.
+"""
+import asyncio
+import logging
+import os
+import socket
+import time
+from typing import Callable
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+from app.db.job_repository import get_resume_token, save_resume_token
+from app.db.mongodb import db
+from app.db.user_repository import UserProfileCache, user_cache
+
+logger = logging.getLogger(__name__)
+
+USER_CHANGE_STREAM = os.getenv("USER_CHANGE_STREAM", "true").lower() == "true"
+# Instances sharing a name resume from the same saved token
+USER_CHANGE_STREAM_NAME = os.getenv("USER_CHANGE_STREAM_NAME", socket.gethostname())
+USER_CHANGE_STREAM_SAVE_INTERVAL = float(os.getenv("USER_CHANGE_STREAM_SAVE_INTERVAL", "5"))  # seconds
+USER_CHANGE_STREAM_RETRY_SECONDS = float(os.getenv("USER_CHANGE_STREAM_RETRY_SECONDS", "5"))
+
+# $changeStream is only supported on replica sets and sharded clusters
+_CHANGE_STREAMS_UNSUPPORTED = 40573
+# The saved position is malformed or no longer in the oplog
+_RESUME_FAILED = {260, 280, 286}
+
+# Only which document changed is needed, not how
+_PIPELINE = [{"$project": {"operationType": 1, "documentKey": 1}}]
+
+
+class UserChangeWatcher:
+    """
+    Follows the users change stream and invalidates the cached profile of
+    every user inserted, updated, replaced or deleted. Events without a
+    document key (drop, rename, invalidate) clear the whole cache, as does
+    starting without a position to resume from.
+    """
+
+    def __init__(
+        self,
+        name: str = USER_CHANGE_STREAM_NAME,
+        cache: UserProfileCache = user_cache,
+        save_interval: float = USER_CHANGE_STREAM_SAVE_INTERVAL,
+        retry_seconds: float = USER_CHANGE_STREAM_RETRY_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.stream_id = f"users:{name}"
+        self.cache = cache
+        self.save_interval = save_interval
+        self.retry_seconds = retry_seconds
+        self._clock = clock
+        self.token: dict | None = None
+        self._saved_token: dict | None = None
+        self._saved_at = 0.0
+        self.state = "stopped"
+        self.events = 0
+        self.full_invalidations = 0
+        self.reconnects = 0
+
+    async def run(self):
+        """Follow the stream until cancelled, or until change streams turn out to be unavailable"""
+        loaded = False
+        try:
+            while True:
+                try:
+                    if not loaded:
+                        self.token = self._saved_token = await get_resume_token(self.stream_id)
+                        loaded = True
+                    await self._follow()
+                    continue
+                except OperationFailure as e:
+                    if e.code == _CHANGE_STREAMS_UNSUPPORTED:
+                        self.state = "ttl_only"
+                        logger.warning("Change streams are unavailable; cached users expire after %ss", self.cache.ttl)
+                        return
+                    if e.code in _RESUME_FAILED and self.token is not None:
+                        logger.warning("Cannot resume the users change stream, starting from now: %s", e)
+                        self.token = None
+                        continue
+                    logger.warning("Users change stream failed: %s", e)
+                except PyMongoError as e:
+                    logger.warning("Users change stream failed: %s", e)
+                # Cached profiles fall back to their TTL until the stream is back
+                self.state = "reconnecting"
+                self.reconnects += 1
+                await asyncio.sleep(self.retry_seconds)
+        finally:
+            if self.state != "ttl_only":
+                self.state = "stopped"
+            await self._save_token(force=True)
+
+    async def _follow(self):
+        options = {"resume_after": self.token} if self.token is not None else {}
+        fresh = self.token is None
+        invalidated = False
+        async with db["users"].watch(_PIPELINE, max_await_time_ms=1000, **options) as stream:
+            while stream.alive and not invalidated:
+                change = await stream.try_next()
+                self.state = "watching"
+                if fresh:
+                    # Changes made before the stream opened were never seen
+                    self._invalidate_all()
+                    fresh = False
+                if change is not None:
+                    invalidated = self._apply(change)
+                self.token = stream.resume_token
+                await self._save_token()
+        if invalidated:
+            # A stream cannot be resumed after its invalidate event
+            self.token = None
+
+    def _apply(self, change: dict) -> bool:
+        """Invalidate what `change` touched; return whether the stream was invalidated"""
+        self.events += 1
+        document_key = change.get("documentKey")
+        if document_key is not None:
+            self.cache.invalidate(str(document_key["_id"]))
+        else:
+            self._invalidate_all()
+        return change.get("operationType") == "invalidate"
+
+    def _invalidate_all(self):
+        self.cache.invalidate()
+        self.full_invalidations += 1
+
+    async def _save_token(self, force: bool = False):
+        if self.token is None or self.token == self._saved_token:
+            return
+        if not force and self._clock() - self._saved_at < self.save_interval:
+            return
+        try:
+            await save_resume_token(self.stream_id, self.token)
+        except PyMongoError as e:
+            logger.warning("Could not save the users change stream position: %s", e)
+            return
+        self._saved_token, self._saved_at = self.token, self._clock()
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "events": self.events,
+            "full_invalidations": self.full_invalidations,
+            "reconnects": self.reconnects,
+        }
+
+
+user_change_watcher = UserChangeWatcher()
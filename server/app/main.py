@@ -1,14 +1,49 @@
 import os
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.user_routes import router as user_router
 from app.api.daily_concept import router as concept_router
+from app.ai.llm_client import close_llm_client
+from app.db.indexes import INDEX_BUILDERS, ensure_indexes, index_status
+from app.db.user_repository import user_cache
+from app.jobs.pregenerate_daily import PREGENERATE_SCHEDULE, run_daily_schedule
+from app.jobs.watch_user_changes import USER_CHANGE_STREAM, user_change_watcher
+from app.security.password_hashing import password_pool
+from app.security.rate_limiter import RATE_LIMIT_BACKEND
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await ensure_indexes([
+        collection for collection in INDEX_BUILDERS
+        if collection != "rate_limits" or RATE_LIMIT_BACKEND == "mongo"
+    ])
+
+    # Prepare every user's daily concepts at midnight UTC
+    pregenerate_task = asyncio.create_task(run_daily_schedule()) if PREGENERATE_SCHEDULE else None
+    # Drop cached users as soon as any instance writes them
+    watcher_task = asyncio.create_task(user_change_watcher.run()) if USER_CHANGE_STREAM and user_cache.enabled else None
+
+    yield
+
+    if pregenerate_task:
+        pregenerate_task.cancel()
+    if watcher_task:
+        # Give the watcher a moment to save its resume token
+        watcher_task.cancel()
+        await asyncio.wait([watcher_task], timeout=5)
+    # Release pooled upstream LLM connections on shutdown
+    await close_llm_client()
+    password_pool.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Allow frontend to access API
 app.add_middleware(
@@ -25,3 +60,12 @@ app.add_middleware(
 # Routes
 app.include_router(user_router)
 app.include_router(concept_router)
+
+
+@app.get("/health/indexes")
+async def indexes_health():
+    """Build status of the indexes ensured at startup"""
+    return {
+        "ready": bool(index_status) and all(build["status"] == "ready" for build in index_status.values()),
+        "indexes": index_status,
+    }
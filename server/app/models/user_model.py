@@ -19,8 +19,26 @@ class UserLogin(BaseModel):
 # Internal DB model
 class UserInDB(UserCreate):
     id: str
-    history: Optional[Dict[str, List[str]]] = Field(default_factory=dict)
-    daily: Optional[Dict[str, Dict[str, str]]] = Field(default_factory=dict)
+    prepared: Optional[Dict[str, Dict[str, Dict[str, str]]]] = Field(default_factory=dict)
+
+
+# What the user profile cache holds: the user document without the password.
+# Prepared concepts are keyed as stored, by user_repository.prepared_field(category).
+class UserProfile(BaseModel):
+    id: str
+    username: str
+    email: str
+    interests: List[str] = Field(default_factory=list)
+    prepared: Dict[str, Dict[str, Dict[str, str]]] = Field(default_factory=dict)
+
+
+# What picking a daily concept reads about a user: the prepared concept from the
+# user document and that day's concept from daily_concepts.
+# Each map holds at most the one category and day being served.
+class UserConceptView(BaseModel):
+    id: str
+    daily: Dict[str, Dict[str, str]] = Field(default_factory=dict)
+    prepared: Dict[str, Dict[str, Dict[str, str]]] = Field(default_factory=dict)
 
 
 # Response model for frontend (no password)
@@ -1,5 +1,10 @@
 import jwt
 import os
+import hashlib
+import hmac
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
 from dotenv import load_dotenv
 
@@ -8,6 +13,7 @@ load_dotenv()
 SECRET_KEY = os.getenv("JWT_SECRET_KEY")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_HOURS = 24
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
 
 # Validate that SECRET_KEY exists and is secure
 if not SECRET_KEY:
@@ -30,16 +36,92 @@ def create_access_token(user_id: str, email: str) -> str:
     }
     return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
 
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU of verified token payloads, each dropped once its `exp` passes.
+    Keys are an HMAC of the whole token under the signing secret, so a changed
+    signature or a rotated secret never matches a cached entry. Thread-safe:
+    sync dependencies run in FastAPI's thread pool.
+    """
+
+    def __init__(self, max_size: int = TOKEN_CACHE_SIZE, clock=time.time):
+        self.max_size = max_size
+        self.clock = clock
+        self._entries: OrderedDict[bytes, tuple[float, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def make_key(token: str, secret: str) -> bytes:
+        return hmac.new(secret.encode(), token.encode(), hashlib.sha256).digest()
+
+    def get(self, key: bytes) -> dict | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, payload = entry
+            if self.clock() >= expires_at:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        # Callers get their own copy so cached payloads cannot be modified
+        return dict(payload)
+
+    def put(self, key: bytes, payload: dict):
+        expires_at = payload.get("exp")
+        if not isinstance(expires_at, (int, float)) or self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (expires_at, dict(payload))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+token_cache = VerifiedTokenCache()
+
+
 def verify_token(token: str) -> dict | None:
     """Verify JWT token and return payload"""
     if not token or not isinstance(token, str):
         return None
+
+    key = VerifiedTokenCache.make_key(token, SECRET_KEY)
+    payload = token_cache.get(key)
+    if payload is not None:
+        return payload
         
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         # Validate required fields exist
         if not payload.get("user_id") or not payload.get("email"):
             return None
+        token_cache.put(key, payload)
         return payload
     except jwt.ExpiredSignatureError:
         return None
@@ -0,0 +1,110 @@
+"""
+Password hashing and verification on a bounded worker pool.
+
+bcrypt spends 100-300 ms of CPU per call and releases the GIL while doing
+so, so running it in threads keeps the event loop responsive. Admission
+control rejects work once the pool and its queue are full instead of
+letting a login burst queue up without limit.
+"""
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
+import bcrypt
+
+T = TypeVar("T")
+
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "32"))
+
+
+class PasswordPoolSaturatedError(RuntimeError):
+    """Raised when the password pool cannot accept more work"""
+
+    def __init__(self, retry_after: float):
+        super().__init__("Password hashing pool is saturated")
+        self.retry_after = retry_after
+
+
+class PasswordWorkerPool:
+    """
+    Runs password operations on `workers` threads, with at most `max_queue`
+    further operations waiting. Latency is recorded per operation and includes
+    time spent queued.
+    """
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_queue: int = PASSWORD_HASH_MAX_QUEUE):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor: ThreadPoolExecutor | None = None
+        self._pending = 0
+        self._latencies: dict[str, deque[float]] = {}
+        self._counts: dict[str, int] = {}
+        self.rejected = 0
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        # Created lazily so the pool can be used again after a shutdown
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password")
+        return self._executor
+
+    def retry_after(self) -> float:
+        """Rough time until the current backlog drains, for the Retry-After header"""
+        samples = [latency for latencies in self._latencies.values() for latency in latencies]
+        average = sum(samples) / len(samples) if samples else 0.25
+        return max(1.0, math.ceil(self._pending * average / self.workers))
+
+    async def run(self, operation: str, fn: Callable[..., T], *args) -> T:
+        if self._pending >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise PasswordPoolSaturatedError(self.retry_after())
+
+        self._pending += 1
+        start = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+        finally:
+            self._pending -= 1
+            self._latencies.setdefault(operation, deque(maxlen=200)).append(time.perf_counter() - start)
+            self._counts[operation] = self._counts.get(operation, 0) + 1
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        operations = {}
+        for operation, latencies in self._latencies.items():
+            ordered = sorted(latencies)
+            operations[operation] = {
+                "count": self._counts[operation],
+                "p50": ordered[len(ordered) // 2],
+                "p99": ordered[min(int(len(ordered) * 0.99), len(ordered) - 1)],
+                "max": ordered[-1],
+            }
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "pending": self._pending,
+            "rejected": self.rejected,
+            "operations": operations,
+        }
+
+
+password_pool = PasswordWorkerPool()
+
+
+async def hash_password(password: str) -> str:
+    """Hash a password with a fresh salt"""
+    hashed = await password_pool.run("hash", bcrypt.hashpw, password.encode("utf-8"), bcrypt.gensalt())
+    return hashed.decode("utf-8")
+
+
+async def verify_password(password: str, hashed_password: str) -> bool:
+    """Check a password against its stored bcrypt hash"""
+    return await password_pool.run("verify", bcrypt.checkpw, password.encode("utf-8"), hashed_password.encode("utf-8"))
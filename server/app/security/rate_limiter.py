@@ -0,0 +1,258 @@
+"""
+Rate limiting with constant memory per client: in process, or shared by
+every worker through MongoDB.
+"""
+import math
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from app.db.rate_limit_repository import add_to_bucket, get_bucket_count, increment_bucket
+
+
+def sliding_retry_after(limit: int, window: float, current_count: int, previous_count: int, elapsed: float) -> float:
+    """Seconds until the sliding window estimate drops below `limit`"""
+    if current_count >= limit:
+        return window - elapsed
+    # Wait until the previous window's weight has decayed enough
+    needed_weight = (limit - current_count) / previous_count
+    return max(0.0, (1 - needed_weight) * window - elapsed)
+
+
+class SlidingWindowRateLimiter:
+    """
+    Sliding-window-counter limiter: each client keeps only the counts of the
+    current and previous fixed windows, and the previous count is weighted
+    by how much of it still overlaps the sliding window.
+
+    Clients are kept in least-recently-seen order. Clients idle for two full
+    windows are swept once per window, and at most `max_clients` are tracked;
+    beyond that the least recently seen client is forgotten.
+    """
+
+    def __init__(self, limit: int, window: float, max_clients: int = 100_000, clock=time.time):
+        if limit < 1 or window <= 0 or max_clients < 1:
+            raise ValueError("limit, window and max_clients must be positive")
+        self.limit = limit
+        self.window = window
+        self.max_clients = max_clients
+        self.clock = clock
+        # key -> [window index, count in that window, count in the window before]
+        self._clients: OrderedDict[str, list[int]] = OrderedDict()
+        self._next_sweep = 0
+        self.allowed = 0
+        self.rejected = 0
+        self.evictions = 0
+
+    def hit(self, key: str) -> tuple[bool, float]:
+        """Record a request from `key`; return (allowed, seconds until one would be allowed)"""
+        now = self.clock()
+        current = int(now // self.window)
+        if current >= self._next_sweep:
+            self._sweep(current)
+
+        state = self._clients.get(key)
+        if state is None:
+            state = [current, 0, 0]
+            self._clients[key] = state
+            if len(self._clients) > self.max_clients:
+                self._clients.popitem(last=False)
+                self.evictions += 1
+        else:
+            self._clients.move_to_end(key)
+            if state[0] != current:
+                state[2] = state[1] if state[0] == current - 1 else 0
+                state[1] = 0
+                state[0] = current
+
+        elapsed = now - current * self.window
+        previous_weight = 1 - elapsed / self.window
+        if state[2] * previous_weight + state[1] >= self.limit:
+            self.rejected += 1
+            return False, sliding_retry_after(self.limit, self.window, state[1], state[2], elapsed)
+
+        state[1] += 1
+        self.allowed += 1
+        return True, 0.0
+
+    async def acquire(self, key: str) -> tuple[bool, float]:
+        return self.hit(key)
+
+    def _sweep(self, current: int):
+        # Least recently seen clients come first; stop at the first one still active
+        while self._clients:
+            key, state = next(iter(self._clients.items()))
+            if state[0] >= current - 1:
+                break
+            del self._clients[key]
+            self.evictions += 1
+        self._next_sweep = current + 1
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "window": self.window,
+            "clients": len(self._clients),
+            "max_clients": self.max_clients,
+            "allowed": self.allowed,
+            "rejected": self.rejected,
+            "evictions": self.evictions,
+        }
+
+
+class MongoRateLimiter:
+    """
+    Sliding-window-counter limiter whose counts live in MongoDB, so every
+    worker shares one budget and restarts do not reset it. Each window is a
+    bucket document incremented with a conditional $inc and removed by a TTL
+    index once it is no longer needed as the previous window.
+
+    A local pre-check skips the round trip when the outcome is already clear.
+    A client whose last known count has used up the budget is rejected. While
+    the last known count leaves room, up to `local_allowance` hits in a row are
+    admitted locally and added to the bucket with the next round trip. Other
+    workers may be doing the same, so allowances above zero trade up to
+    workers * local_allowance extra hits per window for fewer round trips.
+    """
+
+    def __init__(
+        self,
+        route: str,
+        limit: int,
+        window: float,
+        local_allowance: int | None = None,
+        max_clients: int = 100_000,
+        clock=time.time,
+    ):
+        if limit < 1 or window <= 0 or max_clients < 1:
+            raise ValueError("limit, window and max_clients must be positive")
+        self.route = route
+        self.limit = limit
+        self.window = window
+        self.local_allowance = limit // 10 if local_allowance is None else local_allowance
+        self.max_clients = max_clients
+        self.clock = clock
+        # key -> [window index, previous window count, last known count, hits admitted locally]
+        self._known: OrderedDict[str, list[int]] = OrderedDict()
+        self.allowed = 0
+        self.rejected = 0
+        self.round_trips = 0
+        self.local_decisions = 0
+
+    def _bucket_id(self, key: str, window_index: int) -> str:
+        return f"{self.route}:{key}:{window_index}"
+
+    def _expires_at(self, window_index: int) -> datetime:
+        # Needed until the end of the next window, where it is the previous one
+        return datetime.fromtimestamp((window_index + 2) * self.window, tz=timezone.utc)
+
+    async def _client_state(self, key: str, current: int) -> list[int]:
+        state = self._known.get(key)
+        if state is not None and state[0] == current:
+            self._known.move_to_end(key)
+            return state
+
+        if state is not None and state[3]:
+            # Hits admitted locally at the end of the client's last window
+            self.round_trips += 1
+            await add_to_bucket(self._bucket_id(key, state[0]), state[3], self._expires_at(state[0]))
+
+        # The previous window is closed, so its count is read once per window
+        self.round_trips += 1
+        previous = await get_bucket_count(self._bucket_id(key, current - 1))
+        state = [current, previous, 0, 0]
+        self._known[key] = state
+        self._known.move_to_end(key)
+        if len(self._known) > self.max_clients:
+            self._known.popitem(last=False)
+        return state
+
+    async def acquire(self, key: str) -> tuple[bool, float]:
+        """Record a request from `key`; return (allowed, seconds until one would be allowed)"""
+        now = self.clock()
+        current = int(now // self.window)
+        elapsed = now - current * self.window
+        state = await self._client_state(key, current)
+
+        # Hits allowed in this window while the weighted previous window still counts
+        max_count = math.ceil(self.limit - state[1] * (1 - elapsed / self.window))
+        known = state[2] + state[3]
+
+        if known >= max_count:
+            self.local_decisions += 1
+            self.rejected += 1
+            return False, sliding_retry_after(self.limit, self.window, known, state[1], elapsed)
+
+        if state[3] < self.local_allowance and known + 1 < max_count:
+            self.local_decisions += 1
+            state[3] += 1
+            self.allowed += 1
+            return True, 0.0
+
+        bucket_id, expires_at = self._bucket_id(key, current), self._expires_at(current)
+        self.round_trips += 1
+        count = await increment_bucket(bucket_id, max_count, expires_at, state[3] + 1)
+        if count is None:
+            if state[3]:
+                # The locally admitted hits happened regardless
+                await add_to_bucket(bucket_id, state[3], expires_at)
+            state[2], state[3] = max_count, 0
+            self.rejected += 1
+            return False, sliding_retry_after(self.limit, self.window, max_count, state[1], elapsed)
+
+        state[2], state[3] = count, 0
+        self.allowed += 1
+        return True, 0.0
+
+    def stats(self) -> dict:
+        decisions = self.allowed + self.rejected
+        return {
+            "limit": self.limit,
+            "window": self.window,
+            "clients": len(self._known),
+            "allowed": self.allowed,
+            "rejected": self.rejected,
+            "round_trips": self.round_trips,
+            "local_decision_rate": self.local_decisions / decisions if decisions else 0.0,
+        }
+
+
+def parse_rate_limits(spec: str) -> dict[str, tuple[int, float]]:
+    """Parse "route=requests/seconds,..." into {route: (requests, seconds)}"""
+    limits = {}
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        route, _, limit = entry.partition("=")
+        requests, _, window = limit.partition("/")
+        limits[route.strip()] = (int(requests), float(window))
+    return limits
+
+
+def describe_window(seconds: float) -> str:
+    for unit, size in (("day", 86400), ("hour", 3600), ("minute", 60)):
+        if seconds == size:
+            return unit
+    return f"{math.ceil(seconds)} seconds"
+
+
+# "memory" keeps counts per process; "mongo" shares them between workers
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_MAX_CLIENTS = int(os.getenv("RATE_LIMIT_MAX_CLIENTS", "100000"))
+RATE_LIMIT_LOCAL_ALLOWANCE = os.getenv("RATE_LIMIT_LOCAL_ALLOWANCE")
+# Per-route limits; routes that are not listed share the "default" limiter
+RATE_LIMITS = {"default": (5, 3600.0), **parse_rate_limits(os.getenv("RATE_LIMITS", ""))}
+
+
+def create_rate_limiter(route: str, limit: int, window: float, backend: str = RATE_LIMIT_BACKEND):
+    if backend == "memory":
+        return SlidingWindowRateLimiter(limit, window, RATE_LIMIT_MAX_CLIENTS)
+    if backend == "mongo":
+        local_allowance = int(RATE_LIMIT_LOCAL_ALLOWANCE) if RATE_LIMIT_LOCAL_ALLOWANCE else None
+        return MongoRateLimiter(route, limit, window, local_allowance, RATE_LIMIT_MAX_CLIENTS)
+    raise ValueError(f"Unknown rate limit backend: {backend}")
+
+
+rate_limiters = {route: create_rate_limiter(route, limit, window) for route, (limit, window) in RATE_LIMITS.items()}
+
+
+def get_rate_limiter(route: str) -> SlidingWindowRateLimiter | MongoRateLimiter:
+    return rate_limiters.get(route) or rate_limiters["default"]
@@ -1,36 +1,54 @@
 """
 Security utilities for input sanitization and validation.
 """
+import os
 import re
 import html
+from functools import lru_cache
+from typing import Iterable
 from bson import ObjectId
 
 
+# Characters that could form MongoDB operators or object literals
+_MONGO_SPECIAL_CHARS = str.maketrans('', '', '{}$')
+
+# Common system paths stripped from string input
+_DANGEROUS_PATHS = (
+    'etc/passwd', 'system32', 'windows', 'config/sam',
+    'var/log', 'boot.ini', 'autoexec.bat'
+)
+
+# Removal rules for sanitize_string_input, applied in order. A removal can
+# create a match for a later rule, so the order is part of the behaviour.
+_STRING_RULES = (
+    (re.compile(r'\.\.[\\/]'), ''),  # Remove ../ and ..\
+    (re.compile(r'%2e%2e%2f', re.IGNORECASE), ''),  # Remove URL encoded ../
+    (re.compile(r'%2e%2e%5c', re.IGNORECASE), ''),  # Remove URL encoded ..\
+    (re.compile(r'\.{4,}'), '...'),  # Limit multiple dots
+    (re.compile(r'file://', re.IGNORECASE), ''),  # Remove dangerous file protocols
+    (re.compile(r'\\\\[^\\]+\\'), ''),  # Remove UNC paths
+) + tuple((re.compile(re.escape(path), re.IGNORECASE), '') for path in _DANGEROUS_PATHS)
+
+# One scan that finds anything a rule above could match. Input without a hit is
+# left unchanged by every rule, so the ordered rules only run on suspicious input.
+_STRING_RULES_TRIGGER = re.compile(
+    r'\.\.|%2e%2e|file://|\\\\|' + '|'.join(re.escape(path) for path in _DANGEROUS_PATHS),
+    re.IGNORECASE,
+)
+
+
 def sanitize_string_input(input_str: str, max_length: int = 100) -> str:
     """Sanitize string input to prevent injection attacks"""
     if not isinstance(input_str, str):
         raise ValueError("Input must be a string")
     
     # Remove any MongoDB operators and special characters
-    sanitized = re.sub(r'[{}$]', '', input_str)
-    
-    # Remove path traversal patterns
-    sanitized = re.sub(r'\.\.[\\/]', '', sanitized)  # Remove ../ and ..\
-    sanitized = re.sub(r'%2e%2e%2f', '', sanitized, flags=re.IGNORECASE)  # Remove URL encoded ../
-    sanitized = re.sub(r'%2e%2e%5c', '', sanitized, flags=re.IGNORECASE)  # Remove URL encoded ..\
-    sanitized = re.sub(r'\.{4,}', '...', sanitized)  # Limit multiple dots
+    sanitized = input_str.translate(_MONGO_SPECIAL_CHARS)
     
-    # Remove dangerous file protocols and paths
-    sanitized = re.sub(r'file://', '', sanitized, flags=re.IGNORECASE)
-    sanitized = re.sub(r'\\\\[^\\]+\\', '', sanitized)  # Remove UNC paths
-    
-    # Remove common system paths
-    dangerous_paths = [
-        'etc/passwd', 'system32', 'windows', 'config/sam', 
-        'var/log', 'boot.ini', 'autoexec.bat'
-    ]
-    for path in dangerous_paths:
-        sanitized = re.sub(re.escape(path), '', sanitized, flags=re.IGNORECASE)
+    # Remove path traversal patterns, file protocols, UNC and system paths
+    if _STRING_RULES_TRIGGER.search(sanitized):
+        for pattern, replacement in _STRING_RULES:
+            sanitized = pattern.sub(replacement, sanitized)
     
     sanitized = sanitized.strip()
     
@@ -43,41 +61,87 @@ def sanitize_string_input(input_str: str, max_length: int = 100) -> str:
     return sanitized
 
 
+# Tags dropped by sanitize_html_content; script and style lose their content too
+_DANGEROUS_TAGS = frozenset({
+    'script', 'iframe', 'object', 'embed', 'form', 'meta', 'base',
+    'link', 'style', 'svg', 'audio', 'video'
+})
+_RAW_TEXT_TAGS = frozenset({'script', 'style'})
+
+# Attributes dropped from the tags that are kept, along with every on* event handler.
+# Only assigned attributes are dropped; bare words are never attributes worth removing.
+_DANGEROUS_ATTRS = frozenset({'href', 'src'})
+
+# A tag from "<" up to the next ">"; the character classes cannot backtrack.
+# Without a ">" it is not a tag: "i<n" in an explanation stays text and is escaped.
+_TAG_PATTERN = re.compile(r'<(/?)([A-Za-z][A-Za-z0-9:-]*)([^<>]*)>')
+_ATTR_PATTERN = re.compile(r'''([^\s"'=<>/]+)(?:\s*=\s*("[^"]*"|'[^']*'|[^\s>]*))?''')
+_RAW_TEXT_END = {tag: re.compile(f'</{tag}\\b', re.IGNORECASE) for tag in _RAW_TEXT_TAGS}
+_JAVASCRIPT_URL = re.compile(r'javascript:', re.IGNORECASE)
+
+
+def _is_dangerous_attr(attr: re.Match) -> bool:
+    name = attr.group(1).lower()
+    return attr.group(2) is not None and (name.startswith('on') or name in _DANGEROUS_ATTRS)
+
+
+def _clean_tag(tag: re.Match) -> str:
+    """A kept tag as written, or rebuilt without its dangerous attributes"""
+    closing, name, attrs = tag.groups()
+    found = list(_ATTR_PATTERN.finditer(attrs))
+    kept = [attr.group(0) for attr in found if not _is_dangerous_attr(attr)]
+    if len(kept) == len(found):
+        # Nothing to drop: text such as "i<n ... j>0" comes through unchanged
+        return tag.group(0)
+    return f'<{closing}{name} {" ".join(kept)}>' if kept else f'<{closing}{name}>'
+
+
 def sanitize_html_content(input_str: str, max_length: int = 2000) -> str:
-    """Sanitize HTML content to prevent XSS attacks"""
+    """
+    Sanitize HTML content to prevent XSS attacks. A single left-to-right pass
+    drops dangerous tags, comments and attributes; the rest is then escaped.
+    Runs in time linear in the input length.
+    """
     if not isinstance(input_str, str):
         raise ValueError("Input must be a string")
     
-    # Remove dangerous HTML tags and JavaScript
-    sanitized = input_str.strip()
-    
-    # Remove script tags and their content
-    sanitized = re.sub(r'<script[^>]*>.*?</script>', '', sanitized, flags=re.IGNORECASE | re.DOTALL)
-    
-    # Remove dangerous HTML tags
-    dangerous_tags = [
-        'script', 'iframe', 'object', 'embed', 'form', 'meta', 'base', 
-        'link', 'style', 'svg', 'audio', 'video'
-    ]
-    
-    for tag in dangerous_tags:
-        # Remove opening and closing tags
-        sanitized = re.sub(f'<{tag}[^>]*>', '', sanitized, flags=re.IGNORECASE)
-        sanitized = re.sub(f'</{tag}>', '', sanitized, flags=re.IGNORECASE)
-    
-    # Remove dangerous attributes
-    dangerous_attrs = [
-        'onload', 'onerror', 'onclick', 'onmouseover', 'onmouseout',
-        'onfocus', 'onblur', 'onsubmit', 'onreset', 'onchange', 'onkeydown',
-        'onkeyup', 'onkeypress', 'href', 'src'
-    ]
-    
-    for attr in dangerous_attrs:
-        sanitized = re.sub(f'{attr}\\s*=\\s*["\'][^"\']*["\']', '', sanitized, flags=re.IGNORECASE)
-        sanitized = re.sub(f'{attr}\\s*=\\s*[^\\s>]*', '', sanitized, flags=re.IGNORECASE)
-    
-    # Remove javascript: urls
-    sanitized = re.sub(r'javascript:', '', sanitized, flags=re.IGNORECASE)
+    text = input_str.strip()
+    length = len(text)
+    parts = []
+    pos = 0
+    
+    while pos < length:
+        start = text.find('<', pos)
+        if start == -1:
+            parts.append(text[pos:])
+            break
+        parts.append(text[pos:start])
+        
+        # Remove comments, including unterminated ones
+        if text.startswith('<!--', start):
+            end = text.find('-->', start + 4)
+            pos = length if end == -1 else end + 3
+            continue
+        
+        match = _TAG_PATTERN.match(text, start)
+        if not match:
+            parts.append('<')
+            pos = start + 1
+            continue
+        pos = match.end()
+        
+        closing, name = match.group(1, 2)
+        tag = name.lower()
+        if tag not in _DANGEROUS_TAGS:
+            parts.append(_clean_tag(match))
+        elif tag in _RAW_TEXT_TAGS and not closing:
+            # Skip the element's content up to and including its end tag
+            end = _RAW_TEXT_END[tag].search(text, pos)
+            close = text.find('>', end.end()) if end else -1
+            pos = length if close == -1 else close + 1
+    
+    # Remove javascript: urls, including ones joined up by the removals above
+    sanitized = _JAVASCRIPT_URL.sub('', ''.join(parts))
     
     # HTML escape the remaining content
     sanitized = html.escape(sanitized)
@@ -88,45 +152,89 @@ def sanitize_html_content(input_str: str, max_length: int = 2000) -> str:
     return sanitized
 
 
-def sanitize_ai_input(text: str) -> str:
-    """Sanitize input for AI prompt to prevent prompt injection"""
-    if not isinstance(text, str):
-        raise ValueError("Input must be a string")
-    
+# Prompt injection patterns removed by sanitize_ai_input, applied in order
+_AI_INJECTION_PATTERNS = tuple(re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'ignore.*previous.*instructions?',
+    r'forget.*above',
+    r'act.*as.*if',
+    r'pretend.*to.*be',
+    r'system[:\s]',
+    r'assistant[:\s]',
+    r'user[:\s]',
+    r'\[.*\]',
+    r'```',
+    r'---',
+    r'<.*>',
+    r'\n\n',
+    r'\\n',
+))
+_AI_DISALLOWED_CHARS = re.compile(r'[^a-zA-Z0-9\s\-_.,&()]')
+
+# Raw terms are re-sanitized every time they appear in a prompt, so results are memoized.
+# Longer texts bypass the memo so its memory stays bounded.
+AI_SANITIZE_CACHE_SIZE = int(os.getenv("AI_SANITIZE_CACHE_SIZE", "4096"))
+AI_SANITIZE_CACHEABLE_LENGTH = 512
+
+
+@lru_cache(maxsize=AI_SANITIZE_CACHE_SIZE)
+def _sanitize_ai_text(text: str) -> str | None:
+    """Sanitized text, or None if nothing is left; cached by raw text"""
     # Remove potentially dangerous characters and sequences
     sanitized = text.strip()
     
     # Remove prompt injection attempts
-    dangerous_patterns = [
-        r'ignore.*previous.*instructions?',
-        r'forget.*above',
-        r'act.*as.*if',
-        r'pretend.*to.*be',
-        r'system[:\s]',
-        r'assistant[:\s]',
-        r'user[:\s]',
-        r'\[.*\]',
-        r'```',
-        r'---',
-        r'<.*>',
-        r'\n\n',
-        r'\\n',
-    ]
-    
-    for pattern in dangerous_patterns:
-        sanitized = re.sub(pattern, '', sanitized, flags=re.IGNORECASE)
+    for pattern in _AI_INJECTION_PATTERNS:
+        sanitized = pattern.sub('', sanitized)
     
     # Limit to alphanumeric, spaces, and basic punctuation
-    sanitized = re.sub(r'[^a-zA-Z0-9\s\-_.,&()]', '', sanitized)
+    sanitized = _AI_DISALLOWED_CHARS.sub('', sanitized)
     
-    # Limit length and ensure it's not empty
-    sanitized = sanitized[:100].strip()
+    # Limit length
+    return sanitized[:100].strip() or None
+
+
+def _sanitize_ai_cached(text: str) -> str | None:
+    if len(text) > AI_SANITIZE_CACHEABLE_LENGTH:
+        return _sanitize_ai_text.__wrapped__(text)
+    return _sanitize_ai_text(text)
+
+
+def sanitize_ai_input(text: str) -> str:
+    """Sanitize input for AI prompt to prevent prompt injection"""
+    if not isinstance(text, str):
+        raise ValueError("Input must be a string")
+    
+    sanitized = _sanitize_ai_cached(text)
     if not sanitized:
         raise ValueError("Input cannot be empty after sanitization")
     
     return sanitized
 
 
+def sanitize_ai_inputs(texts: Iterable[str]) -> list[str]:
+    """Sanitize several prompt inputs, dropping any that are invalid or empty after sanitization"""
+    sanitized = []
+    for text in texts:
+        if isinstance(text, str):
+            result = _sanitize_ai_cached(text)
+            if result:
+                sanitized.append(result)
+    return sanitized
+
+
+def sanitize_ai_input_stats() -> dict:
+    """Hit rate of the sanitize_ai_input memo"""
+    info = _sanitize_ai_text.cache_info()
+    lookups = info.hits + info.misses
+    return {
+        "size": info.currsize,
+        "max_size": info.maxsize,
+        "hits": info.hits,
+        "misses": info.misses,
+        "hit_rate": info.hits / lookups if lookups else 0.0,
+    }
+
+
 def validate_object_id(user_id: str) -> ObjectId:
     """Validate and convert user_id to ObjectId"""
     try:
@@ -1,29 +1,320 @@
+import asyncio
+import logging
+import os
+import time
+import uuid
 from datetime import datetime, timezone
-from app.db.user_repository import add_term_to_history, save_daily_concept, get_user_by_id
-from app.ai.generate_specific_concept import generate_specific_concept
+from typing import AsyncIterator
+from bson import ObjectId
+from app.db.daily_concept_repository import (
+    claim_generation,
+    commit_daily_concept,
+    find_seen_term_keys,
+    get_daily_concept,
+    get_recent_seen_terms,
+    has_seen_term,
+    release_generation,
+)
+from app.db.user_repository import get_user_concept_view
+from app.db.concept_repository import normalize_term, find_unseen_concept, add_concept_to_catalog, add_concepts_to_catalog
+from app.models.user_model import UserConceptView
+from app.ai.generate_specific_concept import (
+    PROMPT_BLACKLIST_SIZE,
+    generate_specific_concept,
+    generate_specific_concepts,
+    parse_specific_concept,
+    stream_specific_concept,
+    TermStreamParser,
+)
 
+logger = logging.getLogger(__name__)
 
-async def get_daily_concept_service(user_id: str, category: str):
-    user = await get_user_by_id(user_id)
-    if not user:
-        raise ValueError("User not found")
+# Concepts generated per LLM call when the catalog runs dry; the extras refill the catalog
+CATALOG_REFILL_BATCH_SIZE = int(os.getenv("CATALOG_REFILL_BATCH_SIZE", "3"))
+# Extra generations allowed when the model returns a term the user has already seen
+DUPLICATE_REGENERATION_BUDGET = int(os.getenv("DUPLICATE_REGENERATION_BUDGET", "2"))
 
-    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+# Lease on the claim to generate a user's concept for the day. The holder renews it
+# every third of the lease while it generates, however long the upstream takes; a
+# claim whose holder crashed is taken over once this has passed without a renewal
+GENERATION_LEASE_SECONDS = float(os.getenv("GENERATION_LEASE_SECONDS", "60"))
+# How often, and for how long, a request that lost the claim checks for the holder's concept
+GENERATION_POLL_INTERVAL = float(os.getenv("GENERATION_POLL_INTERVAL", "0.25"))
+GENERATION_WAIT_SECONDS = float(os.getenv("GENERATION_WAIT_SECONDS", "75"))
+
+duplicate_stats = {"checked": 0, "repeats": 0, "unparsed": 0, "budget_exhausted": 0}
+commit_stats = {"committed": 0, "slot_already_filled": 0}
+claim_stats = {"claimed": 0, "waited": 0, "served_by_holder": 0, "taken_over": 0, "unclaimed": 0, "renewed": 0, "lost": 0}
+
+# owner -> the task renewing that owner's claim until it is released
+_renewals: dict[str, asyncio.Task] = {}
+
+
+async def _load_prompt_terms(user_id: str, category: str) -> list[str]:
+    """The newest terms the user has seen in `category`, oldest first; only these are named in the prompt"""
+    return await get_recent_seen_terms(ObjectId(user_id), category, PROMPT_BLACKLIST_SIZE)
+
+
+async def _was_seen(user_id: str, category: str, term: str) -> bool:
+    """Whether the user has seen `term` in `category`, with one point query on the history"""
+    duplicate_stats["checked"] += 1
+    if await has_seen_term(ObjectId(user_id), category, term):
+        duplicate_stats["repeats"] += 1
+        return True
+    return False
+
+
+async def _find_ready_concept(user: UserConceptView, category: str, today: str) -> dict | None:
+    """Return a concept that needs no LLM call: prepared by the batch job, or unseen in the shared catalog"""
+    # Use the concept prepared by the midnight batch job when there is one
+    prepared = (user.prepared or {}).get(today, {}).get(category)
+    if prepared and not await _was_seen(user.id, category, prepared["term"]):
+        return prepared
+
+    return await find_unseen_concept(category, ObjectId(user.id))
 
-    daily = user.daily or {}
-    if today in daily:
-        return daily[today]
 
-    history = user.history or {}
-    seen_terms = history.get(category, [])
+async def _find_seen_keys(user_id: str, category: str, concepts: list[dict]) -> set[str]:
+    """Normalized terms among `concepts` the user has already seen, checked in one query"""
+    term_keys = [normalize_term(concept["term"]) for concept in concepts]
+    if not term_keys:
+        return set()
+    duplicate_stats["checked"] += len(term_keys)
+    seen_keys = await find_seen_term_keys(ObjectId(user_id), category, term_keys)
+    duplicate_stats["repeats"] += len(seen_keys)
+    return seen_keys
 
-    result = generate_specific_concept(category, seen_terms)
-    
-    await add_term_to_history(user_id, category, result["term"])
-    await save_daily_concept(user_id, category, result["term"], result["explanation"])
+
+async def _generate_and_catalog(category: str, seen_terms: list[str]) -> list[dict]:
+    """Generate candidate concepts, first choice first, and add them to the shared catalog"""
+    if CATALOG_REFILL_BATCH_SIZE > 1:
+        concepts = await generate_specific_concepts(category, seen_terms, CATALOG_REFILL_BATCH_SIZE)
+        if concepts:
+            await add_concepts_to_catalog(category, concepts)
+            return concepts
+
+    result = await generate_specific_concept(category, seen_terms)
+    # A reply parsed back to the category itself is not a concept worth sharing
+    if normalize_term(result["term"]) != normalize_term(category):
+        await add_concept_to_catalog(category, result["term"], result["explanation"])
+    return [result]
+
+
+async def _generate_unseen(user_id: str, category: str, seen_terms: list[str]) -> dict:
+    """
+    Generate a concept whose term is not in the user's full history. The prompt
+    only names the newest `seen_terms`; candidates are checked against the rest
+    with one indexed query. Repeats are added to the prompt blacklist and
+    regenerated, at most DUPLICATE_REGENERATION_BUDGET times; after that the
+    last first choice is used. Replies the parser could only map to the
+    category itself are regenerated too.
+    """
+    category_key = normalize_term(category)
+    rejected = []
+    for _ in range(DUPLICATE_REGENERATION_BUDGET + 1):
+        # Rejected terms go last so they are among the most recent the prompt names
+        candidates = await _generate_and_catalog(category, seen_terms + rejected)
+        parsed = [concept for concept in candidates if normalize_term(concept["term"]) != category_key]
+        duplicate_stats["unparsed"] += len(candidates) - len(parsed)
+        seen_keys = await _find_seen_keys(user_id, category, parsed)
+        for concept in parsed:
+            if normalize_term(concept["term"]) not in seen_keys:
+                return concept
+        result = candidates[0]
+        rejected.extend(concept["term"] for concept in candidates)
+
+    duplicate_stats["budget_exhausted"] += 1
+    logger.warning("Serving unverified term %r in %s after %d regenerations", result["term"], category, DUPLICATE_REGENERATION_BUDGET)
+    return result
+
+
+async def _save_concept(user_id: str, category: str, result: dict) -> dict:
+    # One write commits today's concept, which is also the history entry
+    existing = await commit_daily_concept(user_id, category, result["term"], result["explanation"])
+    if existing is not None:
+        # Another request filled today's slot first; serve what it committed
+        commit_stats["slot_already_filled"] += 1
+        return existing
+    commit_stats["committed"] += 1
 
     return {
         "category": category,
         "term": result["term"],
         "explanation": result["explanation"]
     }
+
+
+async def _claim_or_wait(user_id: str, today: str) -> tuple[str | None, dict | None]:
+    """
+    Claim generating the user's concept for today, or wait for the request
+    holding the claim, possibly in another worker. Returns (owner, None) when
+    this request should generate, or (None, concept) once the holder has
+    committed. While waiting the claim is retried, so a holder that failed and
+    released it, or whose lease expired, is taken over. After
+    GENERATION_WAIT_SECONDS this request generates unclaimed: (None, None).
+    A won claim is renewed until _release_claim gives it up.
+    """
+    owner = uuid.uuid4().hex
+    if await claim_generation(user_id, today, owner, GENERATION_LEASE_SECONDS):
+        claim_stats["claimed"] += 1
+        return await _hold_claim(user_id, today, owner)
+
+    claim_stats["waited"] += 1
+    deadline = time.monotonic() + GENERATION_WAIT_SECONDS
+    while time.monotonic() < deadline:
+        await asyncio.sleep(GENERATION_POLL_INTERVAL)
+        concept = await get_daily_concept(ObjectId(user_id), today)
+        if concept:
+            claim_stats["served_by_holder"] += 1
+            return None, concept
+        if await claim_generation(user_id, today, owner, GENERATION_LEASE_SECONDS):
+            claim_stats["taken_over"] += 1
+            return await _hold_claim(user_id, today, owner)
+
+    claim_stats["unclaimed"] += 1
+    logger.warning("Generating for user %s without a claim after waiting %.0fs", user_id, GENERATION_WAIT_SECONDS)
+    return None, None
+
+
+async def _hold_claim(user_id: str, today: str, owner: str) -> tuple[str | None, dict | None]:
+    # The previous holder may have committed and released just before the claim was won
+    concept = await get_daily_concept(ObjectId(user_id), today)
+    if concept:
+        claim_stats["served_by_holder"] += 1
+        await release_generation(user_id, today, owner)
+        return None, concept
+    _renewals[owner] = asyncio.create_task(_renew_claim(user_id, today, owner))
+    return owner, None
+
+
+async def _renew_claim(user_id: str, today: str, owner: str):
+    """Extend the claim every third of its lease until cancelled or taken over"""
+    while True:
+        await asyncio.sleep(GENERATION_LEASE_SECONDS / 3)
+        try:
+            renewed = await claim_generation(user_id, today, owner, GENERATION_LEASE_SECONDS)
+        except Exception as e:
+            # The lease still has two thirds left for the next attempt
+            logger.warning("Failed to renew the generation claim for user %s: %s", user_id, e)
+            continue
+        if not renewed:
+            claim_stats["lost"] += 1
+            logger.warning("Generation claim for user %s expired and was taken over", user_id)
+            return
+        claim_stats["renewed"] += 1
+
+
+async def _release_claim(user_id: str, today: str, owner: str | None):
+    if owner is not None:
+        renewal = _renewals.pop(owner, None)
+        if renewal is not None:
+            renewal.cancel()
+        await release_generation(user_id, today, owner)
+
+
+async def get_daily_concept_service(user_id: str, category: str):
+    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    user = await get_user_concept_view(user_id, category, today)
+    if not user:
+        raise ValueError("User not found")
+
+    daily = user.daily or {}
+    if today in daily:
+        return daily[today]
+
+    result = await _find_ready_concept(user, category, today)
+    if result:
+        return await _save_concept(user_id, category, result)
+
+    # Only one request per user and day pays for an LLM call
+    owner, concept = await _claim_or_wait(user_id, today)
+    if concept:
+        return concept
+    try:
+        # History is only read when a concept has to be generated
+        seen_terms = await _load_prompt_terms(user_id, category)
+        result = await _generate_unseen(user_id, category, seen_terms)
+        return await _save_concept(user_id, category, result)
+    finally:
+        await _release_claim(user_id, today, owner)
+
+
+async def _replay_concept(concept: dict) -> AsyncIterator[tuple[str, dict]]:
+    yield "term", {"term": concept.get("term")}
+    yield "token", {"text": concept.get("explanation", "")}
+    yield "done", concept
+
+
+async def _stream_and_save(
+    user_id: str,
+    category: str,
+    chunks: AsyncIterator[str],
+    safe_category: str,
+    today: str,
+    owner: str | None,
+) -> AsyncIterator[tuple[str, dict]]:
+    parser = TermStreamParser()
+    content = []
+
+    # The claim is held until the stream ends, however it ends
+    try:
+        async for chunk in chunks:
+            content.append(chunk)
+            term, text = parser.feed(chunk)
+            if term:
+                yield "term", {"term": term}
+            if text:
+                yield "token", {"text": text}
+
+        text = parser.finish()
+        if text:
+            yield "token", {"text": text}
+
+        full_content = "".join(content).strip()
+        if not full_content:
+            raise ValueError("Empty response from model")
+
+        # Persist the same parsed result the non-streaming endpoint would save
+        result = parse_specific_concept(full_content, safe_category)
+        # A reply parsed back to the category itself is neither a real term nor worth sharing
+        if normalize_term(result["term"]) == normalize_term(category):
+            duplicate_stats["unparsed"] += 1
+        else:
+            await _was_seen(user_id, category, result["term"])
+            await add_concept_to_catalog(category, result["term"], result["explanation"])
+        yield "done", await _save_concept(user_id, category, result)
+    finally:
+        await _release_claim(user_id, today, owner)
+
+
+async def stream_daily_concept_service(user_id: str, category: str) -> AsyncIterator[tuple[str, dict]]:
+    """
+    Streaming variant of get_daily_concept_service. Lookups and validation
+    happen before the stream is returned, so errors can still become HTTP errors.
+    Yields (event, data) pairs: "term", "token" and finally "done".
+    Streamed terms cannot be regenerated once sent, so repeats are only counted.
+    If another request committed today's concept meanwhile, "done" carries that one.
+    """
+    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    user = await get_user_concept_view(user_id, category, today)
+    if not user:
+        raise ValueError("User not found")
+
+    daily = user.daily or {}
+    if today in daily:
+        return _replay_concept(daily[today])
+
+    ready = await _find_ready_concept(user, category, today)
+    if ready:
+        return _replay_concept(await _save_concept(user_id, category, ready))
+
+    owner, concept = await _claim_or_wait(user_id, today)
+    if concept:
+        return _replay_concept(concept)
+    try:
+        seen_terms = await _load_prompt_terms(user_id, category)
+        chunks, safe_category = stream_specific_concept(category, seen_terms)
+    except BaseException:
+        await _release_claim(user_id, today, owner)
+        raise
+    return _stream_and_save(user_id, category, chunks, safe_category, today, owner)
@@ -1,20 +1,22 @@
-import bcrypt
 from app.models.user_model import UserCreate, UserInDB, UserLogin, UserResponse, UserLoginResponse
 from app.db.user_repository import get_user_by_email, create_user
 from app.security.auth_service import create_access_token
+from app.security.password_hashing import verify_password
+from pymongo.errors import DuplicateKeyError
 
-# Business logic: register a new user if they don't already exist
+# Business logic: register a new user if they don't already exist.
+# The unique email index decides, so concurrent registrations cannot both succeed.
 async def register_user(user_data: UserCreate) -> UserInDB:
-    existing_user = await get_user_by_email(user_data.email)
-    if existing_user:
+    try:
+        return await create_user(user_data)
+    except DuplicateKeyError:
         raise ValueError("User already exists with this email")
-    return await create_user(user_data)
 
 
 # Authenticate user and return public data with JWT token
 async def authenticate_user(login_data: UserLogin) -> UserLoginResponse | None:
     user = await get_user_by_email(login_data.email)
-    if not user or not bcrypt.checkpw(login_data.password.encode(), user.password.encode()):
+    if not user or not await verify_password(login_data.password, user.password):
         return None
     
     # Create JWT token
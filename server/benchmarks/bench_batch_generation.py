@@ -0,0 +1,85 @@
+"""
+Tokens per concept and wall time: one concept per call vs. batched calls.
+
+Runs against the deterministic stub provider, where whitespace-delimited
+words stand in for tokens and latency = fixed overhead + tokens / rate.
+
+Usage (from the server directory):
+    python -m benchmarks.bench_batch_generation --concepts 12 --batch-size 4
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.ai import llm_client
+from app.ai.generate_specific_concept import generate_specific_concept, generate_specific_concepts
+from app.ai.providers import StubProvider
+
+
+class CountingProvider(StubProvider):
+    """Stub provider that counts prompt and completion tokens"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    async def complete(self, messages, max_tokens, temperature, json_mode=False):
+        self.calls += 1
+        self.prompt_tokens += sum(len(message["content"].split()) for message in messages)
+        content = await super().complete(messages, max_tokens, temperature, json_mode)
+        self.completion_tokens += len(content.split())
+        return content
+
+
+async def single(provider: CountingProvider, total: int) -> int:
+    seen = []
+    for _ in range(total):
+        concept = await generate_specific_concept("physics", seen)
+        seen.append(concept["term"])
+    return len(seen)
+
+
+async def batched(provider: CountingProvider, total: int, batch_size: int) -> int:
+    seen = []
+    while len(seen) < total:
+        concepts = await generate_specific_concepts("physics", seen, min(batch_size, total - len(seen)))
+        seen.extend(concept["term"] for concept in concepts)
+    return len(seen)
+
+
+def measure(label: str, run, provider: CountingProvider):
+    llm_client._provider = provider
+    start = time.perf_counter()
+    produced = asyncio.run(run)
+    elapsed = time.perf_counter() - start
+    total_tokens = provider.prompt_tokens + provider.completion_tokens
+    print(
+        f"{label:<8} concepts={produced:3d} calls={provider.calls:3d} "
+        f"tokens/concept={total_tokens / produced:7.1f} "
+        f"(prompt {provider.prompt_tokens / produced:6.1f}) wall={elapsed:6.2f}s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concepts", type=int, default=12)
+    parser.add_argument("--batch-size", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--tokens-per-second", type=float, default=200)
+    args = parser.parse_args()
+
+    stub = {"latency": args.latency, "tokens_per_second": args.tokens_per_second}
+    single_provider = CountingProvider(**stub)
+    measure("single", single(single_provider, args.concepts), single_provider)
+    batched_provider = CountingProvider(**stub)
+    measure("batched", batched(batched_provider, args.concepts, args.batch_size), batched_provider)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+/get-concept latency with and without the per-category concept cache.
+
+The upstream LLM is simulated with a fixed sleep, and visitors ask for a
+small set of popular categories.
+
+Usage (from the server directory):
+    python -m benchmarks.bench_concept_cache --requests 2000 --categories 10
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.ai.concept_cache import ConceptCache
+
+
+async def run(total: int, categories: list[str], latency: float, cache: ConceptCache | None) -> list[float]:
+    async def fake_generate(category: str) -> str:
+        await asyncio.sleep(latency)
+        return f"An explanation about {category}"
+
+    rng = random.Random(42)
+    samples = []
+    for _ in range(total):
+        category = rng.choice(categories)
+        start = time.perf_counter()
+        if cache is None:
+            await fake_generate(category)
+        elif cache.lookup(category) is None:
+            # What /get-concept does on a miss, without the coalescing
+            cache.add(category, await fake_generate(category))
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def report(label: str, samples: list[float]):
+    samples = sorted(samples)
+    p50 = samples[len(samples) // 2] * 1000
+    p99 = samples[int(len(samples) * 0.99)] * 1000
+    print(f"{label:<10} mean={statistics.mean(samples) * 1000:8.2f}ms  p50={p50:8.2f}ms  p99={p99:8.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--categories", type=int, default=10)
+    parser.add_argument("--pool-size", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    categories = [f"category-{i}" for i in range(args.categories)]
+    cache = ConceptCache(pool_size=args.pool_size)
+
+    report("uncached", asyncio.run(run(args.requests, categories, args.latency, None)))
+    report("cached", asyncio.run(run(args.requests, categories, args.latency, cache)))
+    print(f"cache stats: {cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Single-concept reply parsing: per-call cost of each parser path, and how
+often a drifting model forces a regeneration in text vs. JSON mode.
+
+Drift is simulated: with probability --drift the stub answers without any
+recognisable structure, which the text parser can only map back to the
+category. In JSON mode the provider's response_format is assumed to hold,
+so drift only applies at --json-drift.
+
+Usage (from the server directory):
+    python -m benchmarks.bench_concept_parsing --iterations 20000 --concepts 500 --drift 0.1
+"""
+import argparse
+import asyncio
+import os
+import random
+import re
+import sys
+import timeit
+from unittest.mock import AsyncMock, patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret-key-that-is-long-enough")
+
+from app.ai import generate_specific_concept as concept_module
+from app.ai import llm_client
+from app.ai.generate_specific_concept import parse_specific_concept
+from app.ai.providers import StubProvider
+from app.models.user_model import UserConceptView
+from app.services import daily_concept_service
+
+USER_ID = "507f1f77bcf86cd799439011"
+
+REPLIES = {
+    "json": '{"term": "Entropy", "explanation": "A measure of disorder in a thermodynamic system."}',
+    "term_line": "Term: Entropy\nA measure of disorder in a thermodynamic system.",
+    "inline": "Entropy: a measure of disorder in a thermodynamic system.",
+    "raw": "A measure of disorder in a thermodynamic system",
+}
+
+
+def parse_recompiling(content: str, safe_category: str) -> dict:
+    """The previous parser: regexes looked up on every call, no JSON path"""
+    match = re.search(r"Term:\s*(.+?)\n+(.+)", content, re.DOTALL)
+    if match:
+        return {"term": match.group(1).strip(), "explanation": match.group(2).strip()}
+    match = re.match(r"(Term:)?\s*(.+?)\s*:\s*(.+)", content, re.DOTALL)
+    if match:
+        return {"term": match.group(2).strip(), "explanation": match.group(3).strip()}
+    return {"term": safe_category.strip(), "explanation": content}
+
+
+class DriftingProvider(StubProvider):
+    """Stub provider that sometimes ignores the requested format"""
+
+    def __init__(self, drift: float, json_drift: float, **kwargs):
+        super().__init__(**kwargs)
+        self.drift = drift
+        self.json_drift = json_drift
+        self._drift_rng = random.Random(1)
+
+    async def complete(self, messages, max_tokens, temperature, json_mode=False):
+        content = await super().complete(messages, max_tokens, temperature, json_mode)
+        if self._drift_rng.random() < (self.json_drift if json_mode else self.drift):
+            return "Here is an interesting concept from this field that you may enjoy learning about"
+        return content
+
+
+def bench_parsers(iterations: int):
+    for path, reply in REPLIES.items():
+        current = timeit.timeit(lambda: parse_specific_concept(reply, "physics"), number=iterations)
+        line = f"{path:<10} {iterations / current:12,.0f} ops/s"
+        if path != "json":
+            previous = timeit.timeit(lambda: parse_recompiling(reply, "physics"), number=iterations)
+            line += f"   previous parser {iterations / previous:12,.0f} ops/s"
+        print(line)
+
+
+async def daily_concepts(concepts: int) -> None:
+    user = UserConceptView(id=USER_ID)
+    with patch.object(daily_concept_service, "get_user_concept_view", AsyncMock(return_value=user)), \
+         patch.object(daily_concept_service, "find_unseen_concept", AsyncMock(return_value=None)), \
+         patch.object(daily_concept_service, "get_recent_seen_terms", AsyncMock(return_value=[])), \
+         patch.object(daily_concept_service, "find_seen_term_keys", AsyncMock(return_value=set())), \
+         patch.object(daily_concept_service, "add_concept_to_catalog", AsyncMock()), \
+         patch.object(daily_concept_service, "commit_daily_concept", AsyncMock(return_value=None)), \
+         patch.object(daily_concept_service, "claim_generation", AsyncMock(return_value=True)), \
+         patch.object(daily_concept_service, "get_daily_concept", AsyncMock(return_value=None)), \
+         patch.object(daily_concept_service, "release_generation", AsyncMock()), \
+         patch.object(daily_concept_service, "CATALOG_REFILL_BATCH_SIZE", 1):
+        for _ in range(concepts):
+            await daily_concept_service.get_daily_concept_service(USER_ID, "physics")
+
+
+def bench_regenerations(concepts: int, drift: float, json_drift: float):
+    for structured in (False, True):
+        llm_client._provider = DriftingProvider(drift, json_drift, latency=0, tokens_per_second=0)
+        for stats in (concept_module.parse_stats, daily_concept_service.duplicate_stats):
+            stats.update(dict.fromkeys(stats, 0))
+
+        with patch.object(concept_module, "STRUCTURED_OUTPUT", structured):
+            asyncio.run(daily_concepts(concepts))
+
+        calls = llm_client._provider._counter
+        print(
+            f"{'json' if structured else 'text':<5} concepts={concepts} llm_calls={calls} "
+            f"regenerations={daily_concept_service.duplicate_stats['unparsed']} "
+            f"exhausted={daily_concept_service.duplicate_stats['budget_exhausted']} "
+            f"parsed_by={concept_module.parse_stats}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--concepts", type=int, default=500)
+    parser.add_argument("--drift", type=float, default=0.1)
+    parser.add_argument("--json-drift", type=float, default=0.0)
+    args = parser.parse_args()
+
+    bench_parsers(args.iterations)
+    bench_regenerations(args.concepts, args.drift, args.json_drift)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Concurrent /daily-concept throughput against a local stub LLM server.
+
+Compares the old blocking `requests.post` call made from inside the async
+service ("before") with the pooled async LLM client ("after").
+
+Usage (from the server directory):
+    python -m benchmarks.bench_daily_concept_throughput --requests 200 --concurrency 50
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from unittest.mock import AsyncMock, patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stub_llm_server import start_stub_server
+
+server, base_url = start_stub_server(latency=float(os.getenv("STUB_LATENCY", "0.2")))
+os.environ["OPENROUTER_BASE_URL"] = base_url
+os.environ.setdefault("OPENROUTER_API_KEY", "benchmark-key")
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret-key-that-is-long-enough")
+
+import httpx
+import requests
+from app.main import app
+from app.ai.llm_client import close_llm_client
+from app.models.user_model import UserConceptView
+from app.security.auth_middleware import get_current_user
+
+USER_ID = "507f1f77bcf86cd799439011"
+
+
+async def blocking_generate_specific_concept(category: str, seen_terms: list[str]) -> dict:
+    """The pre-change code path: a blocking HTTP call inside a coroutine"""
+    response = requests.post(
+        f"{base_url}/chat/completions",
+        headers={"Authorization": "Bearer benchmark-key"},
+        json={"messages": [{"role": "user", "content": category}]},
+    )
+    content = response.json()["choices"][0]["message"]["content"]
+    term, explanation = content.removeprefix("Term: ").split("\n", 1)
+    return {"term": term, "explanation": explanation}
+
+
+async def run(total: int, concurrency: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one():
+            async with semaphore:
+                response = await client.get("/daily-concept", params={"category": "physics", "user_id": USER_ID})
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    user = UserConceptView(id=USER_ID)
+    app.dependency_overrides[get_current_user] = lambda: {"user_id": USER_ID}
+
+    # One concept per call, so both runs go through generate_specific_concept
+    with patch("app.services.daily_concept_service.CATALOG_REFILL_BATCH_SIZE", 1), \
+         patch("app.services.daily_concept_service.get_user_concept_view", new=AsyncMock(return_value=user)), \
+         patch("app.services.daily_concept_service.find_unseen_concept", new=AsyncMock(return_value=None)), \
+         patch("app.services.daily_concept_service.get_recent_seen_terms", new=AsyncMock(return_value=[])), \
+         patch("app.services.daily_concept_service.find_seen_term_keys", new=AsyncMock(return_value=set())), \
+         patch("app.services.daily_concept_service.add_concept_to_catalog", new=AsyncMock()), \
+         patch("app.services.daily_concept_service.add_concepts_to_catalog", new=AsyncMock()), \
+         patch("app.services.daily_concept_service.commit_daily_concept", new=AsyncMock(return_value=None)), \
+         patch("app.services.daily_concept_service.claim_generation", new=AsyncMock(return_value=True)), \
+         patch("app.services.daily_concept_service.get_daily_concept", new=AsyncMock(return_value=None)), \
+         patch("app.services.daily_concept_service.release_generation", new=AsyncMock()):
+
+        with patch("app.services.daily_concept_service.generate_specific_concept", new=blocking_generate_specific_concept):
+            before = asyncio.run(run(args.requests, args.concurrency))
+
+        async def after_run():
+            try:
+                return await run(args.requests, args.concurrency)
+            finally:
+                await close_llm_client()
+
+        after = asyncio.run(after_run())
+
+    print(f"requests={args.requests} concurrency={args.concurrency}")
+    print(f"before (blocking requests.post): {before:.2f}s  {args.requests / before:.1f} req/s")
+    print(f"after  (async pooled client):    {after:.2f}s  {args.requests / after:.1f} req/s")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
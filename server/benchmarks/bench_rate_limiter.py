@@ -0,0 +1,86 @@
+"""
+Memory and per-hit cost of the rate limiter under millions of unique IPs,
+compared with the previous defaultdict(list) limiter.
+
+Synthetic time advances by --seconds-per-million while hits are fed in,
+so idle-client sweeps run as they would in production.
+
+Usage (from the server directory):
+    python -m benchmarks.bench_rate_limiter --ips 2000000 --max-clients 100000
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.security.rate_limiter import SlidingWindowRateLimiter
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class LegacyLimiter:
+    """The previous limiter: a list of timestamps per IP, never deleted"""
+
+    def __init__(self, limit: int, window: float, clock):
+        self.limit = limit
+        self.window = window
+        self.clock = clock
+        self.storage = defaultdict(list)
+
+    def hit(self, key: str) -> tuple[bool, float]:
+        now = self.clock()
+        self.storage[key] = [t for t in self.storage[key] if now - t < self.window]
+        if len(self.storage[key]) >= self.limit:
+            return False, 0.0
+        self.storage[key].append(now)
+        return True, 0.0
+
+
+def run(label: str, make_limiter, ips: int, seconds_per_million: float, checkpoints: int):
+    clock = Clock()
+    limiter = make_limiter(clock)
+    step = seconds_per_million / 1_000_000
+    every = max(1, ips // checkpoints)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    for index in range(ips):
+        clock.now += step
+        limiter.hit(f"10.{index >> 16 & 255}.{index >> 8 & 255}.{index & 255}#{index >> 24}")
+        if (index + 1) % every == 0:
+            current, _ = tracemalloc.get_traced_memory()
+            print(f"{label:<7} {index + 1:>10,} ips   {current / 2 ** 20:8.1f} MiB")
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<7} peak {peak / 2 ** 20:.1f} MiB, {elapsed / ips * 1e6:.2f} us/hit (traced)\n")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ips", type=int, default=2_000_000)
+    parser.add_argument("--legacy-ips", type=int, default=500_000)
+    parser.add_argument("--max-clients", type=int, default=100_000)
+    parser.add_argument("--window", type=float, default=3600)
+    parser.add_argument("--seconds-per-million", type=float, default=7200)
+    parser.add_argument("--checkpoints", type=int, default=5)
+    args = parser.parse_args()
+
+    run("sliding", lambda clock: SlidingWindowRateLimiter(5, args.window, args.max_clients, clock),
+        args.ips, args.seconds_per_million, args.checkpoints)
+    run("legacy", lambda clock: LegacyLimiter(5, args.window, clock),
+        args.legacy_ips, args.seconds_per_million, args.checkpoints)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Input sanitizer throughput (ops/s) on realistic and adversarial inputs,
+compared with the previous multi-pass implementations, the cost of
+sanitizing a prompt's seen-term blacklist, and how HTML
+sanitizing time scales with worst-case input size.
+
+Usage (from the server directory):
+    python -m benchmarks.bench_sanitizers --iterations 20000
+"""
+import argparse
+import html
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.security.security import sanitize_ai_input_stats, sanitize_ai_inputs, sanitize_html_content, sanitize_string_input
+
+STRING_INPUTS = {
+    "realistic": ["physics", "Machine Learning", "history of art", "C++ & Rust", "quantum computing"],
+    "adversarial": [
+        "../../../etc/passwd", "%2e%2e%2f%2e%2e%2fetc%2fpasswd", "test{$where: 'this.password'}",
+        "....//....//etc//passwd", "C:\\Windows\\System32\\drivers", "." * 90,
+    ],
+}
+
+EXPLANATION = (
+    "Entropy is a measure of the number of microscopic configurations that correspond to a "
+    "thermodynamic system's macroscopic state. In an isolated system it never decreases, which "
+    "gives time its direction & explains why heat flows from hot to cold bodies. "
+) * 3
+
+HTML_INPUTS = {
+    "realistic": [EXPLANATION, "Term with <b>bold</b> & <i>italic</i> text " * 10],
+    "adversarial": [
+        "<script>" * 200, "<a href=x onclick=y " * 100, "<!--" * 400, "<img src=x onerror=alert(1)>" * 50,
+    ],
+}
+
+# Inputs whose cost grows fastest under the previous regex cascade
+WORST_CASES = {
+    "unclosed <script>": "<script>",
+    "unterminated <iframe": "<iframe ",
+}
+
+
+def legacy_sanitize_html_content(input_str: str, max_length: int = 2000) -> str:
+    sanitized = input_str.strip()
+    sanitized = re.sub(r'<script[^>]*>.*?</script>', '', sanitized, flags=re.IGNORECASE | re.DOTALL)
+    for tag in ['script', 'iframe', 'object', 'embed', 'form', 'meta', 'base', 'link', 'style', 'svg', 'audio', 'video']:
+        sanitized = re.sub(f'<{tag}[^>]*>', '', sanitized, flags=re.IGNORECASE)
+        sanitized = re.sub(f'</{tag}>', '', sanitized, flags=re.IGNORECASE)
+    for attr in ['onload', 'onerror', 'onclick', 'onmouseover', 'onmouseout', 'onfocus', 'onblur', 'onsubmit',
+                 'onreset', 'onchange', 'onkeydown', 'onkeyup', 'onkeypress', 'href', 'src']:
+        sanitized = re.sub(f'{attr}\\s*=\\s*["\'][^"\']*["\']', '', sanitized, flags=re.IGNORECASE)
+        sanitized = re.sub(f'{attr}\\s*=\\s*[^\\s>]*', '', sanitized, flags=re.IGNORECASE)
+    sanitized = re.sub(r'javascript:', '', sanitized, flags=re.IGNORECASE)
+    sanitized = html.escape(sanitized)
+    if len(sanitized) > max_length:
+        raise ValueError(f"Content too long (max {max_length} characters)")
+    return sanitized
+
+
+def legacy_sanitize_ai_input(text: str) -> str:
+    sanitized = text.strip()
+    for pattern in [
+        r'ignore.*previous.*instructions?', r'forget.*above', r'act.*as.*if', r'pretend.*to.*be',
+        r'system[:\s]', r'assistant[:\s]', r'user[:\s]', r'\[.*\]', r'```', r'---', r'<.*>', r'\n\n', r'\\n',
+    ]:
+        sanitized = re.sub(pattern, '', sanitized, flags=re.IGNORECASE)
+    sanitized = re.sub(r'[^a-zA-Z0-9\s\-_.,&()]', '', sanitized)
+    sanitized = sanitized[:100].strip()
+    if not sanitized:
+        raise ValueError("Input cannot be empty after sanitization")
+    return sanitized
+
+
+def legacy_sanitize_ai_inputs(texts: list[str]) -> list[str]:
+    sanitized = []
+    for text in texts:
+        try:
+            sanitized.append(legacy_sanitize_ai_input(text))
+        except ValueError:
+            continue
+    return sanitized
+
+
+def legacy_sanitize_string_input(input_str: str, max_length: int = 100) -> str:
+    sanitized = re.sub(r'[{}$]', '', input_str)
+    sanitized = re.sub(r'\.\.[\\/]', '', sanitized)
+    sanitized = re.sub(r'%2e%2e%2f', '', sanitized, flags=re.IGNORECASE)
+    sanitized = re.sub(r'%2e%2e%5c', '', sanitized, flags=re.IGNORECASE)
+    sanitized = re.sub(r'\.{4,}', '...', sanitized)
+    sanitized = re.sub(r'file://', '', sanitized, flags=re.IGNORECASE)
+    sanitized = re.sub(r'\\\\[^\\]+\\', '', sanitized)
+    for path in ['etc/passwd', 'system32', 'windows', 'config/sam', 'var/log', 'boot.ini', 'autoexec.bat']:
+        sanitized = re.sub(re.escape(path), '', sanitized, flags=re.IGNORECASE)
+    sanitized = sanitized.strip()
+    if len(sanitized) > max_length:
+        raise ValueError(f"Input too long (max {max_length} characters)")
+    if not sanitized:
+        raise ValueError("Input cannot be empty")
+    return sanitized
+
+
+def ops_per_second(sanitize, inputs: list[str], iterations: int) -> float:
+    def run():
+        for value in inputs:
+            try:
+                sanitize(value)
+            except ValueError:
+                pass
+
+    elapsed = timeit.timeit(run, number=iterations)
+    return iterations * len(inputs) / elapsed
+
+
+def compare(name: str, current, previous, inputs: dict[str, list[str]], iterations: int):
+    for label, values in inputs.items():
+        new = ops_per_second(current, values, iterations)
+        old = ops_per_second(previous, values, iterations)
+        print(f"{name:<22} {label:<12} {new:12,.0f} ops/s   previous {old:12,.0f} ops/s   x{new / old:5.2f}")
+
+
+def scaling(sizes: list[int]):
+    unbounded = 10 ** 9
+    for label, unit in WORST_CASES.items():
+        for size in sizes:
+            value = unit * (size // len(unit))
+            new = timeit.timeit(lambda: sanitize_html_content(value, max_length=unbounded), number=1)
+            old = timeit.timeit(lambda: legacy_sanitize_html_content(value, max_length=unbounded), number=1)
+            print(f"{label:<20} {size:>7} chars   {new * 1000:9.2f} ms   previous {old * 1000:9.2f} ms")
+
+
+def prompt_blacklists(iterations: int):
+    """Daily prompts re-sanitize the same recent history terms"""
+    terms = [f"Concept number {i} in thermodynamics" for i in range(20)]
+    new = timeit.timeit(lambda: sanitize_ai_inputs(terms), number=iterations)
+    old = timeit.timeit(lambda: legacy_sanitize_ai_inputs(terms), number=iterations)
+    print(
+        f"{'prompt blacklist':<22} {'20 terms':<12} {iterations / new:12,.0f} ops/s   previous {iterations / old:12,.0f} ops/s"
+        f"   x{old / new:5.2f}   memo hit rate {sanitize_ai_input_stats()['hit_rate']:.3f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2000, 8000, 32000])
+    args = parser.parse_args()
+
+    compare("sanitize_string_input", sanitize_string_input, legacy_sanitize_string_input, STRING_INPUTS, args.iterations)
+    compare("sanitize_html_content", lambda value: sanitize_html_content(value, max_length=10 ** 6),
+            lambda value: legacy_sanitize_html_content(value, max_length=10 ** 6), HTML_INPUTS, args.iterations // 10)
+    prompt_blacklists(args.iterations // 10)
+    scaling(args.sizes)
+
+
+if __name__ == "__main__":
+    main()
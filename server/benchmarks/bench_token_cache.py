@@ -0,0 +1,74 @@
+"""
+CPU per authenticated request with and without the verified-token cache.
+
+Measures the get_current_user dependency alone and a full in-process
+request through a minimal endpoint that depends on it, replaying the same
+token the way the dashboard does.
+
+Usage (from the server directory):
+    python -m benchmarks.bench_token_cache --requests 2000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret-key-that-is-long-enough")
+
+import httpx
+from fastapi import Depends, FastAPI
+from fastapi.security import HTTPAuthorizationCredentials
+from app.security.auth_middleware import get_current_user
+from app.security.auth_service import VerifiedTokenCache, create_access_token, token_cache
+
+app = FastAPI()
+
+
+@app.get("/me")
+def me(current_user: dict = Depends(get_current_user)):
+    return {"user_id": current_user["user_id"]}
+
+
+def dependency_cpu(token: str, requests: int) -> float:
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+    start = time.process_time()
+    for _ in range(requests):
+        get_current_user(credentials)
+    return (time.process_time() - start) / requests
+
+
+async def request_cpu(token: str, requests: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    headers = {"Authorization": f"Bearer {token}"}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        start = time.process_time()
+        for _ in range(requests):
+            response = await client.get("/me", headers=headers)
+            response.raise_for_status()
+        return (time.process_time() - start) / requests
+
+
+def measure(label: str, cache: VerifiedTokenCache, token: str, requests: int):
+    with patch("app.security.auth_service.token_cache", cache):
+        dependency = dependency_cpu(token, requests)
+        request = asyncio.run(request_cpu(token, requests))
+    print(f"{label:<9} dependency {dependency * 1e6:8.1f} us CPU   full request {request * 1e6:8.1f} us CPU")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    token = create_access_token("507f1f77bcf86cd799439011", "bench@example.com")
+    measure("uncached", VerifiedTokenCache(max_size=0), token, args.requests)
+    measure("cached", token_cache, token, args.requests)
+    print(f"cache stats: {token_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+The authenticated /daily-concept hot path with the user profile cache off
+and on: requests per second, CPU per request and users reads per request.
+
+Requests carry a real token and reach the real repository. The users and
+daily_concepts reads are simulated with --db-latency seconds of round trip,
+and the user document goes through a BSON round trip so decoding costs what
+it would. Every request finds today's concept already committed.
+
+Usage (from the server directory):
+    python -m benchmarks.bench_user_cache --requests 2000 --concurrency 20
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret-key-that-is-long-enough")
+
+import bson
+import httpx
+from bson import ObjectId
+from app.main import app
+from app.db.user_repository import UserProfileCache
+from app.security.auth_service import create_access_token
+
+USER_ID = "507f1f77bcf86cd799439011"
+CONCEPT = {"category": "physics", "term": "Entropy", "explanation": "A measure of disorder in a system. " * 8}
+
+
+class SimulatedUsers:
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.reads = 0
+        self.document = bson.encode({
+            "_id": ObjectId(USER_ID),
+            "username": "bench",
+            "email": "bench@example.com",
+            "interests": [f"category {index}" for index in range(10)],
+            "prepared": {"2025-01-02": {f"category {index}": CONCEPT for index in range(10)}},
+        })
+
+    async def find_one(self, query, projection=None):
+        self.reads += 1
+        await asyncio.sleep(self.latency)
+        return bson.decode(self.document)
+
+
+async def run(total: int, concurrency: int, token: str):
+    transport = httpx.ASGITransport(app=app)
+    headers = {"Authorization": f"Bearer {token}"}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one():
+            async with semaphore:
+                response = await client.get(
+                    "/daily-concept", params={"category": "physics", "user_id": USER_ID}, headers=headers
+                )
+                response.raise_for_status()
+
+        await asyncio.gather(*(one() for _ in range(total)))
+
+
+def measure(label: str, cache: UserProfileCache, args, token: str):
+    users = SimulatedUsers(args.db_latency)
+
+    async def daily_read(*_):
+        await asyncio.sleep(args.db_latency)
+        return CONCEPT
+
+    with patch("app.db.user_repository.user_cache", cache), \
+         patch("app.db.user_repository.db", {"users": users}), \
+         patch("app.db.user_repository.get_daily_concept", new=daily_read):
+        start, cpu = time.perf_counter(), time.process_time()
+        asyncio.run(run(args.requests, args.concurrency, token))
+        elapsed, cpu = time.perf_counter() - start, time.process_time() - cpu
+
+    print(
+        f"{label:<8} {args.requests / elapsed:8.1f} req/s   {cpu / args.requests * 1e6:8.1f} us CPU/request   "
+        f"{users.reads / args.requests:.3f} users reads/request"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--db-latency", type=float, default=0.001)
+    parser.add_argument("--ttl", type=float, default=30)
+    args = parser.parse_args()
+
+    token = create_access_token(USER_ID, "bench@example.com")
+    measure("uncached", UserProfileCache(max_entries=0), args, token)
+    cache = UserProfileCache(ttl=args.ttl)
+    measure("cached", cache, args, token)
+    print(f"cache stats: {cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Bytes transferred and decode time when serving a daily concept, for users
+with large histories: the full user document decoded into UserInDB (the
+previous get_user_by_id read) vs. the projected slice decoded into
+UserConceptView.
+
+Documents are encoded to BSON to measure what MongoDB would send over the
+wire; the projected document is built exactly as the server would return
+it for the projection get_user_concept_view asks for.
+
+Usage (from the server directory):
+    python -m benchmarks.bench_user_projection --categories 20 --terms 2000 --days 365
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bcrypt
+import bson
+from bson import ObjectId
+from app.db.concept_repository import normalize_term
+from app.models.user_model import UserConceptView, UserInDB
+
+EXPLANATION = "An explanation of a concept, written out over a couple of sentences of plain prose. " * 6
+
+
+def make_user(categories: int, terms: int, days: int) -> dict:
+    names = [f"category {index}" for index in range(categories)]
+    history = {name: [f"{name} term number {index}" for index in range(terms)] for name in names}
+    dates = [f"{2020 + index // 366}-{index % 12 + 1:02d}-{index % 28 + 1:02d}" for index in range(days)]
+    return {
+        "_id": ObjectId(),
+        "username": "bench",
+        "email": "bench@example.com",
+        "email_key": "bench@example.com",
+        "password": bcrypt.hashpw(b"password", bcrypt.gensalt(4)).decode(),
+        "interests": names,
+        "history": history,
+        "history_keys": {name: [normalize_term(term) for term in terms_] for name, terms_ in history.items()},
+        "daily": {date: {"category": names[0], "term": "Term", "explanation": EXPLANATION} for date in dates},
+        "prepared": {dates[-1]: {name: {"category": name, "term": "Term", "explanation": EXPLANATION} for name in names}},
+    }
+
+
+def project(user: dict, category: str, date: str) -> dict:
+    """What MongoDB returns for get_user_concept_view's projection"""
+    projected = {"_id": user["_id"]}
+    if date in user["daily"]:
+        projected["daily"] = {date: user["daily"][date]}
+    if category in user["prepared"].get(date, {}):
+        projected["prepared"] = {date: {category: user["prepared"][date][category]}}
+    return projected
+
+
+def decode_full(payload: bytes):
+    document = bson.decode(payload)
+    return UserInDB(id=str(document["_id"]), **document)
+
+
+def decode_projected(payload: bytes):
+    document = bson.decode(payload)
+    return UserConceptView(
+        id=str(document["_id"]),
+        daily=document.get("daily", {}),
+        prepared=document.get("prepared", {}),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--categories", type=int, default=20)
+    parser.add_argument("--terms", type=int, default=2000, help="history terms per category")
+    parser.add_argument("--days", type=int, default=365, help="entries in the daily map")
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    user = make_user(args.categories, args.terms, args.days)
+    category, date = "category 0", list(user["prepared"])[0]
+    full = bson.encode(user)
+    projected = bson.encode(project(user, category, date))
+
+    full_time = timeit.timeit(lambda: decode_full(full), number=args.iterations) / args.iterations
+    projected_time = timeit.timeit(lambda: decode_projected(projected), number=args.iterations) / args.iterations
+
+    print(f"{args.categories} categories x {args.terms} terms, {args.days} daily entries")
+    print(f"{'read':<10} {'bytes':>12} {'decode ms':>10}")
+    print(f"{'full':<10} {len(full):>12,} {full_time * 1000:>10.2f}")
+    print(f"{'projected':<10} {len(projected):>12,} {projected_time * 1000:>10.2f}")
+    print(f"bytes {len(full) / len(projected):.1f}x smaller, decode {full_time / projected_time:.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
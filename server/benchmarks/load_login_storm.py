@@ -0,0 +1,98 @@
+"""
+Latency of an unrelated endpoint during a login storm, with bcrypt run
+inline on the event loop ("before") vs. on the password worker pool.
+
+Logins hit POST /login with a real bcrypt hash; meanwhile a steady probe
+requests GET /get-concept for a cached category. Reports probe p50/p99
+and how many logins were shed with 503.
+
+Usage (from the server directory):
+    python -m benchmarks.load_login_storm --logins 64 --probes 200
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from unittest.mock import AsyncMock, patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret-key-that-is-long-enough")
+
+import bcrypt
+import httpx
+from app.main import app
+from app.ai.concept_cache import concept_cache
+from app.models.user_model import UserInDB
+from app.security import password_hashing
+
+PASSWORD = "benchmark-password"
+
+
+async def inline_verify_password(password: str, hashed_password: str) -> bool:
+    """The previous code path: bcrypt directly on the event loop"""
+    return bcrypt.checkpw(password.encode(), hashed_password.encode())
+
+
+async def storm(logins: int, probes: int, probe_interval: float) -> tuple[list[float], dict]:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        statuses: dict[int, int] = {}
+
+        async def login():
+            response = await client.post("/login", json={"email": "bench@example.com", "password": PASSWORD})
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        async def probe_loop() -> list[float]:
+            # Latency counts from each probe's scheduled start, so time the
+            # loop spends blocked before a probe is sent is not hidden
+            latencies = []
+            begin = time.perf_counter()
+            for index in range(probes):
+                scheduled = begin + index * probe_interval
+                await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+                response = await client.get("/get-concept", params={"category": "bench-probe"})
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - scheduled)
+            return latencies
+
+        probe_task = asyncio.create_task(probe_loop())
+        await asyncio.gather(*(login() for _ in range(logins)))
+        return await probe_task, statuses
+
+
+def report(label: str, latencies: list[float], statuses: dict):
+    ordered = sorted(latencies)
+    p99 = ordered[min(int(len(ordered) * 0.99), len(ordered) - 1)]
+    print(
+        f"{label:<7} probe p50={statistics.median(ordered) * 1000:8.1f} ms  p99={p99 * 1000:8.1f} ms  "
+        f"max={ordered[-1] * 1000:8.1f} ms  login statuses={statuses}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--probes", type=int, default=200)
+    parser.add_argument("--probe-interval", type=float, default=0.02)
+    parser.add_argument("--rounds", type=int, default=12, help="bcrypt cost factor")
+    args = parser.parse_args()
+
+    hashed = bcrypt.hashpw(PASSWORD.encode(), bcrypt.gensalt(args.rounds)).decode()
+    user = UserInDB(id="507f1f77bcf86cd799439011", username="bench", email="bench@example.com", password=hashed)
+    # A full pool serves the probe without any upstream call
+    for index in range(concept_cache.pool_size):
+        concept_cache.add("bench-probe", f"Cached explanation {index} served without any upstream call.")
+
+    with patch("app.services.user_service.get_user_by_email", new=AsyncMock(return_value=user)), \
+         patch("app.api.daily_concept.check_rate_limit", new=AsyncMock()):
+        with patch("app.services.user_service.verify_password", new=inline_verify_password):
+            report("inline", *asyncio.run(storm(args.logins, args.probes, args.probe_interval)))
+        report("pool", *asyncio.run(storm(args.logins, args.probes, args.probe_interval)))
+    print(f"pool stats: {password_hashing.password_pool.stats()}")
+
+
+if __name__ == "__main__":
+    main()
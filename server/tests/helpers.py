@@ -0,0 +1,8 @@
+class FakeClock:
+    """A clock for time-based code under test that only moves when `now` is set"""
+
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
@@ -3,7 +3,8 @@ from unittest.mock import patch, MagicMock
 from datetime import datetime, timedelta, timezone
 import jwt
 import os
-from app.security.auth_service import create_access_token, verify_token
+from app.security.auth_service import create_access_token, verify_token, token_cache, VerifiedTokenCache
+from tests.helpers import FakeClock
 
 
 class TestAuthService:
@@ -165,4 +166,81 @@ class TestAuthService:
             create_access_token(user_id, email)
         
         # Assert correct error message
-        assert str(exc_info.value) == "user_id and email are required"
\ No newline at end of file
+        assert str(exc_info.value) == "user_id and email are required"
+
+
+class TestVerifiedTokenCache:
+    """Unit tests for the verified token payload cache"""
+
+    def setup_method(self, method):
+        token_cache.clear()
+
+    def test_repeated_verification_skips_decode(self):
+        """Test that a verified token is served from the cache on the next request"""
+        token = create_access_token("cached_user", "cached@test.com")
+        assert verify_token(token)["user_id"] == "cached_user"
+
+        with patch('app.security.auth_service.jwt.decode') as mock_decode:
+            payload = verify_token(token)
+
+        mock_decode.assert_not_called()
+        assert payload["user_id"] == "cached_user"
+
+    def test_cached_payload_cannot_be_modified_by_callers(self):
+        """Test that each caller receives its own copy of the payload"""
+        token = create_access_token("copy_user", "copy@test.com")
+        verify_token(token)["user_id"] = "attacker"
+
+        assert verify_token(token)["user_id"] == "copy_user"
+
+    def test_tampered_signature_is_not_served_from_cache(self):
+        """Test that changing the signature forces full verification"""
+        token = create_access_token("sig_user", "sig@test.com")
+        verify_token(token)
+        header, body, signature = token.split(".")
+        tampered = f"{header}.{body}.{signature[:-2]}{'AA' if signature[-2:] != 'AA' else 'BB'}"
+
+        assert verify_token(tampered) is None
+
+    def test_rotated_secret_is_not_served_from_cache(self):
+        """Test that tokens cached under an old secret are re-verified"""
+        token = create_access_token("rotate_user", "rotate@test.com")
+        verify_token(token)
+
+        with patch('app.security.auth_service.SECRET_KEY', "a_completely_different_secret_key_value"):
+            assert verify_token(token) is None
+
+    def test_entries_expire_at_token_exp(self):
+        """Test that a cached payload is dropped once its exp has passed"""
+        clock = FakeClock(1000.0)
+        cache = VerifiedTokenCache(max_size=10, clock=clock)
+        cache.put(b"key", {"user_id": "u", "exp": 1060})
+
+        clock.now = 1059
+        assert cache.get(b"key") == {"user_id": "u", "exp": 1060}
+        clock.now = 1060
+        assert cache.get(b"key") is None
+        assert cache.stats()["expirations"] == 1
+
+    def test_cache_is_bounded(self):
+        """Test that the least recently used entry is evicted first"""
+        cache = VerifiedTokenCache(max_size=2, clock=FakeClock(1000.0))
+        for key in (b"a", b"b"):
+            cache.put(key, {"exp": 2000})
+        cache.get(b"a")
+        cache.put(b"c", {"exp": 2000})
+
+        assert cache.get(b"b") is None
+        assert cache.get(b"a") is not None
+        assert cache.stats()["evictions"] == 1
+
+    def test_concurrent_access_is_safe(self):
+        """Test that many threads can verify the same tokens at once"""
+        from concurrent.futures import ThreadPoolExecutor
+        tokens = [create_access_token(f"thread_user_{i}", f"t{i}@test.com") for i in range(20)]
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(verify_token, tokens * 50))
+
+        assert [payload["user_id"] for payload in results] == [f"thread_user_{i}" for i in range(20)] * 50
+        assert token_cache.stats()["size"] == 20
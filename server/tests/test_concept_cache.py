@@ -0,0 +1,86 @@
+import pytest
+from unittest.mock import AsyncMock, patch
+from app.ai.concept_cache import ConceptCache
+from app.ai.single_flight import SingleFlight
+from app.api.daily_concept import get_concept
+from tests.helpers import FakeClock
+
+
+async def serve(cache: ConceptCache, generate: AsyncMock, category: str, times: int) -> list[str]:
+    """Explanations /get-concept returns for `times` sequential requests"""
+    patches = [
+        patch('app.api.daily_concept.concept_cache', cache),
+        patch('app.api.daily_concept.concept_flight', SingleFlight()),
+        patch('app.api.daily_concept.generate_concept', generate),
+        patch('app.api.daily_concept.check_rate_limit', new_callable=AsyncMock),
+    ]
+    for p in patches:
+        p.start()
+    try:
+        return [(await get_concept(category))["concept"] for _ in range(times)]
+    finally:
+        for p in reversed(patches):
+            p.stop()
+
+
+class TestConceptCache:
+    """Unit tests for the per-category concept cache"""
+
+    @pytest.mark.asyncio
+    async def test_pool_fills_then_rotates(self):
+        """Test that the first K requests generate and later requests rotate the pool"""
+        generate = AsyncMock(side_effect=["one", "two", "three"])
+        cache = ConceptCache(max_categories=4, ttl=60, pool_size=2)
+
+        results = await serve(cache, generate, "Physics", 5)
+
+        assert results == ["one", "two", "one", "two", "one"]
+        assert generate.await_count == 2
+        assert cache.stats()["hits"] == 3
+        assert cache.stats()["misses"] == 2
+
+    def test_key_is_case_insensitive(self):
+        """Test that categories differing only by case share one pool"""
+        cache = ConceptCache(pool_size=1)
+
+        cache.add("Physics", "explanation")
+
+        assert cache.lookup(" physics ") == "explanation"
+
+    @pytest.mark.asyncio
+    async def test_pool_fills_when_upstream_repeats_itself(self):
+        """Test that an explanation returned twice still counts towards a full pool"""
+        generate = AsyncMock(return_value="same")
+        cache = ConceptCache(pool_size=2)
+
+        await serve(cache, generate, "Physics", 4)
+
+        assert generate.await_count == 2
+        assert cache.stats()["hits"] == 2
+
+    def test_entries_expire_after_ttl(self):
+        """Test that a pool older than the TTL is missed and replaced by the next add"""
+        clock = FakeClock()
+        cache = ConceptCache(ttl=10, pool_size=1, clock=clock)
+
+        cache.add("math", "old")
+        assert cache.lookup("math") == "old"
+        clock.now = 11
+        assert cache.lookup("math") is None
+        cache.add("math", "new")
+        assert cache.lookup("math") == "new"
+        assert cache.stats()["expirations"] == 1
+
+    def test_least_recently_used_category_is_evicted(self):
+        """Test that the cache never tracks more than max_categories pools"""
+        cache = ConceptCache(max_categories=2, pool_size=1)
+
+        cache.add("a", "explanation")
+        cache.add("b", "explanation")
+        cache.lookup("a")  # "b" is now least recently used
+        cache.add("c", "explanation")
+
+        assert cache.stats()["size"] == 2
+        assert cache.stats()["evictions"] == 1
+        assert cache.lookup("a") == "explanation"
+        assert cache.lookup("b") is None
@@ -0,0 +1,103 @@
+import pytest
+from bson import ObjectId
+from unittest.mock import AsyncMock, MagicMock, patch
+from app.db.concept_repository import normalize_term, find_unseen_concept, add_concept_to_catalog
+from app.models.user_model import UserConceptView
+from app.services.daily_concept_service import get_daily_concept_service
+
+
+class TestConceptCatalog:
+    """Unit tests for the shared per-category concept catalog"""
+
+    def test_normalize_term_ignores_case_punctuation_and_escaping(self):
+        """Test that spelling variants of a term share one key"""
+        assert normalize_term("Quantum  Entanglement!") == "quantum entanglement"
+        assert normalize_term("R&amp;D") == normalize_term("r&d") == "r d"
+        assert normalize_term("Schrödinger's Cat") == "schrödinger s cat"
+
+    @pytest.mark.asyncio
+    async def test_find_unseen_concept_anti_joins_the_users_history(self):
+        """Test that the server matches catalog terms against the user's daily_concepts, sending no history"""
+        user_id = ObjectId("507f1f77bcf86cd799439011")
+        with patch('app.db.concept_repository.db') as mock_db:
+            mock_aggregate = MagicMock(return_value=MagicMock(
+                to_list=AsyncMock(return_value=[{"term": "Entropy", "explanation": "Disorder."}])
+            ))
+            mock_db.__getitem__.return_value.aggregate = mock_aggregate
+
+            result = await find_unseen_concept("Physics", user_id)
+
+        pipeline = mock_aggregate.call_args[0][0]
+        assert pipeline[0] == {"$match": {"category_key": "physics"}}
+        lookup = pipeline[2]["$lookup"]
+        assert lookup["from"] == "daily_concepts"
+        assert (lookup["localField"], lookup["foreignField"]) == ("term_key", "term_key")
+        assert lookup["pipeline"][0] == {"$match": {"user_id": user_id, "category_key": "physics"}}
+        assert pipeline[3] == {"$match": {"seen": {"$size": 0}}}
+        assert result == {"term": "Entropy", "explanation": "Disorder."}
+
+    @pytest.mark.asyncio
+    async def test_find_unseen_concept_reports_an_exhausted_catalog(self):
+        """Test that None is returned when every catalog term has been seen"""
+        with patch('app.db.concept_repository.db') as mock_db:
+            mock_db.__getitem__.return_value.aggregate = MagicMock(return_value=MagicMock(to_list=AsyncMock(return_value=[])))
+
+            assert await find_unseen_concept("physics", ObjectId("507f1f77bcf86cd799439011")) is None
+
+    @pytest.mark.asyncio
+    async def test_add_concept_to_catalog_only_inserts_new_terms(self):
+        """Test that catalog writes never overwrite an existing explanation"""
+        with patch('app.db.concept_repository.db') as mock_db:
+            mock_bulk = AsyncMock()
+            mock_db.__getitem__.return_value.bulk_write = mock_bulk
+
+            await add_concept_to_catalog("physics", "Entropy", "Disorder.")
+
+        (operation,) = mock_bulk.call_args[0][0]
+        assert operation._filter == {"category_key": "physics", "term_key": "entropy"}
+        assert set(operation._doc) == {"$setOnInsert"}
+        assert operation._upsert is True
+
+    @pytest.mark.asyncio
+    async def test_daily_concept_service_prefers_catalog_over_llm(self):
+        """Test that an unseen catalog entry is served without an LLM call"""
+        user = UserConceptView(id="507f1f77bcf86cd799439011")
+
+        with patch('app.services.daily_concept_service.get_user_concept_view', new_callable=AsyncMock, return_value=user), \
+             patch('app.services.daily_concept_service.find_unseen_concept', new_callable=AsyncMock,
+                   return_value={"term": "Entropy", "explanation": "Disorder."}) as mock_catalog, \
+             patch('app.services.daily_concept_service.generate_specific_concept', new_callable=AsyncMock) as mock_generate, \
+             patch('app.services.daily_concept_service.get_recent_seen_terms', new_callable=AsyncMock) as mock_seen, \
+             patch('app.services.daily_concept_service.commit_daily_concept', new_callable=AsyncMock, return_value=None):
+
+            result = await get_daily_concept_service(user.id, "physics")
+
+        mock_catalog.assert_awaited_once_with("physics", ObjectId(user.id))
+        mock_generate.assert_not_awaited()
+        # Serving from the catalog never loads the user's history
+        mock_seen.assert_not_awaited()
+        assert result["term"] == "Entropy"
+
+    @pytest.mark.asyncio
+    async def test_exhausted_catalog_is_refilled_with_one_batch_call(self):
+        """Test that a catalog miss generates a batch, serves one and stores all"""
+        user = UserConceptView(id="507f1f77bcf86cd799439011")
+        batch = [{"term": "Entropy", "explanation": "Disorder."}, {"term": "Inertia", "explanation": "Resistance."}]
+
+        with patch('app.services.daily_concept_service.get_user_concept_view', new_callable=AsyncMock, return_value=user), \
+             patch('app.services.daily_concept_service.find_unseen_concept', new_callable=AsyncMock, return_value=None), \
+             patch('app.services.daily_concept_service.generate_specific_concepts', new_callable=AsyncMock, return_value=batch) as mock_batch, \
+             patch('app.services.daily_concept_service.add_concepts_to_catalog', new_callable=AsyncMock) as mock_refill, \
+             patch('app.services.daily_concept_service.commit_daily_concept', new_callable=AsyncMock, return_value=None), \
+             patch('app.services.daily_concept_service.claim_generation', new_callable=AsyncMock, return_value=True), \
+             patch('app.services.daily_concept_service.release_generation', new_callable=AsyncMock), \
+             patch('app.services.daily_concept_service.get_daily_concept', new_callable=AsyncMock, return_value=None), \
+             patch('app.services.daily_concept_service.get_recent_seen_terms', new_callable=AsyncMock, return_value=[]), \
+             patch('app.services.daily_concept_service.find_seen_term_keys', new_callable=AsyncMock, return_value=set()), \
+             patch('app.services.daily_concept_service.CATALOG_REFILL_BATCH_SIZE', 2):
+
+            result = await get_daily_concept_service(user.id, "physics")
+
+        mock_batch.assert_awaited_once_with("physics", [], 2)
+        mock_refill.assert_awaited_once_with("physics", batch)
+        assert result["term"] == "Entropy"
@@ -0,0 +1,134 @@
+import json
+from fastapi.testclient import TestClient
+from unittest.mock import AsyncMock, patch
+from app.main import app
+from app.ai.generate_specific_concept import TermStreamParser
+from app.models.user_model import UserConceptView
+from app.security.auth_middleware import get_current_user
+from app.services.daily_concept_service import duplicate_stats
+
+
+def parse_events(body: str) -> list[tuple[str, dict]]:
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+async def fake_stream(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+class TestTermStreamParser:
+    """Unit tests for incremental parsing of the Term: line"""
+
+    def test_term_is_reported_once_its_line_is_complete(self):
+        """Test that the term is emitted as soon as the newline arrives"""
+        parser = TermStreamParser()
+
+        assert parser.feed("Te") == (None, "")
+        assert parser.feed("rm: Entro") == (None, "")
+        assert parser.feed("py\n\nA mea") == ("Entropy", "A mea")
+        assert parser.feed("sure.") == (None, "sure.")
+        assert parser.finish() == ""
+
+    def test_output_without_term_line_is_relayed(self):
+        """Test that free-form output is passed through unchanged"""
+        parser = TermStreamParser()
+
+        assert parser.feed("The quick") == (None, "The quick")
+        assert parser.feed(" fox") == (None, " fox")
+        assert parser.term is None
+
+    def test_unterminated_term_line_is_flushed_on_finish(self):
+        """Test that a stream ending inside the term line still returns its text"""
+        parser = TermStreamParser()
+
+        assert parser.feed("Term: Entropy") == (None, "")
+        assert parser.finish() == "Term: Entropy"
+
+
+class TestConceptStreamingAPI:
+    """Integration tests for the SSE concept endpoints"""
+
+    def setup_method(self, method):
+        self.client = TestClient(app)
+        self.user_id = "507f1f77bcf86cd799439011"
+        app.dependency_overrides[get_current_user] = lambda: {"user_id": self.user_id}
+
+    def teardown_method(self, method):
+        app.dependency_overrides.clear()
+
+    def test_daily_concept_stream_relays_tokens_and_persists_result(self):
+        """Test that the term is sent early and the final result is saved"""
+        user = UserConceptView(id=self.user_id)
+
+        with patch('app.services.daily_concept_service.get_user_concept_view', new_callable=AsyncMock, return_value=user), \
+             patch('app.services.daily_concept_service.find_unseen_concept', new_callable=AsyncMock, return_value=None), \
+             patch('app.services.daily_concept_service.get_recent_seen_terms', new_callable=AsyncMock, return_value=[]), \
+             patch('app.services.daily_concept_service.has_seen_term', new_callable=AsyncMock, return_value=False), \
+             patch('app.services.daily_concept_service.add_concept_to_catalog', new_callable=AsyncMock) as mock_catalog, \
+             patch('app.ai.generate_specific_concept.stream_chat_completion', return_value=fake_stream("Term: Ent", "ropy\nA measure ", "of disorder.")), \
+             patch('app.services.daily_concept_service.claim_generation', new_callable=AsyncMock, return_value=True), \
+             patch('app.services.daily_concept_service.get_daily_concept', new_callable=AsyncMock, return_value=None), \
+             patch('app.services.daily_concept_service.release_generation', new_callable=AsyncMock) as mock_release, \
+             patch('app.services.daily_concept_service.commit_daily_concept', new_callable=AsyncMock, return_value=None) as mock_save:
+
+            response = self.client.get("/daily-concept/stream", params={"category": "physics", "user_id": self.user_id})
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+
+        events = parse_events(response.text)
+        assert events[0] == ("term", {"term": "Entropy"})
+        assert "".join(data["text"] for event, data in events if event == "token") == "A measure of disorder."
+        assert events[-1] == ("done", {"category": "physics", "term": "Entropy", "explanation": "A measure of disorder."})
+
+        mock_save.assert_awaited_once_with(self.user_id, "physics", "Entropy", "A measure of disorder.")
+        mock_catalog.assert_awaited_once_with("physics", "Entropy", "A measure of disorder.")
+        # The generation claim is given up once the stream is done
+        mock_release.assert_awaited_once()
+
+    def test_daily_concept_stream_without_term_line_is_not_cataloged(self):
+        """Test that a reply parsed back to the category is served but never shared"""
+        user = UserConceptView(id=self.user_id)
+        unparsed = duplicate_stats["unparsed"]
+
+        with patch('app.services.daily_concept_service.get_user_concept_view', new_callable=AsyncMock, return_value=user), \
+             patch('app.services.daily_concept_service.find_unseen_concept', new_callable=AsyncMock, return_value=None), \
+             patch('app.services.daily_concept_service.get_recent_seen_terms', new_callable=AsyncMock, return_value=[]), \
+             patch('app.services.daily_concept_service.has_seen_term', new_callable=AsyncMock, return_value=False), \
+             patch('app.services.daily_concept_service.add_concept_to_catalog', new_callable=AsyncMock) as mock_catalog, \
+             patch('app.ai.generate_specific_concept.stream_chat_completion', return_value=fake_stream("A measure ", "of disorder.")), \
+             patch('app.services.daily_concept_service.claim_generation', new_callable=AsyncMock, return_value=True), \
+             patch('app.services.daily_concept_service.get_daily_concept', new_callable=AsyncMock, return_value=None), \
+             patch('app.services.daily_concept_service.release_generation', new_callable=AsyncMock), \
+             patch('app.services.daily_concept_service.commit_daily_concept', new_callable=AsyncMock, return_value=None):
+
+            response = self.client.get("/daily-concept/stream", params={"category": "physics", "user_id": self.user_id})
+
+        events = parse_events(response.text)
+        assert events[-1][0] == "done"
+        assert events[-1][1]["term"] == "physics"
+        mock_catalog.assert_not_awaited()
+        assert duplicate_stats["unparsed"] == unparsed + 1
+
+    def test_daily_concept_stream_for_other_user_is_denied(self):
+        """Test that the streaming endpoint enforces ownership like /daily-concept"""
+        response = self.client.get("/daily-concept/stream", params={"category": "physics", "user_id": "507f1f77bcf86cd799439012"})
+
+        assert response.status_code == 403
+
+    def test_get_concept_stream_reports_upstream_failure_as_error_event(self):
+        """Test that an upstream failure ends the stream with an error event"""
+        async def failing_stream(*args, **kwargs):
+            raise RuntimeError("upstream down")
+            yield
+
+        with patch('app.ai.ai.stream_chat_completion', side_effect=failing_stream), \
+             patch('app.api.daily_concept.check_rate_limit', new_callable=AsyncMock):
+            response = self.client.get("/get-concept/stream", params={"category": "unstreamed-category"})
+
+        assert parse_events(response.text) == [("error", {"detail": "Failed to generate concept"})]
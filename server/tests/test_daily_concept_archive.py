@@ -0,0 +1,181 @@
+import pytest
+from bson import ObjectId
+from fastapi.testclient import TestClient
+from unittest.mock import AsyncMock, MagicMock, patch
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from app.db.daily_concept_repository import commit_daily_concept, decode_history_cursor, encode_history_cursor, list_daily_concepts
+from app.models.user_model import UserConceptView
+from app.services import daily_concept_service
+from app.jobs.migrate_daily_concepts import daily_concept_operations
+from app.main import app
+from app.security.auth_middleware import get_current_user
+
+USER_ID = "507f1f77bcf86cd799439011"
+
+
+def archive_collection(entries):
+    """daily_concepts whose find() returns `entries` and records the query"""
+    cursor = MagicMock()
+    cursor.sort.return_value = cursor
+    cursor.limit.return_value = cursor
+    cursor.to_list = AsyncMock(side_effect=lambda length: [dict(entry) for entry in entries[:length]])
+    collection = MagicMock()
+    collection.find.return_value = cursor
+    return collection
+
+
+def entry(date, category_key):
+    return {"date": date, "category": category_key, "category_key": category_key, "term": "t", "explanation": "e"}
+
+
+class TestListDailyConcepts:
+    """Keyset pagination over the daily_concepts archive"""
+
+    @pytest.mark.asyncio
+    async def test_first_page_and_next_cursor(self):
+        """Test that a full page returns a cursor at its last entry"""
+        entries = [entry("2025-01-03", "physics"), entry("2025-01-02", "math"), entry("2025-01-01", "art")]
+        collection = archive_collection(entries)
+        with patch('app.db.daily_concept_repository.db', {"daily_concepts": collection}):
+            page, next_cursor = await list_daily_concepts(USER_ID, limit=2)
+
+        query = collection.find.call_args[0][0]
+        assert query == {"user_id": ObjectId(USER_ID), "date": {"$exists": True}}
+        assert [concept["date"] for concept in page] == ["2025-01-03", "2025-01-02"]
+        assert "category_key" not in page[0]
+        assert decode_history_cursor(next_cursor) == ("2025-01-02", "math")
+
+    @pytest.mark.asyncio
+    async def test_cursor_continues_after_last_entry(self):
+        """Test that the cursor becomes a range on (date, category_key)"""
+        collection = archive_collection([entry("2025-01-01", "art")])
+        with patch('app.db.daily_concept_repository.db', {"daily_concepts": collection}):
+            page, next_cursor = await list_daily_concepts(USER_ID, limit=2, cursor=encode_history_cursor("2025-01-02", "math"))
+
+        query = collection.find.call_args[0][0]
+        assert query["date"] == {"$lte": "2025-01-02"}
+        assert query["$or"] == [{"date": {"$lt": "2025-01-02"}}, {"category_key": {"$lt": "math"}}]
+        assert len(page) == 1
+        assert next_cursor is None
+
+    @pytest.mark.asyncio
+    async def test_invalid_cursor_is_rejected(self):
+        """Test that a tampered cursor raises ValueError"""
+        with pytest.raises(ValueError, match="Invalid cursor"):
+            await list_daily_concepts(USER_ID, limit=2, cursor="not-a-cursor")
+
+
+class TestCommitDailyConcept:
+    """One write commits the day's concept and history entry"""
+
+    @pytest.mark.asyncio
+    async def test_first_commit_fills_the_slot(self):
+        """Test that an insert-only upsert returns None when this call filled the slot"""
+        collection = MagicMock()
+        collection.find_one_and_update = AsyncMock(return_value=None)
+        with patch('app.db.daily_concept_repository.db', {"daily_concepts": collection}):
+            existing = await commit_daily_concept(USER_ID, "Physics", "Entropy", "Disorder.", date="2025-01-02")
+
+        assert existing is None
+        (slot, update), kwargs = collection.find_one_and_update.call_args
+        assert slot == {"user_id": ObjectId(USER_ID), "date": "2025-01-02", "category_key": "physics"}
+        assert set(update) == {"$setOnInsert"}
+        assert update["$setOnInsert"]["term_key"] == "entropy"
+        assert kwargs["upsert"] is True
+        assert kwargs["return_document"] == ReturnDocument.BEFORE
+
+    @pytest.mark.asyncio
+    async def test_filled_slot_returns_the_existing_concept(self):
+        """Test that a second commit reports the concept already there, including after a racing insert"""
+        winner = {"category": "physics", "term": "Gravity", "explanation": "Attraction."}
+        collection = MagicMock()
+        collection.find_one_and_update = AsyncMock(side_effect=[winner, DuplicateKeyError("E11000")])
+        collection.find_one = AsyncMock(return_value=winner)
+        with patch('app.db.daily_concept_repository.db', {"daily_concepts": collection}):
+            assert await commit_daily_concept(USER_ID, "physics", "Entropy", "Disorder.") == winner
+            assert await commit_daily_concept(USER_ID, "physics", "Entropy", "Disorder.") == winner
+
+    @pytest.mark.asyncio
+    async def test_service_serves_the_concept_committed_first(self):
+        """Test that a request losing the slot returns the winner's concept, not its own"""
+        winner = {"category": "physics", "term": "Gravity", "explanation": "Attraction."}
+        user = UserConceptView(id=USER_ID)
+        filled = daily_concept_service.commit_stats["slot_already_filled"]
+
+        with patch('app.services.daily_concept_service.get_user_concept_view', new_callable=AsyncMock, return_value=user), \
+             patch('app.services.daily_concept_service.find_unseen_concept', new_callable=AsyncMock,
+                   return_value={"term": "Entropy", "explanation": "Disorder."}), \
+             patch('app.services.daily_concept_service.commit_daily_concept', new_callable=AsyncMock, return_value=winner) as mock_commit:
+
+            result = await daily_concept_service.get_daily_concept_service(USER_ID, "physics")
+
+        mock_commit.assert_awaited_once()
+        assert result == winner
+        assert daily_concept_service.commit_stats["slot_already_filled"] == filled + 1
+
+
+class TestHistoryEndpoint:
+    """GET /daily-concept/history"""
+
+    def setup_method(self, method):
+        self.client = TestClient(app)
+        app.dependency_overrides[get_current_user] = lambda: {"user_id": USER_ID}
+
+    def teardown_method(self, method):
+        app.dependency_overrides.clear()
+
+    def test_returns_page_and_cursor(self):
+        """Test that the endpoint relays the repository page"""
+        page = [{"date": "2025-01-02", "category": "physics", "term": "Entropy", "explanation": "Disorder."}]
+        with patch('app.api.daily_concept.list_daily_concepts', new_callable=AsyncMock, return_value=(page, "next")) as mock_list:
+            response = self.client.get("/daily-concept/history", params={"user_id": USER_ID, "limit": 1})
+
+        assert response.status_code == 200
+        assert response.json() == {"concepts": page, "next_cursor": "next"}
+        mock_list.assert_awaited_once_with(USER_ID, 1, None)
+
+    def test_other_users_history_is_denied(self):
+        """Test that users can only browse their own history"""
+        response = self.client.get("/daily-concept/history", params={"user_id": "507f1f77bcf86cd799439012"})
+        assert response.status_code == 403
+
+    def test_invalid_cursor_is_a_bad_request(self):
+        """Test that a bad cursor becomes a 400"""
+        response = self.client.get("/daily-concept/history", params={"user_id": USER_ID, "cursor": "garbage"})
+        assert response.status_code == 400
+
+
+class TestMigration:
+    """Moving the embedded history and daily maps into daily_concepts"""
+
+    def test_history_and_daily_become_entries(self):
+        """Test that served terms keep their day and the rest are stored without one"""
+        user = {
+            "_id": ObjectId(USER_ID),
+            "history": {"physics": ["Gravity", "Entropy"], "node": {"js": ["Event loop"]}},
+            "daily": {"2025-01-02": {"category": "physics", "term": "Entropy", "explanation": "Disorder."}},
+        }
+
+        operations = daily_concept_operations(user)
+
+        filters = [operation._filter for operation in operations]
+        assert filters == [
+            {"user_id": user["_id"], "date": {"$exists": False}, "category_key": "physics", "term_key": "gravity"},
+            {"user_id": user["_id"], "date": "2025-01-02", "category_key": "physics"},
+            {"user_id": user["_id"], "date": {"$exists": False}, "category_key": "node.js", "term_key": "event loop"},
+        ]
+        assert operations[1]._doc["$setOnInsert"]["explanation"] == "Disorder."
+        assert all(operation._upsert for operation in operations)
+
+    def test_daily_entry_missing_from_history_is_kept(self):
+        """Test that a daily entry whose term never reached history is still migrated"""
+        user = {
+            "_id": ObjectId(USER_ID),
+            "daily": {"2025-01-02": {"category": "math", "term": "Prime", "explanation": "Divisible by 1 and itself."}},
+        }
+
+        (operation,) = daily_concept_operations(user)
+
+        assert operation._filter == {"user_id": user["_id"], "date": "2025-01-02", "category_key": "math"}
+        assert operation._doc["$setOnInsert"]["term_key"] == "prime"
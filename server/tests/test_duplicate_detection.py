@@ -0,0 +1,167 @@
+import pytest
+from bson import ObjectId
+from unittest.mock import AsyncMock, patch
+from app.ai.generate_specific_concept import build_specific_concept_messages
+from app.db.concept_repository import normalize_term
+from app.db.daily_concept_repository import commit_daily_concept, get_recent_seen_terms
+from app.models.user_model import UserConceptView
+from app.services import daily_concept_service
+from app.services.daily_concept_service import get_daily_concept_service
+
+
+def make_user(**kwargs):
+    return UserConceptView(id="507f1f77bcf86cd799439011", **kwargs)
+
+
+def service_patches(user, generate, seen):
+    seen_keys = {normalize_term(term) for term in seen}
+    return [
+        patch('app.services.daily_concept_service.get_user_concept_view', new_callable=AsyncMock, return_value=user),
+        patch('app.services.daily_concept_service.find_unseen_concept', new_callable=AsyncMock, return_value=None),
+        patch('app.services.daily_concept_service.generate_specific_concept', generate),
+        patch('app.services.daily_concept_service.add_concept_to_catalog', new_callable=AsyncMock),
+        patch('app.services.daily_concept_service.commit_daily_concept', new_callable=AsyncMock, return_value=None),
+        patch('app.services.daily_concept_service.claim_generation', new_callable=AsyncMock, return_value=True),
+        patch('app.services.daily_concept_service.release_generation', new_callable=AsyncMock),
+        patch('app.services.daily_concept_service.get_daily_concept', new_callable=AsyncMock, return_value=None),
+        patch('app.services.daily_concept_service.CATALOG_REFILL_BATCH_SIZE', 1),
+        patch('app.services.daily_concept_service.get_recent_seen_terms', new_callable=AsyncMock, return_value=list(seen)),
+        patch('app.services.daily_concept_service.find_seen_term_keys', new_callable=AsyncMock,
+              side_effect=lambda user_id, category, term_keys: seen_keys.intersection(term_keys)),
+        patch('app.services.daily_concept_service.has_seen_term', new_callable=AsyncMock,
+              side_effect=lambda user_id, category, term: normalize_term(term) in seen_keys),
+    ]
+
+
+async def run_service(user, generate, seen=()):
+    patches = service_patches(user, generate, seen)
+    mocks = [p.start() for p in patches]
+    try:
+        result = await get_daily_concept_service(user.id, "physics")
+    finally:
+        for p in reversed(patches):
+            p.stop()
+    return result, mocks
+
+
+class TestDuplicateDetection:
+    """Unit tests for rejecting terms already in a user's history"""
+
+    @pytest.mark.asyncio
+    async def test_saved_concept_stores_normalized_key(self):
+        """Test that every saved concept also records the normalized term key"""
+        with patch('app.db.daily_concept_repository.db') as mock_db:
+            mock_update = AsyncMock(return_value=None)
+            mock_db.__getitem__.return_value.find_one_and_update = mock_update
+
+            await commit_daily_concept("507f1f77bcf86cd799439011", "physics", "Quantum Entanglement!", "Spooky.")
+
+        fields = mock_update.call_args[0][1]["$setOnInsert"]
+        assert fields["term_key"] == "quantum entanglement"
+
+    def test_prompt_blacklist_names_most_recent_terms(self):
+        """Test that a long history contributes its newest terms to the prompt"""
+        seen_terms = [f"Term {i}" for i in range(100)]
+
+        messages, _ = build_specific_concept_messages("physics", seen_terms)
+
+        prompt = messages[1]["content"]
+        assert "Term 99, Term 98" in prompt
+        assert "Term 79" not in prompt
+
+    @pytest.mark.asyncio
+    async def test_repeated_term_is_regenerated(self):
+        """Test that a spelling variant of a seen term triggers one regeneration"""
+        user = make_user()
+        generate = AsyncMock(side_effect=[
+            {"term": "GRAVITY!", "explanation": "Attraction."},
+            {"term": "Entropy", "explanation": "Disorder."},
+        ])
+
+        result, _ = await run_service(user, generate, seen=["Gravity"])
+
+        assert result["term"] == "Entropy"
+        assert generate.await_count == 2
+        # The rejected term is the newest entry of the second prompt's blacklist
+        assert generate.await_args_list[1][0][1] == ["Gravity", "GRAVITY!"]
+
+    @pytest.mark.asyncio
+    async def test_regeneration_budget_is_bounded(self):
+        """Test that persistent repeats stop after the configured budget"""
+        user = make_user()
+        generate = AsyncMock(return_value={"term": "gravity", "explanation": "Attraction."})
+
+        with patch('app.services.daily_concept_service.DUPLICATE_REGENERATION_BUDGET', 2):
+            exhausted = daily_concept_service.duplicate_stats["budget_exhausted"]
+            result, _ = await run_service(user, generate, seen=["Gravity"])
+
+        assert generate.await_count == 3
+        assert result["term"] == "gravity"
+        assert daily_concept_service.duplicate_stats["budget_exhausted"] == exhausted + 1
+
+    @pytest.mark.asyncio
+    async def test_prepared_concept_that_repeats_history_is_skipped(self):
+        """Test that a pre-generated repeat falls through to the catalog"""
+        from datetime import datetime, timezone
+        today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+        user = make_user(
+            prepared={today: {"physics": {"category": "physics", "term": "Gravity", "explanation": "Again."}}},
+        )
+        generate = AsyncMock(return_value={"term": "Entropy", "explanation": "Disorder."})
+
+        result, mocks = await run_service(user, generate, seen=["Gravity"])
+
+        mock_has_seen = mocks[-1]
+        assert result["term"] == "Entropy"
+        # Checked with a point query on the term, not against a loaded history
+        mock_has_seen.assert_awaited_once_with(ObjectId(user.id), "physics", "Gravity")
+
+    @pytest.mark.asyncio
+    async def test_unparsed_reply_is_regenerated_and_not_catalogued(self):
+        """Test that a reply parsed back to the category is retried instead of saved"""
+        user = make_user()
+        generate = AsyncMock(side_effect=[
+            {"term": "physics", "explanation": "Something the parser could not split."},
+            {"term": "Entropy", "explanation": "Disorder."},
+        ])
+
+        result, mocks = await run_service(user, generate)
+
+        mock_catalog = mocks[3]
+        assert result["term"] == "Entropy"
+        mock_catalog.assert_awaited_once_with("physics", "Entropy", "Disorder.")
+
+    @pytest.mark.asyncio
+    async def test_prompt_history_reads_only_the_newest_terms(self):
+        """Test that the prompt history is read newest first, bounded, and returned oldest first"""
+        with patch('app.db.daily_concept_repository.db') as mock_db:
+            mock_find = mock_db.__getitem__.return_value.find
+            cursor = mock_find.return_value.sort.return_value.limit.return_value
+            cursor.to_list = AsyncMock(return_value=[{"term": "Newer"}, {"term": "Older"}])
+
+            terms = await get_recent_seen_terms(ObjectId(), "Physics", 20)
+
+        mock_find.return_value.sort.assert_called_once_with("_id", -1)
+        mock_find.return_value.sort.return_value.limit.assert_called_once_with(20)
+        assert terms == ["Older", "Newer"]
+
+    @pytest.mark.asyncio
+    async def test_batch_is_checked_against_history_in_one_query(self):
+        """Test that a seen first choice is skipped for the next unseen term of the same batch"""
+        user = make_user()
+        batch = [{"term": "Gravity", "explanation": "Attraction."}, {"term": "Entropy", "explanation": "Disorder."}]
+
+        patches = service_patches(user, AsyncMock(), seen=["gravity"])
+        mocks = [p.start() for p in patches]
+        try:
+            with patch('app.services.daily_concept_service.CATALOG_REFILL_BATCH_SIZE', 2), \
+                 patch('app.services.daily_concept_service.generate_specific_concepts', new_callable=AsyncMock, return_value=batch), \
+                 patch('app.services.daily_concept_service.add_concepts_to_catalog', new_callable=AsyncMock):
+                result = await get_daily_concept_service(user.id, "physics")
+        finally:
+            for p in reversed(patches):
+                p.stop()
+
+        mock_find_seen = mocks[-2]
+        assert result["term"] == "Entropy"
+        mock_find_seen.assert_awaited_once_with(ObjectId(user.id), "physics", ["gravity", "entropy"])
@@ -0,0 +1,120 @@
+import pytest
+from unittest.mock import AsyncMock, patch
+from app.ai.generate_specific_concept import (
+    build_specific_concept_messages,
+    generate_specific_concept,
+    generate_specific_concepts,
+    parse_json_concept,
+    parse_specific_concept,
+    parse_specific_concepts,
+    parse_stats,
+)
+from app.ai.providers import StubProvider
+
+
+class TestBatchGeneration:
+    """Unit tests for generating several concepts in one completion"""
+
+    def test_parse_tolerates_numbering_and_markdown(self):
+        """Test that common formatting drift still parses into separate concepts"""
+        content = (
+            "1. **Term:** Entropy\n"
+            "A measure of disorder.\n\n"
+            "2) Term: Gravity\n"
+            "Attraction between masses.\n\n"
+            "Term: Inertia\n"
+            "Resistance to changes in motion."
+        )
+
+        assert parse_specific_concepts(content) == [
+            {"term": "Entropy", "explanation": "A measure of disorder."},
+            {"term": "Gravity", "explanation": "Attraction between masses."},
+            {"term": "Inertia", "explanation": "Resistance to changes in motion."},
+        ]
+
+    def test_parse_drops_duplicates_seen_terms_and_empty_explanations(self):
+        """Test that repeats, history terms and bare headers are discarded"""
+        content = (
+            "Term: Entropy\nFirst.\n\n"
+            "Term: entropy!\nRepeated.\n\n"
+            "Term: Gravity\nAlready seen.\n\n"
+            "Term: Inertia\n"
+        )
+
+        assert parse_specific_concepts(content, seen_terms=["gravity"]) == [
+            {"term": "Entropy", "explanation": "First."},
+        ]
+
+    @pytest.mark.asyncio
+    async def test_generate_asks_for_count_in_one_call(self):
+        """Test that a batch is produced by a single upstream completion"""
+        reply = "Term: A\nOne.\n\nTerm: B\nTwo."
+
+        with patch('app.ai.generate_specific_concept.chat_completion', new_callable=AsyncMock, return_value=reply) as mock_chat:
+            concepts = await generate_specific_concepts("physics", [], 2)
+
+        mock_chat.assert_awaited_once()
+        assert "exactly 2 distinct" in mock_chat.call_args[0][0][1]["content"]
+        assert mock_chat.call_args.kwargs["max_tokens"] == 600
+        assert [concept["term"] for concept in concepts] == ["A", "B"]
+
+    @pytest.mark.asyncio
+    async def test_generate_rejects_out_of_range_count(self):
+        """Test that batch size is bounded"""
+        with pytest.raises(ValueError):
+            await generate_specific_concepts("physics", [], 0)
+
+
+class TestStructuredOutput:
+    """Unit tests for JSON replies and the free-text fallback parsers"""
+
+    def test_parse_json_reply_including_code_fence(self):
+        """Test that JSON replies parse, with or without a markdown fence"""
+        before = parse_stats["json"]
+
+        assert parse_specific_concept('{"term": "Entropy", "explanation": "Disorder."}', "physics") == \
+            {"term": "Entropy", "explanation": "Disorder."}
+        assert parse_specific_concept('```json\n{"term": " Gravity ", "explanation": "Attraction."}\n```', "physics") == \
+            {"term": "Gravity", "explanation": "Attraction."}
+        assert parse_stats["json"] == before + 2
+
+    @pytest.mark.parametrize("content", [
+        '{"term": "Entropy"}',
+        '{"term": "", "explanation": "Disorder."}',
+        '{"term": ["Entropy"], "explanation": "Disorder."}',
+        '{"term": "Entropy", "explanation": "Disorder."',
+    ])
+    def test_invalid_json_is_rejected(self, content):
+        """Test that incomplete or mistyped objects are not accepted as concepts"""
+        assert parse_json_concept(content) is None
+
+    def test_free_text_falls_back_to_term_line_then_raw(self):
+        """Test that the regex fallbacks still parse text replies and are counted"""
+        before = dict(parse_stats)
+
+        assert parse_specific_concept("Term: Entropy\nDisorder.", "physics")["term"] == "Entropy"
+        assert parse_specific_concept("no structure here", "physics") == {"term": "physics", "explanation": "no structure here"}
+        assert parse_stats["term_line"] == before["term_line"] + 1
+        assert parse_stats["raw"] == before["raw"] + 1
+
+    @pytest.mark.asyncio
+    async def test_generate_requests_json_mode(self):
+        """Test that structured mode asks the provider for a JSON object"""
+        reply = '{"term": "Entropy", "explanation": "Disorder."}'
+
+        with patch('app.ai.generate_specific_concept.chat_completion', new_callable=AsyncMock, return_value=reply) as mock_chat, \
+             patch('app.ai.generate_specific_concept.STRUCTURED_OUTPUT', True):
+            concept = await generate_specific_concept("physics", [])
+
+        assert mock_chat.call_args.kwargs["json_mode"] is True
+        assert "JSON object" in mock_chat.call_args[0][0][1]["content"]
+        assert concept == {"term": "Entropy", "explanation": "Disorder."}
+
+    @pytest.mark.asyncio
+    async def test_stub_provider_honours_json_mode(self):
+        """Test that the offline stub answers JSON-mode requests with valid JSON"""
+        messages, _ = build_specific_concept_messages("physics", [], structured=True)
+
+        content = await StubProvider(latency=0, tokens_per_second=0).complete(messages, 300, 0.7, json_mode=True)
+
+        assert parse_json_concept(content)["term"].startswith("Stub Concept")
@@ -0,0 +1,192 @@
+import asyncio
+import time
+import pytest
+from bson import ObjectId
+from unittest.mock import AsyncMock, MagicMock, patch
+from pymongo.errors import DuplicateKeyError
+from app.db.daily_concept_repository import claim_generation, release_generation
+from app.models.user_model import UserConceptView
+from app.services import daily_concept_service
+from app.services.daily_concept_service import get_daily_concept_service
+
+USER_ID = "507f1f77bcf86cd799439011"
+
+
+class FakeStore:
+    """In-memory claims and committed concepts, shared by every request in a test"""
+
+    def __init__(self):
+        self.claims: dict[str, tuple[str, float]] = {}
+        self.concepts: dict[str, dict] = {}
+
+    async def claim_generation(self, user_id, date, owner, lease_seconds):
+        holder = self.claims.get(date)
+        if holder and holder[0] != owner and holder[1] > time.monotonic():
+            return False
+        self.claims[date] = (owner, time.monotonic() + lease_seconds)
+        return True
+
+    async def release_generation(self, user_id, date, owner):
+        if self.claims.get(date, (None,))[0] == owner:
+            del self.claims[date]
+
+    async def get_daily_concept(self, user_id, date):
+        return self.concepts.get(date)
+
+    async def commit_daily_concept(self, user_id, category, term, explanation):
+        if "today" in self.concepts:
+            return self.concepts["today"]
+        self.concepts["today"] = {"category": category, "term": term, "explanation": explanation}
+        return None
+
+    def patches(self, generate):
+        service = 'app.services.daily_concept_service'
+        return [
+            patch(f'{service}.get_user_concept_view', new_callable=AsyncMock, return_value=UserConceptView(id=USER_ID)),
+            patch(f'{service}.find_unseen_concept', new_callable=AsyncMock, return_value=None),
+            patch(f'{service}.get_recent_seen_terms', new_callable=AsyncMock, return_value=[]),
+            patch(f'{service}.find_seen_term_keys', new_callable=AsyncMock, return_value=set()),
+            patch(f'{service}.add_concept_to_catalog', new_callable=AsyncMock),
+            patch(f'{service}.generate_specific_concept', generate),
+            patch(f'{service}.CATALOG_REFILL_BATCH_SIZE', 1),
+            patch(f'{service}.GENERATION_POLL_INTERVAL', 0.01),
+            patch(f'{service}.claim_generation', self.claim_generation),
+            patch(f'{service}.release_generation', self.release_generation),
+            patch(f'{service}.get_daily_concept', self.get_daily_concept),
+            patch(f'{service}.commit_daily_concept', self.commit_daily_concept),
+            # Every request in these tests serves the same slot
+            patch(f'{service}.datetime', MagicMock(**{"now.return_value.strftime.return_value": "today"})),
+        ]
+
+
+def slow_generate(*terms):
+    replies = iter(terms)
+
+    async def generate(category, seen_terms):
+        await asyncio.sleep(0.05)
+        return {"term": next(replies), "explanation": "Explained."}
+    return AsyncMock(side_effect=generate)
+
+
+async def run_requests(store, generate, count):
+    patches = store.patches(generate)
+    for p in patches:
+        p.start()
+    try:
+        return await asyncio.gather(
+            *(get_daily_concept_service(USER_ID, "physics") for _ in range(count)), return_exceptions=True
+        )
+    finally:
+        for p in reversed(patches):
+            p.stop()
+
+
+class TestGenerationClaim:
+    """One LLM generation per user and day, however many requests race for it"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_share_one_generation(self):
+        """Test that losers wait for the winner's concept instead of generating"""
+        store = FakeStore()
+        generate = slow_generate("Entropy", "Gravity", "Inertia")
+        served = daily_concept_service.claim_stats["served_by_holder"]
+
+        results = await run_requests(store, generate, 3)
+
+        assert generate.await_count == 1
+        assert all(result["term"] == "Entropy" for result in results)
+        assert daily_concept_service.claim_stats["served_by_holder"] == served + 2
+        assert store.claims == {}
+
+    @pytest.mark.asyncio
+    async def test_expired_claim_of_a_crashed_holder_is_taken_over(self):
+        """Test that a claim nobody releases stops blocking once its lease runs out"""
+        store = FakeStore()
+        store.claims["today"] = ("crashed-worker", time.monotonic() + 0.05)
+        generate = slow_generate("Entropy")
+        taken_over = daily_concept_service.claim_stats["taken_over"]
+
+        (result,) = await run_requests(store, generate, 1)
+
+        assert result["term"] == "Entropy"
+        assert daily_concept_service.claim_stats["taken_over"] == taken_over + 1
+
+    @pytest.mark.asyncio
+    async def test_holder_renews_its_claim_through_a_slow_generation(self):
+        """Test that a generation outlasting the lease is not taken over by a waiter"""
+        store = FakeStore()
+        generate = slow_generate("Entropy", "Gravity")
+        renewed = daily_concept_service.claim_stats["renewed"]
+
+        # The generation takes 0.05s, several times the lease
+        with patch('app.services.daily_concept_service.GENERATION_LEASE_SECONDS', 0.015):
+            results = await run_requests(store, generate, 2)
+
+        assert generate.await_count == 1
+        assert all(result["term"] == "Entropy" for result in results)
+        assert daily_concept_service.claim_stats["renewed"] > renewed
+        assert store.claims == {}
+        assert daily_concept_service._renewals == {}
+
+    @pytest.mark.asyncio
+    async def test_slot_committed_before_the_claim_is_not_regenerated(self):
+        """Test that winning the claim after the previous holder committed serves its concept"""
+        store = FakeStore()
+        # Committed and released between this request's view read and its claim
+        store.concepts["today"] = {"category": "physics", "term": "Gravity", "explanation": "Attraction."}
+        generate = slow_generate("Entropy")
+
+        (result,) = await run_requests(store, generate, 1)
+
+        generate.assert_not_awaited()
+        assert result["term"] == "Gravity"
+        assert store.claims == {}
+
+    @pytest.mark.asyncio
+    async def test_failed_holder_releases_the_claim(self):
+        """Test that a waiter generates itself when the holder's generation fails"""
+        store = FakeStore()
+        calls = 0
+
+        async def generate(category, seen_terms):
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.02)
+            if calls == 1:
+                raise RuntimeError("upstream failed")
+            return {"term": "Entropy", "explanation": "Explained."}
+
+        results = await run_requests(store, AsyncMock(side_effect=generate), 2)
+
+        assert isinstance(results[0], RuntimeError)
+        assert results[1]["term"] == "Entropy"
+        assert store.claims == {}
+
+
+class TestClaimRepository:
+    """The claim document operations"""
+
+    @pytest.mark.asyncio
+    async def test_claim_is_an_upsert_on_expired_or_own_claims(self):
+        """Test the claim filter and that a held claim reports False"""
+        claims = MagicMock()
+        claims.find_one_and_update = AsyncMock(side_effect=[{"_id": "x"}, DuplicateKeyError("E11000")])
+        with patch('app.db.daily_concept_repository.db', {"generation_claims": claims}):
+            assert await claim_generation(USER_ID, "2025-01-02", "owner-a", 60) is True
+            assert await claim_generation(USER_ID, "2025-01-02", "owner-b", 60) is False
+
+        (claim_filter, update), kwargs = claims.find_one_and_update.call_args_list[0]
+        assert claim_filter["_id"] == f"{ObjectId(USER_ID)}:2025-01-02"
+        assert claim_filter["$or"][1] == {"owner": "owner-a"}
+        assert update["$set"]["owner"] == "owner-a"
+        assert kwargs["upsert"] is True
+
+    @pytest.mark.asyncio
+    async def test_release_only_removes_own_claim(self):
+        """Test that releasing never deletes a claim taken over by another owner"""
+        claims = MagicMock()
+        claims.delete_one = AsyncMock()
+        with patch('app.db.daily_concept_repository.db', {"generation_claims": claims}):
+            await release_generation(USER_ID, "2025-01-02", "owner-a")
+
+        claims.delete_one.assert_awaited_once_with({"_id": f"{ObjectId(USER_ID)}:2025-01-02", "owner": "owner-a"})
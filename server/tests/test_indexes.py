@@ -0,0 +1,89 @@
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import AsyncMock, MagicMock, patch
+from app.db import indexes
+from app.db.user_repository import get_user_by_email, normalize_email
+from app.main import app
+
+
+class TestEnsureIndexes:
+    """Startup index builds and their reported status"""
+
+    def setup_method(self, method):
+        indexes.index_status.clear()
+
+    def teardown_method(self, method):
+        indexes.index_status.clear()
+
+    @pytest.mark.asyncio
+    async def test_builds_are_reported(self):
+        """Test that each collection's build is recorded as ready or failed"""
+        builders = {
+            "users": AsyncMock(),
+            "concepts": AsyncMock(side_effect=RuntimeError("duplicate keys in existing data")),
+        }
+        with patch.dict(indexes.INDEX_BUILDERS, builders, clear=True):
+            status = await indexes.ensure_indexes()
+
+        assert status["users"]["status"] == "ready"
+        assert status["concepts"]["status"] == "failed"
+        assert "duplicate keys" in status["concepts"]["error"]
+        builders["users"].assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_failed_users_build_stops_startup(self):
+        """Test that logins cannot be left without the email_key backfill"""
+        builders = {
+            "users": AsyncMock(side_effect=RuntimeError("backfill interrupted")),
+            "concepts": AsyncMock(),
+        }
+        with patch.dict(indexes.INDEX_BUILDERS, builders, clear=True):
+            with pytest.raises(RuntimeError, match="backfill interrupted"):
+                await indexes.ensure_indexes()
+
+        assert indexes.index_status["users"]["status"] == "failed"
+        builders["concepts"].assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_only_requested_collections_are_built(self):
+        """Test that collections can be left out, e.g. rate_limits on the memory backend"""
+        builders = {"users": AsyncMock(), "rate_limits": AsyncMock()}
+        with patch.dict(indexes.INDEX_BUILDERS, builders, clear=True):
+            await indexes.ensure_indexes(["users"])
+
+        builders["rate_limits"].assert_not_awaited()
+        assert list(indexes.index_status) == ["users"]
+
+    def test_health_endpoint_reports_status(self):
+        """Test that the index build status is exposed over HTTP"""
+        indexes.index_status.update({
+            "users": {"status": "ready", "seconds": 0.1},
+            "concepts": {"status": "failed", "seconds": 0.2, "error": "boom"},
+        })
+
+        response = TestClient(app).get("/health/indexes")
+
+        assert response.status_code == 200
+        assert response.json()["ready"] is False
+        assert response.json()["indexes"]["concepts"]["error"] == "boom"
+
+
+class TestEmailLookup:
+    """Email lookups go through the normalized, uniquely indexed key"""
+
+    def test_normalize_email(self):
+        """Test that case and surrounding whitespace do not make a different address"""
+        assert normalize_email("  Someone@Example.COM ") == "someone@example.com"
+
+    @pytest.mark.asyncio
+    async def test_lookup_uses_normalized_key(self):
+        """Test that get_user_by_email queries email_key rather than the raw email, reading only login fields"""
+        users = MagicMock()
+        users.find_one = AsyncMock(return_value=None)
+        with patch('app.db.user_repository.db', {"users": users}):
+            assert await get_user_by_email("Someone@Example.com") is None
+
+        users.find_one.assert_awaited_once_with(
+            {"email_key": "someone@example.com"},
+            {"username": 1, "email": 1, "password": 1, "interests": 1},
+        )
@@ -0,0 +1,131 @@
+import pytest
+import httpx
+import os
+from unittest.mock import patch
+from app.ai import llm_client
+from app.ai.generate_specific_concept import generate_specific_concept
+from app.ai.providers import LLMProvider, OpenRouterProvider, StubProvider
+from app.ai.upstream_policy import UpstreamError, UpstreamPolicy
+
+
+def mock_provider(handler) -> OpenRouterProvider:
+    client = httpx.AsyncClient(base_url="http://llm.test", transport=httpx.MockTransport(handler))
+    return OpenRouterProvider(client=client)
+
+
+class TestLLMClient:
+    """Unit tests for the shared async LLM client"""
+
+    @pytest.mark.asyncio
+    @patch.dict(os.environ, {"OPENROUTER_API_KEY": "test-key"})
+    async def test_chat_completion_returns_stripped_content(self):
+        """Test that the message content is extracted and stripped"""
+        def handler(request):
+            assert request.url.path == "/chat/completions"
+            assert request.headers["Authorization"] == "Bearer test-key"
+            return httpx.Response(200, json={"choices": [{"message": {"content": "  Hello  "}}]})
+
+        with patch.object(llm_client, "_provider", mock_provider(handler)):
+            content = await llm_client.chat_completion([{"role": "user", "content": "hi"}], max_tokens=10)
+
+        assert content == "Hello"
+
+    @pytest.mark.asyncio
+    @patch.dict(os.environ, {"OPENROUTER_API_KEY": "test-key"})
+    async def test_chat_completion_http_error_raises_runtime_error(self):
+        """Test that upstream HTTP failures surface as RuntimeError after retries"""
+        attempts = 0
+
+        def handler(request):
+            nonlocal attempts
+            attempts += 1
+            return httpx.Response(502)
+
+        with patch.object(llm_client, "_provider", mock_provider(handler)), \
+             patch.object(llm_client, "upstream_policy", UpstreamPolicy(retry_attempts=2, retry_base_delay=0)):
+            with pytest.raises(RuntimeError, match="Failed to fetch concept from model"):
+                await llm_client.chat_completion([{"role": "user", "content": "hi"}], max_tokens=10)
+
+        assert attempts == 2
+
+    @pytest.mark.asyncio
+    @patch.dict(os.environ, {"OPENROUTER_API_KEY": "test-key"})
+    async def test_client_errors_are_not_retryable(self):
+        """Test that 4xx responses are classified as non-retryable"""
+        def handler(request):
+            return httpx.Response(401)
+
+        with pytest.raises(UpstreamError) as exc_info:
+            await mock_provider(handler).complete([{"role": "user", "content": "hi"}], 10, 0.7)
+
+        assert exc_info.value.retryable is False
+
+    @pytest.mark.asyncio
+    @patch.dict(os.environ, {"OPENROUTER_API_KEY": "test-key"})
+    async def test_generate_specific_concept_parses_term(self):
+        """Test that generate_specific_concept keeps its return shape"""
+        def handler(request):
+            return httpx.Response(200, json={"choices": [{"message": {"content": "Term: Entropy\nA measure of disorder."}}]})
+
+        with patch.object(llm_client, "_provider", mock_provider(handler)):
+            result = await generate_specific_concept("physics", ["Gravity"])
+
+        assert result == {"term": "Entropy", "explanation": "A measure of disorder."}
+
+    @pytest.mark.asyncio
+    async def test_missing_api_key_raises_runtime_error(self):
+        """Test that a missing API key is reported before any request is made"""
+        with patch.dict(os.environ, {}, clear=True), \
+             patch.object(llm_client, "_provider", OpenRouterProvider()):
+            with pytest.raises(RuntimeError, match="Missing OpenRouter API key"):
+                await llm_client.chat_completion([{"role": "user", "content": "hi"}], max_tokens=10)
+
+
+class TestStubProvider:
+    """Unit tests for the offline stub LLM provider"""
+
+    @pytest.mark.asyncio
+    async def test_stub_follows_term_format_and_is_deterministic(self):
+        """Test that two stubs with the same seed produce the same replies"""
+        messages = [{"role": "user", "content": "Format your answer like this:\nTerm: <term>"}]
+        first = StubProvider(latency=0, tokens_per_second=0, seed=7)
+        second = StubProvider(latency=0, tokens_per_second=0, seed=7)
+
+        reply = await first.complete(messages, max_tokens=300, temperature=0.7)
+
+        assert reply.startswith("Term: Stub Concept 1\n")
+        assert reply == await second.complete(messages, max_tokens=300, temperature=0.7)
+
+    @pytest.mark.asyncio
+    async def test_stub_stream_matches_completion(self):
+        """Test that streamed tokens join to the full reply"""
+        messages = [{"role": "user", "content": "Explain physics"}]
+        completed = await StubProvider(latency=0, tokens_per_second=0).complete(messages, 300, 0.7)
+        streamed = [token async for token in StubProvider(latency=0, tokens_per_second=0).stream(messages, 300, 0.7)]
+
+        assert len(streamed) > 1
+        assert "".join(streamed) == completed
+
+    @pytest.mark.asyncio
+    async def test_stub_error_rate_raises_runtime_error(self):
+        """Test that injected failures look like upstream failures"""
+        provider = StubProvider(latency=0, error_rate=1.0)
+
+        with pytest.raises(RuntimeError, match="Failed to fetch concept from model"):
+            await provider.complete([{"role": "user", "content": "hi"}], 10, 0.7)
+
+    def test_provider_is_selected_by_name(self):
+        """Test configuration-driven provider selection"""
+        assert isinstance(llm_client.create_provider("stub"), StubProvider)
+        assert isinstance(llm_client.create_provider("openrouter"), OpenRouterProvider)
+        with pytest.raises(ValueError):
+            llm_client.create_provider("unknown")
+
+    def test_incomplete_provider_fails_when_created(self):
+        """Test that a backend missing stream() is rejected before its first request"""
+        class CompleteOnly(LLMProvider):
+            async def complete(self, messages, max_tokens, temperature, json_mode=False):
+                return "Term: Entropy"
+
+        with pytest.raises(TypeError, match="stream"):
+            CompleteOnly()
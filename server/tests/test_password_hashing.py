@@ -0,0 +1,78 @@
+import pytest
+import asyncio
+import threading
+from fastapi.testclient import TestClient
+from unittest.mock import AsyncMock, patch
+from app.main import app
+from app.security.password_hashing import (
+    PasswordPoolSaturatedError,
+    PasswordWorkerPool,
+    hash_password,
+    verify_password,
+)
+
+
+class TestPasswordWorkerPool:
+    """Unit tests for bcrypt on the bounded worker pool"""
+
+    @pytest.mark.asyncio
+    async def test_hash_and_verify_round_trip(self):
+        """Test that hashing and verification work through the pool"""
+        hashed = await hash_password("correct horse")
+
+        assert hashed.startswith("$2")
+        assert await verify_password("correct horse", hashed)
+        assert not await verify_password("wrong horse", hashed)
+
+    @pytest.mark.asyncio
+    async def test_work_runs_off_the_event_loop(self):
+        """Test that operations execute on pool threads"""
+        pool = PasswordWorkerPool(workers=1, max_queue=0)
+
+        thread_name = await pool.run("hash", lambda: threading.current_thread().name)
+
+        assert thread_name.startswith("password")
+        pool.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_saturated_pool_rejects_with_retry_after(self):
+        """Test admission control once workers and queue are full"""
+        pool = PasswordWorkerPool(workers=1, max_queue=1)
+        release = threading.Event()
+
+        running = [asyncio.ensure_future(pool.run("hash", release.wait)) for _ in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(PasswordPoolSaturatedError) as exc_info:
+            await pool.run("hash", release.wait)
+
+        release.set()
+        await asyncio.gather(*running)
+        assert exc_info.value.retry_after >= 1
+        assert pool.stats()["rejected"] == 1
+        assert pool.stats()["operations"]["hash"]["count"] == 2
+        pool.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_pool_is_usable_after_shutdown(self):
+        """Test that a shut down pool creates a fresh executor on demand"""
+        pool = PasswordWorkerPool(workers=1, max_queue=0)
+        pool.shutdown()
+
+        assert await pool.run("verify", lambda: True)
+        pool.shutdown()
+
+
+class TestPasswordPoolAPI:
+    """API behaviour while the password pool is saturated"""
+
+    def setup_method(self, method):
+        self.client = TestClient(app)
+
+    def test_login_returns_503_with_retry_after(self):
+        """Test that a saturated pool fails fast instead of queueing the login"""
+        with patch('app.api.user_routes.authenticate_user', new_callable=AsyncMock,
+                   side_effect=PasswordPoolSaturatedError(2.0)):
+            response = self.client.post("/login", json={"email": "busy@example.com", "password": "password123"})
+
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "2"
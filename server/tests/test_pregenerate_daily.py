@@ -0,0 +1,241 @@
+import asyncio
+import pytest
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+from app.db.daily_concept_repository import get_recent_seen_terms_for_users
+from app.db.job_repository import claim_job
+from app.jobs.pregenerate_daily import (
+    PREGENERATE_RETRY_SECONDS, pregenerate_daily_concepts, run_daily_schedule, seconds_until_next_midnight_utc,
+)
+from app.models.user_model import UserConceptView
+from app.services.daily_concept_service import get_daily_concept_service
+
+
+class FakeCursor:
+    def __init__(self, documents):
+        self.documents = documents
+
+    def __aiter__(self):
+        self._iter = iter(self.documents)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+def lease_patches(claimed=True):
+    return (
+        patch('app.jobs.pregenerate_daily.claim_job', new_callable=AsyncMock, return_value=claimed),
+        patch('app.jobs.pregenerate_daily.release_job', new_callable=AsyncMock),
+        patch('app.jobs.pregenerate_daily.restart_job_checkpoint', new_callable=AsyncMock),
+    )
+
+
+class TestPregenerateDaily:
+    """Unit tests for the midnight batch pre-generation job"""
+
+    def setup_method(self):
+        self.lease_patches = lease_patches()
+        self.mock_claim, self.mock_release, self.mock_restart = (p.start() for p in self.lease_patches)
+
+    def teardown_method(self):
+        for p in self.lease_patches:
+            p.stop()
+
+    @pytest.mark.asyncio
+    async def test_generates_one_concept_per_interest_in_batches(self):
+        """Test that every interest is prepared and written with one bulk write per batch"""
+        users = [
+            {"_id": ObjectId(), "interests": ["physics", "Math"]},
+            {"_id": ObjectId(), "interests": ["art"]},
+            {"_id": ObjectId(), "interests": ["music"]},
+        ]
+        seen_terms = {users[0]["_id"]: {"physics": ["Gravity"], "math": ["Prime"]}}
+        generate = AsyncMock(side_effect=lambda category, seen: {"term": f"{category}-term", "explanation": "text"})
+
+        with patch('app.jobs.pregenerate_daily.find_users_to_prepare', return_value=FakeCursor(users)) as mock_find, \
+             patch('app.jobs.pregenerate_daily.get_recent_seen_terms_for_users', new_callable=AsyncMock, return_value=seen_terms) as mock_seen, \
+             patch('app.jobs.pregenerate_daily.save_prepared_concepts', new_callable=AsyncMock) as mock_save, \
+             patch('app.jobs.pregenerate_daily.get_job_checkpoint', new_callable=AsyncMock, return_value=None), \
+             patch('app.jobs.pregenerate_daily.save_job_checkpoint', new_callable=AsyncMock) as mock_checkpoint:
+
+            stats = await pregenerate_daily_concepts("2025-01-01", concurrency=2, batch_size=2, generate=generate)
+
+        assert stats["users"] == 3
+        assert stats["concepts"] == 4
+        assert stats["failures"] == 0
+        mock_find.assert_called_once_with("2025-01-01", None)
+        generate.assert_any_await("physics", ["Gravity"])
+        # Seen terms are looked up by category key, one query per batch
+        generate.assert_any_await("Math", ["Prime"])
+        assert mock_seen.await_count == 2
+        mock_seen.assert_any_await([users[0]["_id"], users[1]["_id"]], 20)
+
+        # Two batches: [user0, user1] and [user2]
+        assert mock_save.await_count == 2
+        first_batch = mock_save.await_args_list[0][0][1]
+        assert set(first_batch[users[0]["_id"]]) == {"physics", "Math"}
+        assert first_batch[users[1]["_id"]]["art"]["term"] == "art-term"
+
+        # Checkpoint after each batch, then completion
+        assert mock_checkpoint.await_args_list[0][0][:3] == ("pregenerate_daily:2025-01-01", users[1]["_id"], 2)
+        assert mock_checkpoint.await_args_list[-1].kwargs["completed"] is True
+
+    @pytest.mark.asyncio
+    async def test_resumes_after_checkpoint_and_counts_failures(self):
+        """Test that a restarted run continues after the last checkpointed user"""
+        last_id = ObjectId()
+        users = [{"_id": ObjectId(), "interests": ["physics"]}]
+        generate = AsyncMock(side_effect=RuntimeError("upstream down"))
+
+        with patch('app.jobs.pregenerate_daily.find_users_to_prepare', return_value=FakeCursor(users)) as mock_find, \
+             patch('app.jobs.pregenerate_daily.get_recent_seen_terms_for_users', new_callable=AsyncMock, return_value={}), \
+             patch('app.jobs.pregenerate_daily.save_prepared_concepts', new_callable=AsyncMock) as mock_save, \
+             patch('app.jobs.pregenerate_daily.get_job_checkpoint', new_callable=AsyncMock, return_value={"last_id": last_id}), \
+             patch('app.jobs.pregenerate_daily.save_job_checkpoint', new_callable=AsyncMock):
+
+            stats = await pregenerate_daily_concepts("2025-01-01", generate=generate)
+
+        mock_find.assert_called_once_with("2025-01-01", last_id)
+        assert stats["failures"] == 1
+        mock_save.assert_awaited_once_with("2025-01-01", {})
+
+    @pytest.mark.asyncio
+    async def test_failed_users_are_left_for_a_later_run(self):
+        """Test that a run with failures is neither completed nor leaves failed users prepared"""
+        users = [{"_id": ObjectId(), "interests": ["physics", "math"]}, {"_id": ObjectId(), "interests": ["art"]}]
+
+        async def generate(category, seen):
+            if category == "math":
+                raise RuntimeError("circuit open")
+            return {"term": f"{category}-term", "explanation": "text"}
+
+        with patch('app.jobs.pregenerate_daily.find_users_to_prepare', return_value=FakeCursor(users)), \
+             patch('app.jobs.pregenerate_daily.get_recent_seen_terms_for_users', new_callable=AsyncMock, return_value={}), \
+             patch('app.jobs.pregenerate_daily.save_prepared_concepts', new_callable=AsyncMock) as mock_save, \
+             patch('app.jobs.pregenerate_daily.get_job_checkpoint', new_callable=AsyncMock, return_value=None), \
+             patch('app.jobs.pregenerate_daily.save_job_checkpoint', new_callable=AsyncMock) as mock_checkpoint:
+
+            stats = await pregenerate_daily_concepts("2025-01-01", generate=generate)
+
+        assert stats["failures"] == 1
+        assert list(mock_save.await_args[0][1]) == [users[1]["_id"]]
+        self.mock_restart.assert_awaited_once_with("pregenerate_daily:2025-01-01")
+        assert all(not call.kwargs.get("completed") for call in mock_checkpoint.await_args_list)
+        self.mock_release.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_run_held_by_another_worker_is_skipped(self):
+        """Test that only the holder of the day's lease scans users"""
+        self.mock_claim.return_value = False
+        with patch('app.jobs.pregenerate_daily.find_users_to_prepare') as mock_find:
+            stats = await pregenerate_daily_concepts("2025-01-01", generate=AsyncMock())
+
+        assert stats["held_elsewhere"] is True
+        mock_find.assert_not_called()
+        self.mock_release.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_completed_run_is_skipped(self):
+        """Test that a finished job does not scan users again"""
+        with patch('app.jobs.pregenerate_daily.find_users_to_prepare') as mock_find, \
+             patch('app.jobs.pregenerate_daily.get_job_checkpoint', new_callable=AsyncMock, return_value={"completed": True}):
+
+            stats = await pregenerate_daily_concepts("2025-01-01", generate=AsyncMock())
+
+        mock_find.assert_not_called()
+        assert stats["users"] == 0
+
+    @pytest.mark.asyncio
+    async def test_schedule_resumes_a_run_whose_holder_crashed(self):
+        """Test that a worker that found the lease held retries and finishes the crashed holder's run"""
+        last_id = ObjectId()
+        users = [{"_id": ObjectId(), "interests": ["physics"]}]
+        generate = AsyncMock(return_value={"term": "Entropy", "explanation": "Disorder."})
+        # The holder's lease is still live on the first attempt and has expired by the retry
+        self.mock_claim.side_effect = [False, True, True]
+        # Stop at the sleep until the next midnight, after the day's run is done
+        sleep = AsyncMock(side_effect=[None, None, asyncio.CancelledError()])
+
+        with patch('app.jobs.pregenerate_daily.asyncio.sleep', sleep), \
+             patch('app.jobs.pregenerate_daily.seconds_until_next_midnight_utc', return_value=12 * 3600), \
+             patch('app.jobs.pregenerate_daily.pregenerate_daily_concepts',
+                   new=lambda date: pregenerate_daily_concepts(date, generate=generate)), \
+             patch('app.jobs.pregenerate_daily.find_users_to_prepare', return_value=FakeCursor(users)) as mock_find, \
+             patch('app.jobs.pregenerate_daily.get_recent_seen_terms_for_users', new_callable=AsyncMock, return_value={}), \
+             patch('app.jobs.pregenerate_daily.save_prepared_concepts', new_callable=AsyncMock) as mock_save, \
+             patch('app.jobs.pregenerate_daily.get_job_checkpoint', new_callable=AsyncMock, return_value={"last_id": last_id}), \
+             patch('app.jobs.pregenerate_daily.save_job_checkpoint', new_callable=AsyncMock) as mock_checkpoint:
+
+            with pytest.raises(asyncio.CancelledError):
+                await run_daily_schedule()
+
+        assert sleep.await_args_list[1][0][0] == PREGENERATE_RETRY_SECONDS
+        # The retry continues from the crashed holder's checkpoint and completes the day
+        mock_find.assert_called_once()
+        assert mock_find.call_args[0][1] == last_id
+        assert list(mock_save.await_args[0][1]) == [users[0]["_id"]]
+        assert mock_checkpoint.await_args_list[-1].kwargs["completed"] is True
+
+    def test_seconds_until_next_midnight_utc(self):
+        """Test the scheduler delay calculation"""
+        now = datetime(2025, 1, 1, 23, 0, tzinfo=timezone.utc)
+        assert seconds_until_next_midnight_utc(now) == 3600
+
+    @pytest.mark.asyncio
+    async def test_batch_history_is_limited_per_category(self):
+        """Test that only the newest terms per user and category are read, returned oldest first"""
+        user_id = ObjectId()
+        groups = [{"_id": {"user_id": user_id, "category_key": "physics"}, "terms": ["Newest", "Older"]}]
+        with patch('app.db.daily_concept_repository.db') as mock_db:
+            mock_aggregate = mock_db.__getitem__.return_value.aggregate
+            mock_aggregate.return_value = FakeCursor(groups)
+
+            seen = await get_recent_seen_terms_for_users([user_id], 20)
+
+        pipeline = mock_aggregate.call_args[0][0]
+        assert pipeline[1] == {"$sort": {"user_id": -1, "category_key": -1, "_id": -1}}
+        assert pipeline[-1] == {"$project": {"terms": {"$slice": ["$terms", 20]}}}
+        assert seen == {user_id: {"physics": ["Older", "Newest"]}}
+
+    @pytest.mark.asyncio
+    async def test_daily_concept_service_uses_prepared_concept(self):
+        """Test that a prepared concept is served without calling the LLM"""
+        today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+        user = UserConceptView(
+            id="507f1f77bcf86cd799439011",
+            prepared={today: {"physics": {"category": "physics", "term": "Entropy", "explanation": "Disorder."}}}
+        )
+
+        with patch('app.services.daily_concept_service.get_user_concept_view', new_callable=AsyncMock, return_value=user), \
+             patch('app.services.daily_concept_service.has_seen_term', new_callable=AsyncMock, return_value=False), \
+             patch('app.services.daily_concept_service.generate_specific_concept', new_callable=AsyncMock) as mock_generate, \
+             patch('app.services.daily_concept_service.commit_daily_concept', new_callable=AsyncMock, return_value=None) as mock_save:
+
+            result = await get_daily_concept_service(user.id, "physics")
+
+        mock_generate.assert_not_awaited()
+        mock_save.assert_awaited_once_with(user.id, "physics", "Entropy", "Disorder.")
+        assert result == {"category": "physics", "term": "Entropy", "explanation": "Disorder."}
+
+
+class TestJobLease:
+    """The per-day job lease in the jobs collection"""
+
+    @pytest.mark.asyncio
+    async def test_held_lease_is_reported_by_the_upsert(self):
+        """Test that a claim colliding with another owner's lease returns False"""
+        jobs = MagicMock()
+        jobs.update_one = AsyncMock(side_effect=[MagicMock(), DuplicateKeyError("E11000")])
+        with patch('app.db.job_repository.db', {"jobs": jobs}):
+            assert await claim_job("pregenerate_daily:2025-01-01", "worker-a", 60) is True
+            assert await claim_job("pregenerate_daily:2025-01-01", "worker-b", 60) is False
+
+        lease_filter = jobs.update_one.call_args_list[0][0][0]
+        assert {"lease_owner": "worker-a"} in lease_filter["$or"]
+        assert jobs.update_one.call_args_list[0].kwargs["upsert"] is True
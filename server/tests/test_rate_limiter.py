@@ -0,0 +1,252 @@
+import asyncio
+import os
+import subprocess
+import sys
+import uuid
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import AsyncMock, patch
+from app.main import app
+from app.security.rate_limiter import (
+    MongoRateLimiter,
+    SlidingWindowRateLimiter,
+    create_rate_limiter,
+    get_rate_limiter,
+    parse_rate_limits,
+)
+from tests.helpers import FakeClock
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestSlidingWindowRateLimiter:
+    """Unit tests for the constant-memory sliding window limiter"""
+
+    def test_limit_is_enforced_within_a_window(self):
+        """Test that requests beyond the limit are rejected with a retry delay"""
+        clock = FakeClock(100)
+        limiter = SlidingWindowRateLimiter(limit=3, window=60, clock=clock)
+
+        assert [limiter.hit("1.2.3.4")[0] for _ in range(4)] == [True, True, True, False]
+        assert limiter.hit("1.2.3.4")[1] == pytest.approx(20)
+        assert limiter.hit("5.6.7.8")[0] is True
+
+    def test_previous_window_is_weighted_by_overlap(self):
+        """Test that the sliding estimate decays the previous window's count"""
+        clock = FakeClock(0)
+        limiter = SlidingWindowRateLimiter(limit=4, window=60, clock=clock)
+        for _ in range(4):
+            limiter.hit("ip")
+
+        # Just into the next window almost all of the previous 4 requests still count;
+        # a second request fits once a quarter of the window has passed
+        clock.now = 61
+        assert limiter.hit("ip")[0] is True
+        allowed, retry_after = limiter.hit("ip")
+        assert allowed is False
+        assert retry_after == pytest.approx(14)
+
+        # Two windows later the client starts from zero
+        clock.now = 200
+        assert limiter.hit("ip")[0] is True
+
+    def test_idle_clients_are_swept(self):
+        """Test that clients idle for two windows are dropped"""
+        clock = FakeClock(0)
+        limiter = SlidingWindowRateLimiter(limit=5, window=10, clock=clock)
+        for index in range(100):
+            limiter.hit(f"10.0.0.{index}")
+
+        clock.now = 25
+        limiter.hit("active")
+
+        assert limiter.stats()["clients"] == 1
+        assert limiter.stats()["evictions"] == 100
+
+    def test_tracked_clients_are_capped(self):
+        """Test the hard cap on the number of tracked clients"""
+        limiter = SlidingWindowRateLimiter(limit=5, window=3600, max_clients=50, clock=FakeClock(0))
+        for index in range(1000):
+            limiter.hit(f"ip-{index}")
+
+        assert limiter.stats()["clients"] == 50
+
+    def test_parse_rate_limits(self):
+        """Test the per-route configuration format"""
+        assert parse_rate_limits("default=5/3600, get-concept-stream=2/60") == {
+            "default": (5, 3600.0),
+            "get-concept-stream": (2, 60.0),
+        }
+
+    def test_unconfigured_routes_share_the_default_limiter(self):
+        """Test that routes without their own limit fall back to the default"""
+        assert get_rate_limiter("unconfigured-route") is get_rate_limiter("default")
+
+    def test_backend_selection(self):
+        """Test that the backend setting picks the limiter implementation"""
+        assert isinstance(create_rate_limiter("default", 5, 60, backend="memory"), SlidingWindowRateLimiter)
+        assert isinstance(create_rate_limiter("default", 5, 60, backend="mongo"), MongoRateLimiter)
+        with pytest.raises(ValueError):
+            create_rate_limiter("default", 5, 60, backend="redis")
+
+
+class FakeBuckets:
+    """In-memory stand-in for the rate limit repository"""
+
+    def __init__(self):
+        self.counts: dict[str, int] = {}
+        self.round_trips = 0
+
+    async def increment_bucket(self, bucket_id, max_count, expires_at, hits=1):
+        self.round_trips += 1
+        if self.counts.get(bucket_id, 0) + hits > max_count:
+            return None
+        self.counts[bucket_id] = self.counts.get(bucket_id, 0) + hits
+        return self.counts[bucket_id]
+
+    async def add_to_bucket(self, bucket_id, hits, expires_at):
+        self.counts[bucket_id] = self.counts.get(bucket_id, 0) + hits
+
+    async def get_bucket_count(self, bucket_id):
+        self.round_trips += 1
+        return self.counts.get(bucket_id, 0)
+
+    def patches(self):
+        return (
+            patch('app.security.rate_limiter.increment_bucket', new=self.increment_bucket),
+            patch('app.security.rate_limiter.add_to_bucket', new=self.add_to_bucket),
+            patch('app.security.rate_limiter.get_bucket_count', new=self.get_bucket_count),
+        )
+
+
+def acquire_many(limiter, key: str, count: int) -> list[bool]:
+    async def run():
+        return [(await limiter.acquire(key))[0] for _ in range(count)]
+    return asyncio.run(run())
+
+
+class TestMongoRateLimiter:
+    """Unit tests for the shared limiter against an in-memory bucket store"""
+
+    def setup_method(self, method):
+        self.buckets = FakeBuckets()
+        self.patchers = self.buckets.patches()
+        for patcher in self.patchers:
+            patcher.start()
+
+    def teardown_method(self, method):
+        for patcher in self.patchers:
+            patcher.stop()
+
+    def test_limit_is_enforced_across_instances(self):
+        """Test that two workers sharing the store share one budget"""
+        clock = FakeClock(100)
+        first = MongoRateLimiter("route", limit=4, window=60, local_allowance=0, clock=clock)
+        second = MongoRateLimiter("route", limit=4, window=60, local_allowance=0, clock=clock)
+
+        assert acquire_many(first, "ip", 3) == [True, True, True]
+        assert acquire_many(second, "ip", 2) == [True, False]
+        assert self.buckets.counts["route:ip:1"] == 4
+
+    def test_clear_rejects_skip_the_round_trip(self):
+        """Test that a client known to be over its budget is rejected locally"""
+        clock = FakeClock(100)
+        limiter = MongoRateLimiter("route", limit=2, window=60, local_allowance=0, clock=clock)
+        acquire_many(limiter, "ip", 3)
+        round_trips = self.buckets.round_trips
+
+        allowed, retry_after = asyncio.run(limiter.acquire("ip"))
+
+        assert allowed is False
+        assert retry_after == pytest.approx(20)
+        assert self.buckets.round_trips == round_trips
+
+    def test_local_allowance_admits_clear_allows_without_a_round_trip(self):
+        """Test that hits well under the limit are counted with the next round trip"""
+        clock = FakeClock(100)
+        limiter = MongoRateLimiter("route", limit=10, window=60, local_allowance=3, clock=clock)
+
+        assert acquire_many(limiter, "ip", 12) == [True] * 10 + [False] * 2
+        assert self.buckets.counts["route:ip:1"] == 10
+        # One read of the previous window, then a write after each run of local allows
+        assert self.buckets.round_trips == 4
+
+    def test_local_hits_are_recorded_when_the_bucket_filled_up(self):
+        """Test that locally admitted hits still count when another worker filled the bucket"""
+        clock = FakeClock(100)
+        limiter = MongoRateLimiter("route", limit=10, window=60, local_allowance=3, clock=clock)
+        acquire_many(limiter, "ip", 3)
+        self.buckets.counts["route:ip:1"] = 9
+
+        assert acquire_many(limiter, "ip", 1) == [False]
+        assert self.buckets.counts["route:ip:1"] == 12
+
+    def test_previous_window_is_weighted_by_overlap(self):
+        """Test that the previous bucket's count decays like the in-process limiter"""
+        self.buckets.counts["route:ip:0"] = 4
+        clock = FakeClock(61)
+        limiter = MongoRateLimiter("route", limit=4, window=60, local_allowance=0, clock=clock)
+
+        assert acquire_many(limiter, "ip", 2) == [True, False]
+        clock.now = 76
+        assert acquire_many(limiter, "ip", 2) == [True, False]
+
+
+@pytest.mark.skipif(not os.getenv("MONGO_TEST_URI"), reason="MONGO_TEST_URI is not set")
+class TestMongoRateLimiterWorkers:
+    """Several worker processes sharing one budget through a real mongod"""
+
+    WORKER = """
+import asyncio, sys
+from app.db.rate_limit_repository import ensure_rate_limit_indexes
+from app.security.rate_limiter import MongoRateLimiter
+
+async def main():
+    await ensure_rate_limit_indexes()
+    limiter = MongoRateLimiter("integration", limit=int(sys.argv[1]), window=3600, local_allowance=0)
+    results = await asyncio.gather(*(limiter.acquire("shared-ip") for _ in range(int(sys.argv[2]))))
+    print(sum(allowed for allowed, _ in results))
+
+asyncio.run(main())
+"""
+
+    def test_workers_share_one_limit(self):
+        """Test that concurrent workers together admit exactly the limit"""
+        env = {
+            **os.environ,
+            "MONGO_URI": os.environ["MONGO_TEST_URI"],
+            "MONGO_DB": f"rate_limit_test_{uuid.uuid4().hex}",
+        }
+        workers = [
+            subprocess.Popen(
+                [sys.executable, "-c", self.WORKER, "25", "20"],
+                cwd=SERVER_DIR, env=env, stdout=subprocess.PIPE, text=True,
+            )
+            for _ in range(4)
+        ]
+        allowed = [int(worker.communicate(timeout=60)[0]) for worker in workers]
+
+        from pymongo import MongoClient
+        MongoClient(env["MONGO_URI"]).drop_database(env["MONGO_DB"])
+        assert sum(allowed) == 25
+
+
+class TestRateLimitAPI:
+    """API behaviour of the public endpoint rate limit"""
+
+    def setup_method(self, method):
+        self.client = TestClient(app)
+
+    def test_get_concept_returns_429_with_retry_after(self):
+        """Test that the public endpoint rejects clients over their limit"""
+        limiter = SlidingWindowRateLimiter(limit=2, window=3600)
+
+        with patch('app.api.daily_concept.get_rate_limiter', return_value=limiter), \
+             patch('app.api.daily_concept.generate_concept', new_callable=AsyncMock, return_value="explanation"):
+            statuses = [self.client.get("/get-concept", params={"category": "rate-limited"}).status_code for _ in range(2)]
+            response = self.client.get("/get-concept", params={"category": "rate-limited"})
+
+        assert statuses == [200, 200]
+        assert response.status_code == 429
+        assert response.json()["detail"].startswith("Rate limit exceeded: 2 requests per hour")
+        assert int(response.headers["Retry-After"]) > 0
@@ -0,0 +1,93 @@
+import pytest
+import asyncio
+from unittest.mock import patch
+from app.ai.concept_cache import ConceptCache
+from app.ai.single_flight import SingleFlight
+from app.api.daily_concept import generate_concept_coalesced
+
+
+class TestSingleFlight:
+    """Unit tests for single-flight coalescing of upstream calls"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_callers_share_one_upstream_call(self):
+        """Test that identical concurrent calls run the upstream function once"""
+        flight = SingleFlight()
+        calls = 0
+
+        async def upstream():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "shared"
+
+        results = await asyncio.gather(*(flight.do("physics", upstream) for _ in range(10)))
+
+        assert results == ["shared"] * 10
+        assert calls == 1
+        assert flight.stats()["saved_calls"] == 9
+        assert flight.stats()["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_errors_propagate_to_every_waiter(self):
+        """Test that an upstream failure is raised in all coalesced callers"""
+        flight = SingleFlight()
+
+        async def upstream():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("upstream down")
+
+        results = await asyncio.gather(*(flight.do("k", upstream) for _ in range(3)), return_exceptions=True)
+
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert flight.stats()["upstream_calls"] == 1
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_does_not_cancel_shared_call(self):
+        """Test that cancelling one waiter leaves the shared call running for others"""
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def upstream():
+            await release.wait()
+            return "done"
+
+        first = asyncio.ensure_future(flight.do("k", upstream))
+        second = asyncio.ensure_future(flight.do("k", upstream))
+        await asyncio.sleep(0)
+
+        first.cancel()
+        release.set()
+
+        assert await second == "done"
+        assert first.cancelled()
+
+    @pytest.mark.asyncio
+    async def test_different_keys_are_not_coalesced(self):
+        """Test that different keys each get their own upstream call"""
+        flight = SingleFlight()
+
+        async def upstream():
+            await asyncio.sleep(0.01)
+            return "value"
+
+        await asyncio.gather(flight.do(("concept", "a"), upstream), flight.do(("concept", "b"), upstream))
+
+        assert flight.stats()["upstream_calls"] == 2
+
+    @pytest.mark.asyncio
+    async def test_coalesced_concept_is_cached_once(self):
+        """Test that only the shared call adds its explanation to the concept cache"""
+        cache = ConceptCache(pool_size=2)
+
+        async def generate_concept(category):
+            await asyncio.sleep(0.01)
+            return "explanation"
+
+        with patch('app.api.daily_concept.concept_cache', cache), \
+             patch('app.api.daily_concept.concept_flight', SingleFlight()), \
+             patch('app.api.daily_concept.generate_concept', generate_concept):
+            await asyncio.gather(*(generate_concept_coalesced("physics") for _ in range(5)))
+
+        assert cache.fallback("physics") == "explanation"
+        assert cache.lookup("physics") is None  # one of two pool slots filled
@@ -0,0 +1,123 @@
+import pytest
+import asyncio
+from fastapi.testclient import TestClient
+from unittest.mock import AsyncMock, patch
+from app.main import app
+from app.ai.upstream_policy import CircuitBreaker, CircuitOpenError, UpstreamError, UpstreamPolicy
+from tests.helpers import FakeClock
+
+
+class TestUpstreamPolicy:
+    """Unit tests for retries, the circuit breaker and hedged requests"""
+
+    @pytest.mark.asyncio
+    async def test_retryable_failures_are_retried(self):
+        """Test that transient failures are retried until one succeeds"""
+        policy = UpstreamPolicy(retry_attempts=3, retry_base_delay=0)
+        upstream = AsyncMock(side_effect=[UpstreamError("timeout"), UpstreamError("502"), "ok"])
+
+        assert await policy.call(upstream) == "ok"
+        assert upstream.await_count == 3
+        assert policy.stats()["retries"] == 2
+
+    @pytest.mark.asyncio
+    async def test_non_retryable_failures_are_raised_immediately(self):
+        """Test that client errors are not retried"""
+        policy = UpstreamPolicy(retry_attempts=3, retry_base_delay=0)
+        upstream = AsyncMock(side_effect=UpstreamError("400", retryable=False))
+
+        with pytest.raises(UpstreamError):
+            await policy.call(upstream)
+        assert upstream.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_breaker_opens_fails_fast_and_recovers(self):
+        """Test closed -> open -> half-open -> closed transitions"""
+        clock = FakeClock()
+        policy = UpstreamPolicy(breaker=CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=clock), retry_attempts=1)
+        failing = AsyncMock(side_effect=UpstreamError("down"))
+
+        for _ in range(2):
+            with pytest.raises(UpstreamError):
+                await policy.call(failing)
+        assert policy.breaker.state == CircuitBreaker.OPEN
+
+        # While open, upstream is not called at all
+        with pytest.raises(CircuitOpenError) as exc_info:
+            await policy.call(failing)
+        assert failing.await_count == 2
+        assert exc_info.value.retry_after == 10
+
+        clock.now = 10
+        assert policy.breaker.state == CircuitBreaker.HALF_OPEN
+        assert await policy.call(AsyncMock(return_value="ok")) == "ok"
+        assert policy.stats()["breaker_state"] == CircuitBreaker.CLOSED
+        assert policy.stats()["breaker_opened"] == 1
+        assert policy.stats()["breaker_rejected"] == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_half_open_trial_reopens_breaker(self):
+        """Test that a failing trial call opens the breaker again"""
+        clock = FakeClock()
+        policy = UpstreamPolicy(breaker=CircuitBreaker(failure_threshold=1, reset_timeout=5, clock=clock), retry_attempts=1)
+
+        with pytest.raises(UpstreamError):
+            await policy.call(AsyncMock(side_effect=UpstreamError("down")))
+        clock.now = 5
+        with pytest.raises(UpstreamError):
+            await policy.call(AsyncMock(side_effect=UpstreamError("still down")))
+
+        assert policy.breaker.state == CircuitBreaker.OPEN
+
+    @pytest.mark.asyncio
+    async def test_hedge_wins_when_primary_is_slow(self):
+        """Test that a hedged request answers when the primary stalls"""
+        policy = UpstreamPolicy(hedge=True, hedge_default_delay=0.01)
+        calls = 0
+
+        async def upstream():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(1 if calls == 1 else 0)
+            return f"call-{calls}"
+
+        assert await policy.call(upstream) == "call-2"
+        assert policy.stats()["hedges"] == 1
+        assert policy.stats()["hedge_win_rate"] == 1.0
+
+    @pytest.mark.asyncio
+    async def test_hedge_delay_tracks_latency_quantile(self):
+        """Test that the hedge delay follows observed latencies once warmed up"""
+        policy = UpstreamPolicy(hedge_min_samples=10, hedge_default_delay=5)
+        assert policy.hedge_delay() == 5
+
+        policy._latencies.extend([0.1] * 19 + [1.0])
+        assert policy.hedge_delay() == 1.0
+
+
+class TestUpstreamFailureAPI:
+    """API behaviour while the LLM provider is degraded"""
+
+    def setup_method(self, method):
+        self.client = TestClient(app)
+
+    def test_get_concept_returns_503_with_retry_after_when_breaker_is_open(self):
+        """Test that an open breaker fails fast with Retry-After"""
+        with patch('app.api.daily_concept.check_rate_limit', new_callable=AsyncMock), \
+             patch('app.api.daily_concept.generate_concept', new_callable=AsyncMock, side_effect=CircuitOpenError(12.3)):
+            response = self.client.get("/get-concept", params={"category": "breaker-open-category"})
+
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "13"
+
+    def test_get_concept_serves_cached_fallback_when_upstream_fails(self):
+        """Test that a previously cached explanation is served during an outage"""
+        from app.ai.concept_cache import concept_cache
+        concept_cache.add("fallback-category", "cached explanation")
+
+        with patch('app.api.daily_concept.check_rate_limit', new_callable=AsyncMock), \
+             patch('app.api.daily_concept.generate_concept', new_callable=AsyncMock, side_effect=UpstreamError("down")):
+            response = self.client.get("/get-concept", params={"category": "fallback-category"})
+
+        assert response.status_code == 200
+        assert response.json()["concept"] == "cached explanation"
@@ -0,0 +1,137 @@
+import asyncio
+import pytest
+from bson import ObjectId
+from unittest.mock import AsyncMock, MagicMock, patch
+from app.db.user_repository import UserProfileCache, add_interest, get_user_profile, save_prepared_concepts, user_cache
+from app.models.user_model import UserProfile
+from tests.helpers import FakeClock
+
+USER_ID = "507f1f77bcf86cd799439011"
+
+
+def profile(interests=()) -> UserProfile:
+    return UserProfile(id=USER_ID, username="learner", email="learner@example.com", interests=list(interests))
+
+
+class TestUserProfileCache:
+    """Unit tests for the bounded user profile cache"""
+
+    @pytest.mark.asyncio
+    async def test_second_read_is_a_hit(self):
+        """Test that a cached snapshot is served without loading again"""
+        load = AsyncMock(return_value=profile())
+        cache = UserProfileCache(max_entries=4, ttl=30)
+
+        first = await cache.get(USER_ID, load)
+        second = await cache.get(USER_ID, load)
+
+        assert first is second
+        assert load.await_count == 1
+        assert cache.stats()["hit_rate"] == 0.5
+
+    @pytest.mark.asyncio
+    async def test_entries_expire(self):
+        """Test that a snapshot older than the TTL is loaded again"""
+        clock = FakeClock()
+        load = AsyncMock(return_value=profile())
+        cache = UserProfileCache(max_entries=4, ttl=30, clock=clock)
+
+        await cache.get(USER_ID, load)
+        clock.now = 30
+        await cache.get(USER_ID, load)
+
+        assert load.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_least_recently_used_is_evicted(self):
+        """Test that the cache never holds more than max_entries users"""
+        load = AsyncMock(return_value=profile())
+        cache = UserProfileCache(max_entries=2, ttl=30)
+
+        for user_id in ("a", "b", "a", "c"):
+            await cache.get(user_id, load)
+
+        assert cache.lookup("a") is not None
+        assert cache.lookup("b") is None
+        assert cache.stats()["evictions"] == 1
+
+    @pytest.mark.asyncio
+    async def test_missing_users_are_not_cached(self):
+        """Test that a user created after a failed lookup is found"""
+        load = AsyncMock(side_effect=[None, profile()])
+        cache = UserProfileCache(max_entries=4, ttl=30)
+
+        assert await cache.get(USER_ID, load) is None
+        assert await cache.get(USER_ID, load) is not None
+
+    @pytest.mark.asyncio
+    async def test_read_racing_a_write_is_not_cached(self):
+        """Test that a snapshot read before an invalidation cannot be stored after it"""
+        cache = UserProfileCache(max_entries=4, ttl=30)
+        read_started, write_done = asyncio.Event(), asyncio.Event()
+
+        async def slow_load():
+            read_started.set()
+            await write_done.wait()
+            return profile(["old"])
+
+        async def write():
+            await read_started.wait()
+            cache.invalidate(USER_ID)
+            write_done.set()
+
+        stale, _ = await asyncio.gather(cache.get(USER_ID, slow_load), write())
+
+        assert stale.interests == ["old"]
+        assert cache.lookup(USER_ID) is None
+        assert cache.stats()["stale_fills"] == 1
+
+    @pytest.mark.asyncio
+    async def test_disabled_cache_always_loads(self):
+        """Test that a cache without entries passes every read through"""
+        load = AsyncMock(return_value=profile())
+        cache = UserProfileCache(max_entries=0)
+
+        await cache.get(USER_ID, load)
+        await cache.get(USER_ID, load)
+
+        assert load.await_count == 2
+
+
+class TestRepositoryInvalidation:
+    """Repository writes drop the cached profile of the users they touch"""
+
+    def setup_method(self):
+        user_cache.invalidate()
+
+    def users_collection(self):
+        users = MagicMock()
+        users.find_one = AsyncMock(return_value={"_id": ObjectId(USER_ID), "username": "learner", "email": "learner@example.com"})
+        users.update_one = AsyncMock(return_value=MagicMock(matched_count=1))
+        users.bulk_write = AsyncMock(return_value=MagicMock(modified_count=1))
+        return users
+
+    @pytest.mark.asyncio
+    async def test_profile_reads_go_through_the_cache(self):
+        """Test that repeated profile reads cost one database read"""
+        users = self.users_collection()
+        with patch('app.db.user_repository.db', {"users": users}):
+            await get_user_profile(USER_ID)
+            await get_user_profile(USER_ID)
+
+        assert users.find_one.await_count == 1
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("write", [
+        lambda: add_interest(USER_ID, "physics"),
+        lambda: save_prepared_concepts("2025-01-02", {ObjectId(USER_ID): {}}),
+    ])
+    async def test_write_invalidates(self, write):
+        """Test that the profile is read again after a write"""
+        users = self.users_collection()
+        with patch('app.db.user_repository.db', {"users": users}):
+            await get_user_profile(USER_ID)
+            await write()
+            await get_user_profile(USER_ID)
+
+        assert users.find_one.await_count == 2
@@ -0,0 +1,206 @@
+import asyncio
+import os
+import uuid
+import pytest
+from bson import ObjectId
+from unittest.mock import AsyncMock, MagicMock, patch
+from pymongo.errors import AutoReconnect, OperationFailure
+from app.db.user_repository import UserProfileCache
+from app.jobs.watch_user_changes import UserChangeWatcher
+from app.models.user_model import UserProfile
+
+USER_ID = "507f1f77bcf86cd799439011"
+OTHER_ID = "507f1f77bcf86cd799439012"
+STANDALONE = OperationFailure("The $changeStream stage is only supported on replica sets", code=40573)
+
+
+class FakeStream:
+    """A change stream replaying scripted events, then closing"""
+
+    def __init__(self, *events):
+        self.events = list(events)
+        self.resume_token = None
+        self.served = 0
+
+    @property
+    def alive(self):
+        return bool(self.events)
+
+    async def try_next(self):
+        event = self.events.pop(0)
+        if isinstance(event, Exception):
+            raise event
+        self.served += 1
+        self.resume_token = {"_data": f"token-{self.served}"}
+        return event
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+def change(operation: str, user_id: str | None = None) -> dict:
+    event = {"_id": {"_data": "ignored"}, "operationType": operation}
+    if user_id is not None:
+        event["documentKey"] = {"_id": ObjectId(user_id)}
+    return event
+
+
+def cache_with(*user_ids) -> UserProfileCache:
+    cache = UserProfileCache(max_entries=10, ttl=60)
+    for user_id in user_ids:
+        cache._store(user_id, UserProfile(id=user_id, username="learner", email="learner@example.com"))
+    return cache
+
+
+def watch_patches(*streams, saved_token=None):
+    users = MagicMock()
+    users.watch = MagicMock(side_effect=list(streams))
+    return users, (
+        patch('app.jobs.watch_user_changes.db', {"users": users}),
+        patch('app.jobs.watch_user_changes.get_resume_token', new_callable=AsyncMock, return_value=saved_token),
+        patch('app.jobs.watch_user_changes.save_resume_token', new_callable=AsyncMock),
+    )
+
+
+class TestUserChangeWatcher:
+    """Unit tests for change stream driven cache invalidation"""
+
+    @pytest.mark.asyncio
+    async def test_changed_users_are_invalidated(self):
+        """Test that only the users named by events are dropped once the stream is open"""
+        cache = cache_with(USER_ID, OTHER_ID)
+        watcher = UserChangeWatcher(cache=cache, save_interval=0, retry_seconds=0)
+        users, (db_patch, load_patch, save_patch) = watch_patches(
+            FakeStream(None, change("update", USER_ID)), STANDALONE, saved_token={"_data": "saved"}
+        )
+        with db_patch, load_patch, save_patch as mock_save:
+            await watcher.run()
+
+        assert cache.lookup(USER_ID) is None
+        assert cache.lookup(OTHER_ID) is not None
+        assert users.watch.call_args_list[0].kwargs["resume_after"] == {"_data": "saved"}
+        mock_save.assert_awaited_with(watcher.stream_id, {"_data": "token-2"})
+
+    @pytest.mark.asyncio
+    async def test_starting_without_a_token_clears_the_cache(self):
+        """Test that changes made before the stream opened cannot leave stale entries"""
+        cache = cache_with(USER_ID)
+        watcher = UserChangeWatcher(cache=cache, retry_seconds=0)
+        users, patches = watch_patches(FakeStream(None), STANDALONE)
+        with patches[0], patches[1], patches[2]:
+            await watcher.run()
+
+        assert "resume_after" not in users.watch.call_args_list[0].kwargs
+        assert cache.lookup(USER_ID) is None
+
+    @pytest.mark.asyncio
+    async def test_drop_clears_the_cache_and_restarts_after_invalidate(self):
+        """Test that events without a document key clear everything"""
+        cache = cache_with(OTHER_ID)
+        watcher = UserChangeWatcher(cache=cache, save_interval=0, retry_seconds=0)
+        users, patches = watch_patches(
+            FakeStream(change("drop"), change("invalidate"), None), FakeStream(None), STANDALONE,
+            saved_token={"_data": "saved"},
+        )
+        with patches[0], patches[1], patches[2]:
+            await watcher.run()
+
+        assert cache.lookup(OTHER_ID) is None
+        assert "resume_after" not in users.watch.call_args_list[1].kwargs
+
+    @pytest.mark.asyncio
+    async def test_standalone_falls_back_to_ttl(self):
+        """Test that the watcher stops quietly when change streams are unsupported"""
+        cache = cache_with(USER_ID)
+        watcher = UserChangeWatcher(cache=cache, retry_seconds=0)
+        _, patches = watch_patches(STANDALONE, saved_token={"_data": "saved"})
+        with patches[0], patches[1], patches[2]:
+            await watcher.run()
+
+        assert watcher.stats()["state"] == "ttl_only"
+        assert cache.lookup(USER_ID) is not None
+
+    @pytest.mark.asyncio
+    async def test_lost_history_restarts_from_now(self):
+        """Test that an unusable saved position is dropped instead of retried forever"""
+        watcher = UserChangeWatcher(cache=cache_with(), retry_seconds=0)
+        history_lost = OperationFailure("Resume point is no longer in the oplog", code=286)
+        users, patches = watch_patches(history_lost, STANDALONE, saved_token={"_data": "saved"})
+        with patches[0], patches[1], patches[2]:
+            await watcher.run()
+
+        assert users.watch.call_args_list[0].kwargs["resume_after"] == {"_data": "saved"}
+        assert "resume_after" not in users.watch.call_args_list[1].kwargs
+
+    @pytest.mark.asyncio
+    async def test_reconnect_resumes_from_the_last_event(self):
+        """Test that a dropped connection resumes where the stream stopped"""
+        watcher = UserChangeWatcher(cache=cache_with(), retry_seconds=0)
+        users, patches = watch_patches(
+            FakeStream(None, change("update", USER_ID), AutoReconnect("connection reset")), STANDALONE
+        )
+        with patches[0], patches[1], patches[2]:
+            await watcher.run()
+
+        assert users.watch.call_args_list[1].kwargs["resume_after"] == {"_data": "token-2"}
+        assert watcher.stats()["reconnects"] == 1
+
+
+@pytest.mark.skipif(not os.getenv("MONGO_TEST_URI"), reason="MONGO_TEST_URI is not set")
+class TestUserChangeWatcherReplicaSet:
+    """Cross-instance invalidation against a real replica set"""
+
+    @pytest.mark.asyncio
+    async def test_write_from_another_instance_invalidates_and_resumes(self):
+        """Test that another client's writes reach the cache, including writes made while stopped"""
+        from motor.motor_asyncio import AsyncIOMotorClient
+        from app.db.user_repository import get_user_profile
+
+        client = AsyncIOMotorClient(os.environ["MONGO_TEST_URI"])
+        test_db = client[f"change_stream_test_{uuid.uuid4().hex}"]
+        users = test_db["users"]
+        await users.insert_one({"_id": ObjectId(USER_ID), "username": "learner", "email": "learner@example.com"})
+        cache = UserProfileCache(max_entries=10, ttl=3600)
+
+        async def invalidated() -> bool:
+            for _ in range(100):
+                if cache.lookup(USER_ID) is None:
+                    return True
+                await asyncio.sleep(0.05)
+            return False
+
+        try:
+            with patch('app.db.user_repository.db', test_db), \
+                 patch('app.db.user_repository.user_cache', cache), \
+                 patch('app.db.job_repository.db', test_db), \
+                 patch('app.jobs.watch_user_changes.db', test_db):
+                watcher = UserChangeWatcher(cache=cache, save_interval=0)
+                task = asyncio.create_task(watcher.run())
+                try:
+                    while watcher.state not in ("watching", "ttl_only"):
+                        await asyncio.sleep(0.05)
+                    if watcher.state == "ttl_only":
+                        pytest.skip("MONGO_TEST_URI is not a replica set")
+                    await get_user_profile(USER_ID)
+                    await users.update_one({"_id": ObjectId(USER_ID)}, {"$set": {"interests": ["physics"]}})
+                    assert await invalidated()
+                finally:
+                    task.cancel()
+                    await asyncio.wait([task])
+
+                # A write made while no watcher runs is replayed from the saved token
+                await get_user_profile(USER_ID)
+                await users.update_one({"_id": ObjectId(USER_ID)}, {"$set": {"interests": ["chemistry"]}})
+                restarted = UserChangeWatcher(cache=cache, save_interval=0)
+                task = asyncio.create_task(restarted.run())
+                try:
+                    assert await invalidated()
+                    assert restarted.full_invalidations == 0
+                finally:
+                    task.cancel()
+                    await asyncio.wait([task])
+        finally:
+            await client.drop_database(test_db.name)
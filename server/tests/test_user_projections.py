@@ -0,0 +1,110 @@
+import pytest
+from bson import ObjectId
+from unittest.mock import AsyncMock, MagicMock, patch
+from app.db.user_repository import add_interest, get_user_concept_view, remove_interest, save_prepared_concepts, user_cache
+
+USER_ID = "507f1f77bcf86cd799439011"
+
+
+def users_collection(find_one=None, matched_count=1):
+    users = MagicMock()
+    users.find_one = AsyncMock(return_value=find_one)
+    users.update_one = AsyncMock(return_value=MagicMock(matched_count=matched_count))
+    return users
+
+
+def view_patches(users, daily=None):
+    return (
+        patch('app.db.user_repository.db', {"users": users}),
+        patch('app.db.user_repository.get_daily_concept', new_callable=AsyncMock, return_value=daily),
+    )
+
+
+class TestUserConceptView:
+    """Reads for daily concept selection: a projected user plus daily_concepts lookups"""
+
+    def setup_method(self):
+        user_cache.invalidate()
+
+    @pytest.mark.asyncio
+    async def test_user_document_read_projects_only_the_profile(self):
+        """Test that the user read never fetches the password"""
+        users = users_collection(find_one={"_id": ObjectId(USER_ID), "username": "learner", "email": "learner@example.com"})
+        users_patch, daily_patch = view_patches(users)
+        with users_patch, daily_patch as mock_daily, \
+             patch('app.db.daily_concept_repository.get_recent_seen_terms', new_callable=AsyncMock) as mock_seen:
+            await get_user_concept_view(USER_ID, "physics", "2025-01-02")
+
+        assert users.find_one.call_args[0][1] == {"username": 1, "email": 1, "interests": 1, "prepared": 1}
+        mock_daily.assert_awaited_once_with(ObjectId(USER_ID), "2025-01-02")
+        # The category's history is left to the generation path
+        mock_seen.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_builds_view_from_all_reads(self):
+        """Test that the reads map onto the attributes the service reads"""
+        document = {
+            "_id": ObjectId(USER_ID),
+            "username": "learner",
+            "email": "learner@example.com",
+            "prepared": {"2025-01-02": {"physics": {"category": "physics", "term": "Enthalpy", "explanation": "..."}}},
+        }
+        daily = {"category": "physics", "term": "Entropy", "explanation": "..."}
+        users_patch, daily_patch = view_patches(users_collection(find_one=document), daily)
+        with users_patch, daily_patch:
+            view = await get_user_concept_view(USER_ID, "physics", "2025-01-02")
+
+        assert view.id == USER_ID
+        assert view.daily["2025-01-02"]["term"] == "Entropy"
+        assert view.prepared["2025-01-02"]["physics"]["term"] == "Enthalpy"
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("category", ["node.js", "100%.net"])
+    async def test_prepared_concept_is_read_back_as_written(self, category):
+        """Test that a category with characters MongoDB treats specially round-trips through the store"""
+        prepared = {"category": category, "term": "Event loop", "explanation": "..."}
+        users = users_collection()
+        users.bulk_write = AsyncMock(return_value=MagicMock(modified_count=1))
+        with patch('app.db.user_repository.db', {"users": users}):
+            await save_prepared_concepts("2025-01-02", {ObjectId(USER_ID): {category: prepared}})
+
+        written = users.bulk_write.await_args[0][0][0]._doc["$set"]["prepared"]
+        assert all("." not in key and not key.startswith("$") for key in written["2025-01-02"])
+
+        document = {"_id": ObjectId(USER_ID), "username": "learner", "email": "learner@example.com", "prepared": written}
+        users_patch, daily_patch = view_patches(users_collection(find_one=document))
+        with users_patch, daily_patch:
+            view = await get_user_concept_view(USER_ID, category, "2025-01-02")
+
+        assert view.prepared == {"2025-01-02": {category: prepared}}
+
+    @pytest.mark.asyncio
+    async def test_missing_user(self):
+        """Test that unknown and malformed ids return None"""
+        users_patch, daily_patch = view_patches(users_collection(find_one=None))
+        with users_patch, daily_patch:
+            assert await get_user_concept_view(USER_ID, "physics", "2025-01-02") is None
+            assert await get_user_concept_view("not-an-id", "physics", "2025-01-02") is None
+
+
+class TestInterestUpdates:
+    """Interest updates check existence through the update itself"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("update", [add_interest, remove_interest])
+    async def test_no_read_before_update(self, update):
+        """Test that the user document is never fetched"""
+        users = users_collection()
+        with patch('app.db.user_repository.db', {"users": users}):
+            await update(USER_ID, "physics")
+
+        users.find_one.assert_not_called()
+        users.update_one.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("update", [add_interest, remove_interest])
+    async def test_unknown_user_is_reported(self, update):
+        """Test that an update matching no user raises User not found"""
+        with patch('app.db.user_repository.db', {"users": users_collection(matched_count=0)}):
+            with pytest.raises(ValueError, match="User not found"):
+                await update(USER_ID, "physics")
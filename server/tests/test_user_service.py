@@ -2,6 +2,7 @@ import pytest
 import asyncio
 import bcrypt
 from unittest.mock import AsyncMock, patch, MagicMock
+from pymongo.errors import DuplicateKeyError
 from app.services.user_service import register_user, authenticate_user
 from app.models.user_model import UserCreate, UserInDB, UserLogin
 
@@ -20,22 +21,15 @@ class TestUserService:
             interests=["programming"]
         )
         
-        # Mock existing user in database
-        existing_user = UserInDB(
-            id="existing_user_id",
-            username="existinguser",
-            email="test@example.com",
-            password="hashed_password",
-            interests=["coding"]
-        )
-        
-        # Mock the database function to return existing user
-        with patch('app.services.user_service.get_user_by_email', new_callable=AsyncMock) as mock_get_user:
-            mock_get_user.return_value = existing_user
+        # The unique email index rejects the insert; no lookup happens first
+        with patch('app.services.user_service.create_user', new_callable=AsyncMock) as mock_create_user, \
+             patch('app.services.user_service.get_user_by_email', new_callable=AsyncMock) as mock_get_user:
+            mock_create_user.side_effect = DuplicateKeyError("E11000 duplicate key error")
             
             # Act & Assert - Should raise ValueError
             with pytest.raises(ValueError, match="User already exists with this email"):
                 await register_user(user_data)
+            mock_get_user.assert_not_called()
     
     @pytest.mark.asyncio
     async def test_register_user_password_is_encrypted(self):
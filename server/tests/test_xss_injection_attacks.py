@@ -1,7 +1,6 @@
 import pytest
 from unittest.mock import AsyncMock, patch, MagicMock
-from app.db.user_repository import add_term_to_history, save_daily_concept
-from app.models.user_model import UserInDB
+from app.db.daily_concept_repository import commit_daily_concept
 
 
 class TestXSSAndInjectionAttacks:
@@ -28,19 +27,10 @@ class TestXSSAndInjectionAttacks:
             "<body onload=alert('XSS')>",
         ]
         
-        with patch('app.db.user_repository.get_user_by_id', new_callable=AsyncMock) as mock_get_user, \
-             patch('app.db.user_repository.db') as mock_db:
-            
-            mock_user = UserInDB(
-                id=target_user_id,
-                username="test_user",
-                email="test@example.com",
-                password="hashed_password",
-                interests=["programming"]
-            )
-            mock_get_user.return_value = mock_user
+        with patch('app.db.daily_concept_repository.db') as mock_db:
+            
             mock_update = AsyncMock()
-            mock_db.__getitem__.return_value.update_one = mock_update
+            mock_db.__getitem__.return_value.find_one_and_update = mock_update
             
             blocked_attacks = 0
             
@@ -51,11 +41,11 @@ class TestXSSAndInjectionAttacks:
                 
                 try:
                     # Test XSS in history terms
-                    await add_term_to_history(target_user_id, "category", payload)
+                    await commit_daily_concept(target_user_id, "category", payload, "explanation")
                     
                     if mock_update.called:
                         call_args = mock_update.call_args
-                        stored_term = call_args[0][1]["$addToSet"][f"history.category"]
+                        stored_term = call_args[0][1]["$setOnInsert"]["term"]
                         
                         # Check if dangerous HTML/JS was sanitized
                         dangerous_patterns = ['<script', '<img', 'javascript:', '<svg', '<iframe', 'onload', 'onerror']
@@ -106,19 +96,10 @@ class TestXSSAndInjectionAttacks:
             "<form action=http://evil.com method=post>",
         ]
         
-        with patch('app.db.user_repository.get_user_by_id', new_callable=AsyncMock) as mock_get_user, \
-             patch('app.db.user_repository.db') as mock_db:
-            
-            mock_user = UserInDB(
-                id=target_user_id,
-                username="test_user", 
-                email="test@example.com",
-                password="hashed_password",
-                interests=["programming"]
-            )
-            mock_get_user.return_value = mock_user
+        with patch('app.db.daily_concept_repository.db') as mock_db:
+            
             mock_update = AsyncMock()
-            mock_db.__getitem__.return_value.update_one = mock_update
+            mock_db.__getitem__.return_value.find_one_and_update = mock_update
             
             blocked_attacks = 0
             
@@ -126,17 +107,11 @@ class TestXSSAndInjectionAttacks:
                 print(f"\nHTML Injection #{i}: {payload[:40]}...")
                 
                 try:
-                    await save_daily_concept(target_user_id, "test", "term", payload)
+                    await commit_daily_concept(target_user_id, "test", "term", payload)
                     
                     if mock_update.called:
                         call_args = mock_update.call_args
-                        stored_explanation = call_args[0][1]["$set"]["daily"]
-                        
-                        # Extract the explanation from the nested structure
-                        explanation_text = ""
-                        for date_key in stored_explanation:
-                            if isinstance(stored_explanation[date_key], dict):
-                                explanation_text = stored_explanation[date_key].get("explanation", "")
+                        explanation_text = call_args[0][1]["$setOnInsert"]["explanation"]
                         
                         # Check for dangerous HTML tags
                         dangerous_tags = ['<script', '<style', '<link', '<base', '<object', '<embed', '<form']
@@ -177,20 +152,10 @@ class TestXSSAndInjectionAttacks:
             "\\\\server\\share\\file.txt",
         ]
         
-        # Mock user exists for the test
         target_user_id = "507f1f77bcf86cd799439011"
-        mock_user = UserInDB(
-            id=target_user_id,
-            username="test_user",
-            email="test@example.com",
-            password="hashed_password",
-            interests=["programming"]
-        )
-        
-        with patch('app.db.user_repository.get_user_by_id', new_callable=AsyncMock) as mock_get_user, \
-             patch('app.db.user_repository.db') as mock_db:
+
+        with patch('app.db.user_repository.db') as mock_db:
             
-            mock_get_user.return_value = mock_user
             mock_update = AsyncMock()
             mock_db.__getitem__.return_value.update_one = mock_update
             